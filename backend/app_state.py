@@ -1,8 +1,9 @@
 """
 Global application state
-Stores heavy resources loaded at startup (OCR engine, etc.)
+Stores heavy resources loaded at startup (OCR engine, LLM agents, etc.)
 """
 
 class AppState:
     """Application-wide state container"""
     ocr_service = None  # Will be initialized in lifespan
+    llm_service = None  # Single LLMService (clients + compiled agents), see utils.dependencies.get_llm_service
@@ -64,7 +64,48 @@ def init_db():
         print(f"   PostgreSQL에 pgvector가 설치되어 있는지 확인하세요.")
     
     # 모든 모델 임포트 (테이블 생성을 위해 필요)
-    from models import user, health_record, analysis_report, user_detail, weekly_plan
+    from models import user, health_record, analysis_report, user_detail, weekly_plan, llm_response_cache
     
     # 테이블 생성
     Base.metadata.create_all(bind=engine)
+
+    # 기존 테이블에 추가된 컬럼 반영 (create_all은 이미 있는 테이블을 변경하지 않음)
+    apply_additive_migrations()
+
+
+# 기존 테이블에 나중에 추가된 컬럼 (멱등 SQL, 순서대로 실행)
+ADDITIVE_MIGRATIONS = [
+    # 분석 리포트 임베딩 백그라운드 생성 상태
+    "ALTER TABLE inbody_analysis_reports ADD COLUMN IF NOT EXISTS embedding_status VARCHAR(20) NOT NULL DEFAULT 'pending'",
+    "CREATE INDEX IF NOT EXISTS ix_inbody_analysis_reports_embedding_status ON inbody_analysis_reports (embedding_status)",
+    "UPDATE inbody_analysis_reports SET embedding_status = 'ready' WHERE embedding_status = 'pending' AND embedding_1536 IS NOT NULL",
+    # 주간 계획 입력 변경 감지 해시
+    "ALTER TABLE weekly_plans ADD COLUMN IF NOT EXISTS input_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_weekly_plans_input_hash ON weekly_plans (input_hash)",
+    # 분석 리포트 섹션 색인 (기존 리포트는 조회 시 즉석 파싱으로 대체)
+    "ALTER TABLE inbody_analysis_reports ADD COLUMN IF NOT EXISTS section_index JSONB",
+    # 벡터 검색
+    # - 리포트가 적은 사용자: (user_id, generated_at) 인덱스로 해당 사용자 행만 읽어 정확 검색
+    # - 리포트가 많은 사용자: HNSW 근사 검색
+    "CREATE INDEX IF NOT EXISTS ix_inbody_analysis_reports_user_generated ON inbody_analysis_reports (user_id, generated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_inbody_analysis_reports_embedding_1536_hnsw ON inbody_analysis_reports "
+    "USING hnsw (embedding_1536 vector_cosine_ops) WITH (m = 16, ef_construction = 64)",
+    "CREATE INDEX IF NOT EXISTS ix_inbody_analysis_reports_embedding_1024_hnsw ON inbody_analysis_reports "
+    "USING hnsw (embedding_1024 vector_cosine_ops) WITH (m = 16, ef_construction = 64)",
+]
+
+
+def apply_additive_migrations():
+    """
+    ADDITIVE_MIGRATIONS 실행 (실패해도 서버 시작은 계속)
+
+    문장마다 별도 트랜잭션으로 실행하여, 하나가 실패해도 (예: HNSW를 지원하지 않는 pgvector 버전)
+    나머지는 적용되도록 합니다.
+    """
+    from sqlalchemy import text
+    for statement in ADDITIVE_MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(statement))
+        except Exception as e:
+            print(f"⚠️  마이그레이션을 적용할 수 없습니다 ({statement[:60]}...): {e}")
@@ -99,6 +99,11 @@ class WeeklyPlanGenerationError(WeeklyPlanServiceError):
     pass
 
 
+class WeeklyPlanNotEditableError(WeeklyPlanServiceError):
+    """요일별 구조화 데이터가 없는(텍스트) 계획이라 부분 수정할 수 없음"""
+    pass
+
+
 # ============================================
 # Goal/UserDetail Service 예외
 # ============================================
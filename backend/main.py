@@ -38,12 +38,40 @@ async def lifespan(app: FastAPI):
     import asyncio
     asyncio.create_task(load_ocr_engine())
     
+    # LLM 클라이언트 + LangGraph 에이전트 준비 (앱 전역 단일 인스턴스)
+    from utils.dependencies import get_llm_service
+    get_llm_service()
+    print("✅ LLM 에이전트 준비 완료")
+
+    # LangGraph 체크포인트 보존 정책 (TTL / 스레드당 개수 제한) 주기 적용
+    from services.llm.checkpointer import run_checkpoint_pruning
+    checkpoint_pruning_task = asyncio.create_task(run_checkpoint_pruning())
+
+    # 이전 실행에서 임베딩을 만들지 못한 분석 리포트 재등록
+    from services.llm.embedding_jobs import requeue_pending_embeddings
+    asyncio.create_task(requeue_pending_embeddings())
+
+    # 임베딩이 비어 있는 리포트 주기적 백필 (EMBEDDING_BACKFILL=off로 비활성화)
+    from services.llm.embedding_backfill import EMBEDDING_BACKFILL, embedding_backfill_worker
+    embedding_backfill_task = None
+    if EMBEDDING_BACKFILL != "off":
+        embedding_backfill_task = asyncio.create_task(embedding_backfill_worker.run_forever())
+
     print("✅ 서버 시작 완료 (OCR은 백그라운드에서 로딩 중)")
 
     yield
     
     # 종료 시 정리 작업
     print("👋 서버 종료 중...")
+    checkpoint_pruning_task.cancel()
+    if embedding_backfill_task is not None:
+        embedding_backfill_task.cancel()
+    from services.llm.checkpointer import close_checkpointer
+    await close_checkpointer()
+    from services.llm.llm_clients import close_llm_clients
+    await close_llm_clients()
+    from app_state import AppState
+    AppState.llm_service = None
 
 #규민 수정 외부 접속을 위한
 origins = [
@@ -96,7 +124,14 @@ async def health_check():
         from sqlalchemy import text
         db = next(get_db())
         db.execute(text("SELECT 1"))
-        return {"status": "healthy", "database": "connected"}
+        from services.llm.embedding_backfill import embedding_backfill_worker
+        from routers.ocr.health_records import body_type_service
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "embedding_backfill": embedding_backfill_worker.progress(),
+            "body_type_cache": body_type_service.cache_info()
+        }
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
@@ -7,5 +7,6 @@ from .health_record import HealthRecord
 from .analysis_report import InbodyAnalysisReport
 from .user_detail import UserDetail
 from .weekly_plan import WeeklyPlan
+from .llm_response_cache import LLMResponseCache
 
-__all__ = ["User", "HealthRecord", "InbodyAnalysisReport", "UserDetail", "WeeklyPlan"]
+__all__ = ["User", "HealthRecord", "InbodyAnalysisReport", "UserDetail", "WeeklyPlan", "LLMResponseCache"]
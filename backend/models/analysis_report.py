@@ -2,13 +2,21 @@
 InbodyAnalysisReport 테이블 ORM 모델 (구 AnalysisReport)
 """
 
+from typing import List, Optional
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, query_expression
+from sqlalchemy.dialects.postgresql import JSONB
 from pgvector.sqlalchemy import Vector
 from database import Base
 
 
+def _loaded_vector(report, key: str) -> Optional[List[float]]:
+    # deferred 컬럼은 로드 전에는 인스턴스 __dict__에 없음
+    value = report.__dict__.get(key)
+    return None if value is None else [float(v) for v in value]
+
+
 class InbodyAnalysisReport(Base):
     """분석 리포트 테이블 (LLM 출력 결과)"""
     __tablename__ = "inbody_analysis_reports"
@@ -20,12 +28,32 @@ class InbodyAnalysisReport(Base):
     model_version = Column(String(100), nullable=True)  # 사용된 모델 버전
     analysis_type = Column(String(50), nullable=True)  # "status_analysis" 또는 "goal_plan"  #fixme
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
-    embedding_1536 = Column(Vector(1536), nullable=True)  # OpenAI text-embedding-3-small
-    embedding_1024 = Column(Vector(1024), nullable=True)  # Ollama bge-m3
+    # 임베딩은 벡터 검색(SQL 안에서 거리 계산)에만 쓰이므로 기본 조회에서 제외 (행당 약 20KB)
+    # 값이 필요한 경로에서만 undefer()로 명시적으로 로드 (응답에는 loaded_embedding_* 사용)
+    embedding_1536 = deferred(Column(Vector(1536), nullable=True))  # OpenAI text-embedding-3-small
+    embedding_1024 = deferred(Column(Vector(1024), nullable=True))  # Ollama bge-m3
+    # 임베딩 생성 상태: "pending"(백그라운드 생성 대기) / "ready"(RAG 검색 가능) / "failed"(재시도 소진)
+    embedding_status = Column(String(20), nullable=False, server_default="pending", index=True)
+    # 저장 시 1회 생성한 섹션 색인 {"version", "summary", "sections": [{"title", "start", "end"}]}
+    section_index = Column(JSONB, nullable=True)
+
+    # view="summary" 조회 시 섹션 색인이 없거나 이전 형식인 리포트에만 채우는 llm_output (with_expression, 그 외 None)
+    # 색인을 즉석에서 만들기 위해 행마다 전문을 lazy load하지 않도록 같은 쿼리에서 함께 조회
+    legacy_llm_output = query_expression()
     
     # 관계 설정
     user = relationship("User", back_populates="inbody_analysis_reports")
     health_record = relationship("HealthRecord", back_populates="inbody_analysis_reports")
     
+    @property
+    def loaded_embedding_1536(self) -> Optional[List[float]]:
+        """undefer()로 로드된 경우에만 1536차원 임베딩 (로드되지 않았으면 lazy load 없이 None)"""
+        return _loaded_vector(self, "embedding_1536")
+
+    @property
+    def loaded_embedding_1024(self) -> Optional[List[float]]:
+        """undefer()로 로드된 경우에만 1024차원 임베딩 (로드되지 않았으면 lazy load 없이 None)"""
+        return _loaded_vector(self, "embedding_1024")
+
     def __repr__(self):
         return f"<InbodyAnalysisReport(id={self.id}, user_id={self.user_id}, record_id={self.record_id})>"
@@ -0,0 +1,21 @@
+"""
+LLMResponseCache 테이블 ORM 모델
+"""
+
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+
+class LLMResponseCache(Base):
+    """LLM 응답 캐시 테이블 (프롬프트 해시 → 응답)"""
+    __tablename__ = "llm_response_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256(model, temperature, system prompt, messages)
+    model = Column(String(100), nullable=True)  # 응답을 생성한 모델
+    response = Column(Text, nullable=False)  # LLM 응답 텍스트
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)  # NULL이면 만료 없음
+
+    def __repr__(self):
+        return f"<LLMResponseCache(cache_key={self.cache_key[:12]}..., model={self.model})>"
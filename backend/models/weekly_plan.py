@@ -4,7 +4,7 @@ WeeklyPlan 테이블 ORM 모델
 
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.dialects.postgresql import JSONB
 from database import Base
 
@@ -20,8 +20,13 @@ class WeeklyPlan(Base):
     end_date = Column(Date, nullable=False)
     plan_data = Column(JSONB, nullable=False)  # 주간 계획 데이터 (JSONB)
     model_version = Column(String(100))  # 사용된 LLM 모델
+    input_hash = Column(String(64), nullable=True, index=True)  # 생성 입력(목표/선호/근거 기록) 해시, 변경 감지용
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # view="summary" 조회 시 plan_data에서 DB가 추출해 채우는 값 (with_expression, 그 외 조회에서는 None)
+    weekly_goal = query_expression()
+    weekly_summary = query_expression()
+
     # Relationships
     user = relationship("User", back_populates="weekly_plans")
 
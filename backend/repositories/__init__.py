@@ -7,11 +7,13 @@ from .common.health_record_repository import HealthRecordRepository
 from .llm.analysis_report_repository import AnalysisReportRepository
 from .llm.user_detail_repository import UserDetailRepository
 from .llm.weekly_plan_repository import WeeklyPlanRepository
+from .llm.llm_response_cache_repository import LLMResponseCacheRepository
 
 __all__ = [
     "UserRepository",
     "HealthRecordRepository",
     "AnalysisReportRepository",
     "UserDetailRepository",
-    "WeeklyPlanRepository"
+    "WeeklyPlanRepository",
+    "LLMResponseCacheRepository"
 ]
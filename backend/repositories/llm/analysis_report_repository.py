@@ -2,15 +2,54 @@
 InbodyAnalysisReport Repository (구 AnalysisReport Repository)
 """
 
-from typing import Optional, List, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, text
+from datetime import datetime
+from typing import Optional, List, Dict, Sequence, Tuple
+from sqlalchemy.orm import Session, Query, load_only, with_expression, undefer
+from sqlalchemy import desc, func, select, extract, text, update, bindparam, or_, case
 from models.analysis_report import InbodyAnalysisReport
 from schemas.llm import AnalysisReportCreate
 
+# 벡터 검색 reranking: 최종 점수 = 유사도 * 0.7 + 시간 가중치 * 0.3
+RERANK_SIMILARITY_WEIGHT = 0.7
+RERANK_TIME_WEIGHT = 0.3
+# reranking 대상 후보 수 (벡터 거리순 상위 N개 중에서 시간 가중치를 반영해 top_k 선택)
+RERANK_CANDIDATE_POOL = 50
+
+# view별로 로드할 컬럼 (full은 전체 행)
+_METADATA_COLUMNS = (
+    InbodyAnalysisReport.id, InbodyAnalysisReport.user_id, InbodyAnalysisReport.record_id,
+    InbodyAnalysisReport.model_version, InbodyAnalysisReport.analysis_type,
+    InbodyAnalysisReport.generated_at, InbodyAnalysisReport.embedding_status,
+)
+_VIEW_COLUMNS = {
+    "metadata": _METADATA_COLUMNS,
+    # 요약/섹션 목록은 section_index에서 읽으므로 llm_output과 임베딩은 로드하지 않음
+    "summary": _METADATA_COLUMNS + (InbodyAnalysisReport.section_index,),
+}
+
 
 class AnalysisReportRepository:
     """분석 리포트 데이터 접근 계층"""
+
+    @staticmethod
+    def _query(db: Session, view: str = "full") -> Query:
+        """view에 필요한 컬럼만 로드하는 쿼리 (metadata / summary / full)"""
+        from services.llm.parse_utils import SECTION_INDEX_VERSION
+
+        query = db.query(InbodyAnalysisReport)
+        if view in _VIEW_COLUMNS:
+            query = query.options(load_only(*_VIEW_COLUMNS[view]))
+        if view == "summary":
+            # 색인이 없거나 이전 형식인 리포트만 전문을 같은 쿼리에서 함께 로드 (행별 lazy load 방지)
+            needs_rebuild = or_(
+                InbodyAnalysisReport.section_index.is_(None),
+                InbodyAnalysisReport.section_index["version"].as_integer().is_distinct_from(SECTION_INDEX_VERSION),
+            )
+            query = query.options(with_expression(
+                InbodyAnalysisReport.legacy_llm_output,
+                case((needs_rebuild, InbodyAnalysisReport.llm_output), else_=None)
+            ))
+        return query
     
     @staticmethod
     def create(db: Session, user_id: int, report_data: AnalysisReportCreate) -> InbodyAnalysisReport:
@@ -22,7 +61,9 @@ class AnalysisReportRepository:
             model_version=report_data.model_version,
             analysis_type=report_data.analysis_type,
             embedding_1536=report_data.embedding_1536,
-            embedding_1024=report_data.embedding_1024
+            embedding_1024=report_data.embedding_1024,
+            embedding_status="ready" if report_data.embedding_1536 is not None else "pending",
+            section_index=report_data.section_index
         )
         db.add(db_report)
         db.commit()
@@ -30,14 +71,47 @@ class AnalysisReportRepository:
         return db_report
     
     @staticmethod
-    def get_by_id(db: Session, report_id: int) -> Optional[InbodyAnalysisReport]:
-        """ID로 리포트 조회"""
-        return db.query(InbodyAnalysisReport).filter(InbodyAnalysisReport.id == report_id).first()
+    def get_by_id(
+        db: Session,
+        report_id: int,
+        view: str = "full",
+        include_embeddings: bool = False
+    ) -> Optional[InbodyAnalysisReport]:
+        """ID로 리포트 조회 (view: 로드할 컬럼 범위, include_embeddings: full view에서 임베딩도 같은 쿼리로 로드)"""
+        query = AnalysisReportRepository._query(db, view)
+        if include_embeddings and view == "full":
+            query = query.options(
+                undefer(InbodyAnalysisReport.embedding_1536),
+                undefer(InbodyAnalysisReport.embedding_1024)
+            )
+        return query.filter(InbodyAnalysisReport.id == report_id).first()
     
     @staticmethod
-    def get_by_record_id(db: Session, record_id: int) -> Optional[InbodyAnalysisReport]:
-        """건강 기록 ID로 리포트 조회 (가장 최신)"""
-        return db.query(InbodyAnalysisReport)\
+    def get_section_index(db: Session, report_id: int) -> Optional[Dict]:
+        """
+        섹션 색인만 조회 (llm_output 전문은 로드하지 않음)
+
+        Returns:
+            색인 dict, 리포트가 없으면 None, 색인이 없는 기존 리포트면 빈 dict
+        """
+        row = db.query(InbodyAnalysisReport.section_index)\
+            .filter(InbodyAnalysisReport.id == report_id)\
+            .first()
+        if row is None:
+            return None
+        return row.section_index or {}
+
+    @staticmethod
+    def get_section_text(db: Session, report_id: int, start: int, end: int) -> Optional[str]:
+        """llm_output[start:end] 구간만 DB에서 잘라서 조회"""
+        return db.query(func.substr(InbodyAnalysisReport.llm_output, start + 1, end - start))\
+            .filter(InbodyAnalysisReport.id == report_id)\
+            .scalar()
+
+    @staticmethod
+    def get_by_record_id(db: Session, record_id: int, view: str = "full") -> Optional[InbodyAnalysisReport]:
+        """건강 기록 ID로 리포트 조회 (가장 최신, view: 로드할 컬럼 범위)"""
+        return AnalysisReportRepository._query(db, view)\
             .filter(InbodyAnalysisReport.record_id == record_id)\
             .order_by(desc(InbodyAnalysisReport.generated_at))\
             .first()
@@ -58,9 +132,9 @@ class AnalysisReportRepository:
             .first()
     
     @staticmethod
-    def get_by_user(db: Session, user_id: int, limit: int = 10) -> List[InbodyAnalysisReport]:
-        """사용자의 리포트 목록 조회"""
-        return db.query(InbodyAnalysisReport)\
+    def get_by_user(db: Session, user_id: int, limit: int = 10, view: str = "full") -> List[InbodyAnalysisReport]:
+        """사용자의 리포트 목록 조회 (view: 로드할 컬럼 범위)"""
+        return AnalysisReportRepository._query(db, view)\
             .filter(InbodyAnalysisReport.user_id == user_id)\
             .order_by(desc(InbodyAnalysisReport.generated_at))\
             .limit(limit)\
@@ -81,9 +155,10 @@ class AnalysisReportRepository:
         db: Session,
         report_id: int,
         embedding_1536: Optional[List[float]] = None,
-        embedding_1024: Optional[List[float]] = None
+        embedding_1024: Optional[List[float]] = None,
+        status: str = "ready"
     ) -> bool:
-        """분석 리포트 임베딩 업데이트"""
+        """분석 리포트 임베딩 업데이트 (임베딩 상태도 함께 갱신)"""
         db_report = db.query(InbodyAnalysisReport)\
             .filter(InbodyAnalysisReport.id == report_id)\
             .first()
@@ -93,11 +168,111 @@ class AnalysisReportRepository:
                 db_report.embedding_1536 = embedding_1536
             if embedding_1024 is not None:
                 db_report.embedding_1024 = embedding_1024
+            db_report.embedding_status = status
             db.commit()
             db.refresh(db_report)
             return True
         return False
     
+    @staticmethod
+    def set_embedding_status(db: Session, report_id: int, status: str) -> bool:
+        """임베딩 상태만 변경 (예: 재시도 소진 시 "failed")"""
+        updated = db.query(InbodyAnalysisReport)\
+            .filter(InbodyAnalysisReport.id == report_id)\
+            .update({InbodyAnalysisReport.embedding_status: status}, synchronize_session=False)
+        db.commit()
+        return updated > 0
+
+    @staticmethod
+    def get_pending_embeddings(db: Session, limit: int = 100) -> List[InbodyAnalysisReport]:
+        """임베딩 생성 대기 중인 리포트 조회 (오래된 순)"""
+        return db.query(InbodyAnalysisReport)\
+            .filter(InbodyAnalysisReport.embedding_status == "pending")\
+            .order_by(InbodyAnalysisReport.generated_at)\
+            .limit(limit)\
+            .all()
+
+    @staticmethod
+    def _missing_embedding_filter(embedding_dims: Sequence[int], created_before: datetime):
+        """지정 차원 임베딩 중 하나라도 없는 리포트 조건 (created_before 이후 리포트는 실시간 작업에 맡김)"""
+        return (
+            or_(*(AnalysisReportRepository._embedding_column(dim).is_(None) for dim in embedding_dims)),
+            InbodyAnalysisReport.generated_at < created_before,
+        )
+
+    @staticmethod
+    def count_missing_embeddings(db: Session, embedding_dims: Sequence[int], created_before: datetime) -> int:
+        """임베딩이 비어 있는 리포트 수 (백필 진행률 계산용)"""
+        return db.query(func.count(InbodyAnalysisReport.id))\
+            .filter(*AnalysisReportRepository._missing_embedding_filter(embedding_dims, created_before))\
+            .scalar() or 0
+
+    @staticmethod
+    def get_missing_embeddings(
+        db: Session,
+        embedding_dims: Sequence[int],
+        created_before: datetime,
+        after_id: int = 0,
+        limit: int = 200
+    ) -> List[Tuple[int, str, Dict[int, bool]]]:
+        """
+        임베딩이 비어 있는 리포트를 id 순으로 조회 (keyset 페이지네이션)
+
+        Returns:
+            [(id, llm_output, {차원: 비어 있음 여부}), ...] — 임베딩 벡터 자체는 읽지 않음
+        """
+        missing = [
+            AnalysisReportRepository._embedding_column(dim).is_(None).label(f"missing_{dim}")
+            for dim in embedding_dims
+        ]
+        rows = db.execute(
+            select(InbodyAnalysisReport.id, InbodyAnalysisReport.llm_output, *missing)
+            .where(
+                InbodyAnalysisReport.id > after_id,
+                *AnalysisReportRepository._missing_embedding_filter(embedding_dims, created_before)
+            )
+            .order_by(InbodyAnalysisReport.id)
+            .limit(limit)
+        ).all()
+        return [
+            (r.id, r.llm_output, {dim: bool(getattr(r, f"missing_{dim}")) for dim in embedding_dims})
+            for r in rows
+        ]
+
+    @staticmethod
+    def bulk_update_embeddings(db: Session, embedding_dim: int, embeddings: List[Tuple[int, List[float]]]) -> int:
+        """
+        여러 리포트의 임베딩을 한 번의 executemany UPDATE로 저장
+
+        아직 비어 있는 컬럼만 채우므로 (IS NULL 조건) 실시간 작업과 겹치거나 재실행해도 덮어쓰지 않습니다.
+        1536차원(검색 기준 임베딩)을 채운 리포트는 embedding_status도 "ready"로 변경합니다.
+
+        Returns:
+            UPDATE를 시도한 리포트 수
+        """
+        if not embeddings:
+            return 0
+        table = InbodyAnalysisReport.__table__
+        column = table.c[f"embedding_{embedding_dim}"]
+        values = {column.name: bindparam("b_embedding", type_=column.type)}
+        if embedding_dim == 1536:
+            values["embedding_status"] = "ready"
+        db.execute(
+            update(table).where(table.c.id == bindparam("b_id"), column.is_(None)).values(**values),
+            [{"b_id": report_id, "b_embedding": embedding} for report_id, embedding in embeddings]
+        )
+        db.commit()
+        return len(embeddings)
+
+    @staticmethod
+    def _embedding_column(embedding_dim: int):
+        """임베딩 차원에 따른 컬럼 (1536 / 1024)"""
+        if embedding_dim == 1536:
+            return InbodyAnalysisReport.embedding_1536
+        if embedding_dim == 1024:
+            return InbodyAnalysisReport.embedding_1024
+        raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
+
     @staticmethod
     def search_similar_reports(
         db: Session,
@@ -105,10 +280,19 @@ class AnalysisReportRepository:
         query_embedding: List[float],
         top_k: int = 6,
         embedding_dim: int = 1536,
-        rerank: bool = True
+        rerank: bool = True,
+        candidate_pool: int = RERANK_CANDIDATE_POOL,
+        exact: bool = False
     ) -> List[Dict]:
         """
         Vector 유사도 검색 + Reranking (pgvector)
+
+        한 번의 쿼리로 처리합니다.
+        1. 벡터 거리순 후보 candidate_pool개 (id/날짜/거리만)
+           - exact=False: HNSW 인덱스 근사 검색
+           - exact=True: 사용자 행만 읽어 정확한 거리순 정렬 (HNSW 인덱스 미사용)
+        2. 후보 전체에 대해 유사도 * 0.7 + 시간 가중치 * 0.3 점수를 SQL에서 계산하여 top_k 선택
+        3. 최종 top_k개만 리포트 본문(llm_output)과 조인
         
         Args:
             user_id: 사용자 ID
@@ -116,64 +300,77 @@ class AnalysisReportRepository:
             top_k: 반환할 결과 수
             embedding_dim: 임베딩 차원 (1536 or 1024)
             rerank: 시간 가중치 reranking 적용 여부
+            candidate_pool: reranking 대상 후보 수 (top_k * 2보다 작으면 top_k * 2)
+            exact: 정확 검색 여부 (HNSW 인덱스 미사용)
         
         Returns:
             유사도 + 시간 가중치가 반영된 분석 리포트 리스트
         """
-        from datetime import datetime
-        import math
-        
         # 임베딩 차원에 따라 컬럼 선택
-        if embedding_dim == 1536:
-            embedding_col = InbodyAnalysisReport.embedding_1536
-        elif embedding_dim == 1024:
-            embedding_col = InbodyAnalysisReport.embedding_1024
-        else:
-            raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
-        
-        # pgvector의 cosine distance 사용
-        candidate_limit = top_k * 2 if rerank else top_k
-        
-        results = db.query(
-            InbodyAnalysisReport,
-            embedding_col.cosine_distance(query_embedding).label("distance")
-        ).filter(
+        embedding_col = AnalysisReportRepository._embedding_column(embedding_dim)
+
+        # 1. 후보: pgvector cosine distance 순 (본문/임베딩은 가져오지 않음)
+        distance = embedding_col.cosine_distance(query_embedding).label("distance")
+        pool_size = max(candidate_pool, top_k * 2) if rerank else top_k
+        searchable = (
             InbodyAnalysisReport.user_id == user_id,
+            InbodyAnalysisReport.embedding_status == "ready",
             embedding_col.isnot(None)
-        ).order_by(
-            text("distance")
-        ).limit(candidate_limit).all()
-        
-        # 결과 변환
-        candidates = [
-            {
-                "id": r[0].id,
-                "user_id": r[0].user_id,
-                "record_id": r[0].record_id,
-                "generated_at": r[0].generated_at,
-                "llm_output": r[0].llm_output,
-                "model_version": r[0].model_version,
-                "similarity": 1 - r.distance,  # cosine similarity로 변환
+        )
+        # "+ 0"으로 정렬식이 인덱스 연산자와 달라지면 플래너가 HNSW 대신 정확 정렬을 사용
+        order_key = embedding_col.cosine_distance(query_embedding) + 0 if exact else distance
+        candidates = select(
+            InbodyAnalysisReport.id,
+            InbodyAnalysisReport.generated_at,
+            distance
+        ).where(*searchable).order_by(order_key).limit(pool_size).subquery("candidates")
+
+        # 2. 점수 계산: 시간 가중치 = 1 / (1 + ln(경과 일수 + 1))
+        similarity = (1 - candidates.c.distance).label("similarity")
+        days_ago = func.greatest(
+            func.floor(extract("epoch", func.now() - candidates.c.generated_at) / 86400), 0
+        )
+        time_weight = 1.0 / (1 + func.ln(days_ago + 1))
+        if rerank:
+            score = similarity * RERANK_SIMILARITY_WEIGHT + time_weight * RERANK_TIME_WEIGHT
+        else:
+            score = similarity
+        ranked = select(
+            candidates.c.id,
+            similarity,
+            days_ago.label("days_ago"),
+            time_weight.label("time_weight"),
+            score.label("rerank_score")
+        ).order_by(desc("rerank_score")).limit(top_k).subquery("ranked")
+
+        # 3. 최종 top_k만 본문 조인
+        rows = db.execute(
+            select(
+                ranked,
+                InbodyAnalysisReport.user_id,
+                InbodyAnalysisReport.record_id,
+                InbodyAnalysisReport.generated_at,
+                InbodyAnalysisReport.llm_output,
+                InbodyAnalysisReport.model_version
+            ).join(
+                InbodyAnalysisReport, InbodyAnalysisReport.id == ranked.c.id
+            ).order_by(desc(ranked.c.rerank_score))
+        ).all()
+
+        results = []
+        for r in rows:
+            result = {
+                "id": r.id,
+                "user_id": r.user_id,
+                "record_id": r.record_id,
+                "generated_at": r.generated_at,
+                "llm_output": r.llm_output,
+                "model_version": r.model_version,
+                "similarity": r.similarity,  # cosine similarity
             }
-            for r in results
-        ]
-        
-        # Reranking: 유사도 + 시간 가중치
-        if rerank and candidates:
-            now = datetime.utcnow()
-            
-            for candidate in candidates:
-                # 시간 가중치 계산
-                days_ago = (now - candidate["generated_at"]).days
-                time_decay = 1 / (1 + math.log(days_ago + 1))
-                
-                # 최종 점수 = 유사도 * 0.7 + 시간 가중치 * 0.3
-                candidate["rerank_score"] = candidate["similarity"] * 0.7 + time_decay * 0.3
-                candidate["time_weight"] = time_decay
-                candidate["days_ago"] = days_ago
-            
-            # Rerank score로 재정렬
-            candidates.sort(key=lambda x: x["rerank_score"], reverse=True)
-        
-        # top_k만 반환
-        return candidates[:top_k]
+            if rerank:
+                result["rerank_score"] = r.rerank_score
+                result["time_weight"] = r.time_weight
+                result["days_ago"] = int(r.days_ago)
+            results.append(result)
+        return results
@@ -0,0 +1,69 @@
+"""
+LLMResponseCache Repository
+LLM 응답 캐시 데이터 접근 계층
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, or_
+from models.llm_response_cache import LLMResponseCache
+
+
+class LLMResponseCacheRepository:
+    """LLM 응답 캐시 데이터 접근 계층"""
+
+    @staticmethod
+    def get(db: Session, cache_key: str) -> Optional[str]:
+        """만료되지 않은 캐시 응답 조회"""
+        now = datetime.now(timezone.utc)
+        row = db.query(LLMResponseCache.response)\
+            .filter(
+                LLMResponseCache.cache_key == cache_key,
+                or_(LLMResponseCache.expires_at.is_(None), LLMResponseCache.expires_at > now)
+            )\
+            .first()
+        return row.response if row else None
+
+    @staticmethod
+    def upsert(
+        db: Session,
+        cache_key: str,
+        model: Optional[str],
+        response: str,
+        expires_at: Optional[datetime]
+    ) -> None:
+        """캐시 응답 저장 (같은 키가 있으면 덮어씀)"""
+        db.merge(LLMResponseCache(
+            cache_key=cache_key,
+            model=model,
+            response=response,
+            created_at=datetime.now(timezone.utc),
+            expires_at=expires_at
+        ))
+        db.commit()
+
+    @staticmethod
+    def prune(db: Session, max_entries: int) -> int:
+        """만료된 항목과 최대 개수를 넘는 오래된 항목 삭제"""
+        now = datetime.now(timezone.utc)
+        deleted = db.query(LLMResponseCache)\
+            .filter(LLMResponseCache.expires_at.isnot(None), LLMResponseCache.expires_at <= now)\
+            .delete(synchronize_session=False)
+
+        overflow_keys = db.query(LLMResponseCache.cache_key)\
+            .order_by(desc(LLMResponseCache.created_at))\
+            .offset(max_entries)\
+            .subquery()
+        deleted += db.query(LLMResponseCache)\
+            .filter(LLMResponseCache.cache_key.in_(overflow_keys.select()))\
+            .delete(synchronize_session=False)
+
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def clear(db: Session) -> None:
+        """캐시 전체 삭제"""
+        db.query(LLMResponseCache).delete(synchronize_session=False)
+        db.commit()
@@ -3,16 +3,49 @@ WeeklyPlan Repository
 주간 계획 데이터 접근 계층
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy.orm import Session, Query, load_only, with_expression
+from sqlalchemy import desc, and_, func
 from models.weekly_plan import WeeklyPlan
 from schemas.llm import WeeklyPlanCreate, WeeklyPlanUpdate
 from typing import Optional, List
 from datetime import date
 
 
+# view별로 로드할 컬럼 (full은 전체 행)
+_METADATA_COLUMNS = (
+    WeeklyPlan.id, WeeklyPlan.user_id, WeeklyPlan.week_number,
+    WeeklyPlan.start_date, WeeklyPlan.end_date, WeeklyPlan.model_version, WeeklyPlan.created_at,
+)
+# 구조화 이전 텍스트 계획의 요약으로 쓸 본문 앞부분 길이
+_LEGACY_SUMMARY_CHARS = 300
+
+
 class WeeklyPlanRepository:
     """주간 계획 데이터 접근 계층"""
+
+    @staticmethod
+    def _query(db: Session, view: str = "full") -> Query:
+        """
+        view에 필요한 컬럼만 로드하는 쿼리
+
+        - metadata: plan_data를 로드하지 않음
+        - summary: plan_data 대신 DB에서 추출한 weekly_goal/weekly_summary만 로드
+        - full: 전체 행
+        """
+        query = db.query(WeeklyPlan)
+        if view == "full":
+            return query
+        query = query.options(load_only(*_METADATA_COLUMNS))
+        if view == "summary":
+            content_head = func.substr(WeeklyPlan.plan_data["content"].astext, 1, _LEGACY_SUMMARY_CHARS)
+            query = query.options(
+                with_expression(WeeklyPlan.weekly_goal, WeeklyPlan.plan_data["weekly_goal"].astext),
+                with_expression(
+                    WeeklyPlan.weekly_summary,
+                    func.coalesce(WeeklyPlan.plan_data["weekly_summary"].astext, content_head)
+                ),
+            )
+        return query
     
     @staticmethod
     def create(db: Session, user_id: int, plan_data: WeeklyPlanCreate) -> WeeklyPlan:
@@ -23,7 +56,8 @@ class WeeklyPlanRepository:
             start_date=plan_data.start_date,
             end_date=plan_data.end_date,
             plan_data=plan_data.plan_data,
-            model_version=plan_data.model_version
+            model_version=plan_data.model_version,
+            input_hash=plan_data.input_hash
         )
         db.add(db_plan)
         db.commit()
@@ -31,23 +65,36 @@ class WeeklyPlanRepository:
         return db_plan
     
     @staticmethod
-    def get_by_id(db: Session, plan_id: int) -> Optional[WeeklyPlan]:
-        """ID로 주간 계획 조회"""
-        return db.query(WeeklyPlan).filter(WeeklyPlan.id == plan_id).first()
+    def get_by_id(db: Session, plan_id: int, view: str = "full") -> Optional[WeeklyPlan]:
+        """ID로 주간 계획 조회 (view: 로드할 컬럼 범위)"""
+        return WeeklyPlanRepository._query(db, view).filter(WeeklyPlan.id == plan_id).first()
     
     @staticmethod
-    def get_by_user(db: Session, user_id: int, limit: int = 10) -> List[WeeklyPlan]:
-        """사용자의 주간 계획 목록 조회"""
-        return db.query(WeeklyPlan)\
+    def get_by_user(db: Session, user_id: int, limit: int = 10, view: str = "full") -> List[WeeklyPlan]:
+        """사용자의 주간 계획 목록 조회 (view: 로드할 컬럼 범위)"""
+        return WeeklyPlanRepository._query(db, view)\
             .filter(WeeklyPlan.user_id == user_id)\
             .order_by(desc(WeeklyPlan.created_at))\
             .limit(limit)\
             .all()
     
     @staticmethod
-    def get_by_week(db: Session, user_id: int, week_number: int) -> Optional[WeeklyPlan]:
-        """특정 주차의 계획 조회 (가장 최신)"""
+    def get_latest_by_input_hash(db: Session, user_id: int, input_hash: str) -> Optional[WeeklyPlan]:
+        """같은 생성 입력 해시로 저장된 가장 최신 계획"""
         return db.query(WeeklyPlan)\
+            .filter(
+                and_(
+                    WeeklyPlan.user_id == user_id,
+                    WeeklyPlan.input_hash == input_hash
+                )
+            )\
+            .order_by(desc(WeeklyPlan.id))\
+            .first()
+
+    @staticmethod
+    def get_by_week(db: Session, user_id: int, week_number: int, view: str = "full") -> Optional[WeeklyPlan]:
+        """특정 주차의 계획 조회 (가장 최신, view: 로드할 컬럼 범위)"""
+        return WeeklyPlanRepository._query(db, view)\
             .filter(
                 and_(
                     WeeklyPlan.user_id == user_id,
@@ -6,11 +6,23 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas.llm import AnalysisReportResponse, AnalysisChatRequest, AnalysisChatResponse
+from utils.dependencies import get_llm_service
+from schemas.llm import (
+    AnalysisReportResponse,
+    AnalysisReportSummaryResponse,
+    AnalysisReportMetadataResponse,
+    AnalysisSectionResponse,
+    AnalysisChatRequest,
+    AnalysisChatResponse,
+    AnalysisSection,
+    AnalysisReportView,
+    ResponseView
+)
 from services.common.health_service import HealthService
 from services.llm.llm_service import LLMService
-from services.llm.parse_utils import split_analysis_response
+from services.llm.parse_utils import build_section_index, get_section_index
 from repositories.llm.analysis_report_repository import AnalysisReportRepository
+from utils.sse import sse_event_stream, sse_response
 from typing import List
 # Note: 현재는 Service가 None을 반환하므로 라우터에서 체크
 # 향후 Service 레이어 개선 시 아래 예외들을 사용할 수 있음
@@ -18,20 +30,22 @@ from typing import List
 
 router = APIRouter()
 health_service = HealthService()
-llm_service = LLMService()  # LLM 서비스 인스턴스 (메모리 공유를 위해 전역 사용)
 
 
-def _parse_analysis_report(report) -> AnalysisReportResponse:
+def _parse_analysis_report(report, view: ResponseView = "full") -> AnalysisReportView:
     """
-    분석 리포트에 summary/content 파싱 추가
-    기존 분석 결과 조회 시에도 파싱된 데이터를 제공하기 위한 헬퍼 함수
+    분석 리포트를 view에 맞는 응답으로 변환
+    기존 분석 결과 조회 시에도 저장된 섹션 색인으로 요약을 제공하기 위한 헬퍼 함수
     """
-    response = AnalysisReportResponse.model_validate(report)
-    if response.llm_output:
-        parsed = split_analysis_response(response.llm_output)
-        response.summary = parsed["summary"]
-        response.content = parsed["content"]
-    return response
+    if view == "metadata":
+        return AnalysisReportMetadataResponse.model_validate(report)
+    if view == "summary":
+        index = get_section_index(report)
+        response = AnalysisReportSummaryResponse.model_validate(report)
+        response.summary = index["summary"]
+        response.sections = [AnalysisSection(**section) for section in index["sections"]]
+        return response
+    return HealthService._build_report_response(report)
 
 
 
@@ -59,36 +73,105 @@ async def analyze_health_record(
     return analysis_report
 
 
-@router.get("/{report_id}", response_model=AnalysisReportResponse)
-def get_analysis_report(report_id: int, db: Session = Depends(get_db)):
+@router.post("/{record_id}/stream")
+async def analyze_health_record_stream(
+    user_id: int,
+    record_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    건강 기록 분석 (LLM 토큰 스트리밍, Server-Sent Events)
+    
+    - **user_id**: 사용자 ID
+    - **record_id**: 건강 기록 ID
+    
+    Events:
+        token: {"content": str}  LLM 토큰
+        done:  AnalysisReportResponse  저장된 분석 리포트 (POST /{record_id} 응답과 동일)
+        error: {"detail": str}
+    """
+    events = await health_service.analyze_health_record_stream(db, user_id, record_id)
+    if events is None:
+        raise HTTPException(status_code=404, detail="건강 기록을 찾을 수 없습니다.")
+    return sse_response(sse_event_stream(events, lambda event: event["report"]))
+
+
+@router.get("/{report_id}", response_model=AnalysisReportView)
+def get_analysis_report(
+    report_id: int,
+    view: ResponseView = "full",
+    include_embeddings: bool = False,
+    db: Session = Depends(get_db)
+):
     """
     분석 리포트 조회
     
     - **report_id**: 리포트 ID
+    - **view**: 응답 형태 (metadata: 본문 없음 / summary: 요약 + 섹션 목록 / full: 전체, 기본값)
+    - **include_embeddings**: true면 full 응답에 embedding_1536/embedding_1024 포함 (기본 false, 행당 약 20KB)
     """
-    analysis_report = AnalysisReportRepository.get_by_id(db, report_id)
+    analysis_report = AnalysisReportRepository.get_by_id(
+        db, report_id, view=view, include_embeddings=include_embeddings
+    )
     if not analysis_report:
         raise HTTPException(status_code=404, detail="분석 리포트를 찾을 수 없습니다.")
-    return _parse_analysis_report(analysis_report)
+    return _parse_analysis_report(analysis_report, view)
+
+
+@router.get("/{report_id}/sections/{section_no}", response_model=AnalysisSectionResponse)
+def get_analysis_section(report_id: int, section_no: int, db: Session = Depends(get_db)):
+    """
+    분석 리포트의 개별 섹션 조회 (전문을 내려받지 않고 필요한 섹션만)
+    
+    - **report_id**: 리포트 ID
+    - **section_no**: 섹션 번호 (리포트 응답의 sections 순서, 0부터 시작)
+    """
+    index = AnalysisReportRepository.get_section_index(db, report_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="분석 리포트를 찾을 수 없습니다.")
+
+    llm_output = None
+    if not index:
+        # 섹션 색인이 없는 기존 리포트는 전문을 읽어 즉석에서 색인 생성
+        llm_output = AnalysisReportRepository.get_by_id(db, report_id).llm_output
+        index = build_section_index(llm_output)
 
+    sections = index["sections"]
+    if not 0 <= section_no < len(sections):
+        raise HTTPException(status_code=404, detail="분석 리포트 섹션을 찾을 수 없습니다.")
 
-@router.get("/record/{record_id}", response_model=AnalysisReportResponse)
-def get_analysis_by_record(record_id: int, db: Session = Depends(get_db)):
+    section = sections[section_no]
+    if llm_output is not None:
+        content = llm_output[section["start"]:section["end"]]
+    else:
+        content = AnalysisReportRepository.get_section_text(db, report_id, section["start"], section["end"])
+    return AnalysisSectionResponse(
+        report_id=report_id,
+        section_no=section_no,
+        title=section["title"],
+        content=content or ""
+    )
+
+
+@router.get("/record/{record_id}", response_model=AnalysisReportView)
+def get_analysis_by_record(record_id: int, view: ResponseView = "full", db: Session = Depends(get_db)):
     """
     건강 기록에 대한 분석 리포트 조회
     
     - **record_id**: 건강 기록 ID
+    - **view**: 응답 형태 (metadata / summary / full, 기본값 full)
     """
-    analysis_report = AnalysisReportRepository.get_by_record_id(db, record_id)
+    analysis_report = AnalysisReportRepository.get_by_record_id(db, record_id, view=view)
     if not analysis_report:
         raise HTTPException(status_code=404, detail="분석 리포트를 찾을 수 없습니다.")
-    return _parse_analysis_report(analysis_report)
+    return _parse_analysis_report(analysis_report, view)
 
 
-@router.get("/user/{user_id}", response_model=List[AnalysisReportResponse])
+@router.get("/user/{user_id}", response_model=List[AnalysisReportView])
 def get_user_analysis_reports(
     user_id: int,
     limit: int = 10,
+    view: ResponseView = "full",
     db: Session = Depends(get_db)
 ):
     """
@@ -96,16 +179,18 @@ def get_user_analysis_reports(
     
     - **user_id**: 사용자 ID
     - **limit**: 조회할 최대 개수
+    - **view**: 응답 형태 (metadata / summary / full, 기본값 full). 히스토리 화면은 summary 권장
     """
-    analysis_reports = AnalysisReportRepository.get_by_user(db, user_id, limit=limit)
-    return [_parse_analysis_report(report) for report in analysis_reports]
+    analysis_reports = AnalysisReportRepository.get_by_user(db, user_id, limit=limit, view=view)
+    return [_parse_analysis_report(report, view) for report in analysis_reports]
 
 
 @router.post("/{report_id}/chat", response_model=AnalysisChatResponse)
 async def chat_about_report(
     report_id: int,
     chat_request: AnalysisChatRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    llm_service: LLMService = Depends(get_llm_service)
 ):
     """
     분석 결과에 대해 AI와 대화 (휴먼 피드백)
@@ -120,3 +205,27 @@ async def chat_about_report(
     response_text = await llm_service.chat_with_analysis(chat_request.thread_id, chat_request.message)
     
     return {"response": response_text}
+
+
+@router.post("/{report_id}/chat/stream")
+async def chat_about_report_stream(
+    report_id: int,
+    chat_request: AnalysisChatRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """
+    분석 결과에 대해 AI와 대화 (LLM 토큰 스트리밍, Server-Sent Events)
+    
+    - **report_id**: 분석 리포트 ID
+    - **message**: 사용자 질문
+    
+    Events:
+        token: {"content": str}
+        done:  {"response": str, "thread_id": str}
+        error: {"detail": str}
+    """
+    events = llm_service.stream_chat_with_analysis(chat_request.thread_id, chat_request.message)
+    return sse_response(sse_event_stream(
+        events,
+        lambda event: {"response": event["response"], "thread_id": event["thread_id"]}
+    ))
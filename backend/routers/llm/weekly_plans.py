@@ -12,19 +12,37 @@ from schemas.llm import (
     WeeklyPlanUpdate,
     GoalPlanRequest,
     WeeklyPlanChatRequest,
-    WeeklyPlanChatResponse
+    WeeklyPlanChatResponse,
+    WeeklyPlanEditRequest,
+    WeeklyPlanEditResponse,
+    WeeklyPlanMetadataResponse,
+    WeeklyPlanSummaryResponse,
+    WeeklyPlanView,
+    ResponseView
 )
 from repositories.llm.weekly_plan_repository import WeeklyPlanRepository
 from services.llm.weekly_plan_service import WeeklyPlanService
+from utils.sse import sse_event_stream, sse_response
 from typing import List
 from datetime import date
-# Note: 현재는 Service가 ValueError/Exception을 발생시킴
-# 향후 Service 레이어 개선 시 아래 예외들을 사용할 수 있음
-# from exceptions import WeeklyPlanNotFoundError, WeeklyPlanGenerationError
+from exceptions import WeeklyPlanNotFoundError, WeeklyPlanNotEditableError, WeeklyPlanGenerationError
+# Note: 생성 경로는 아직 Service가 ValueError/Exception을 발생시킴 (부분 수정은 커스텀 예외 사용)
 
 router = APIRouter()
 weekly_plan_service = WeeklyPlanService()
 
+# view별 응답 스키마 (repository가 같은 view로 필요한 컬럼만 로드)
+_VIEW_SCHEMAS = {
+    "metadata": WeeklyPlanMetadataResponse,
+    "summary": WeeklyPlanSummaryResponse,
+    "full": WeeklyPlanResponse,
+}
+
+
+def _plan_view(plan, view: ResponseView):
+    """주간 계획 ORM 객체를 view에 맞는 응답으로 변환"""
+    return _VIEW_SCHEMAS[view].model_validate(plan)
+
 
 @router.post("/generate", response_model=WeeklyPlanResponse, status_code=201)
 async def generate_weekly_plan(
@@ -50,6 +68,37 @@ async def generate_weekly_plan(
         raise HTTPException(status_code=500, detail=f"주간 계획 생성 중 오류가 발생했습니다: {str(e)}")
 
 
+@router.post("/generate/stream")
+async def generate_weekly_plan_stream(
+    user_id: int,
+    request: GoalPlanRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    AI 주간 계획서 생성 (LLM 토큰 스트리밍, Server-Sent Events)
+    
+    - **user_id**: 사용자 ID
+    - **request**: 목표 계획 요청 데이터 (record_id, user_goal_type, user_goal_description)
+    
+    Events:
+        token: {"content": str}  완성된 요일부터 렌더링한 마크다운 조각 (LLM의 JSON 원문은 전송하지 않음)
+        done:  {"plan": WeeklyPlanResponse, "thread_id": str}  최종 표시는 plan.plan_data.content 사용
+        error: {"detail": str}
+    """
+    try:
+        events = await weekly_plan_service.generate_plan_stream(db, user_id, request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return sse_response(sse_event_stream(
+        events,
+        lambda event: {
+            "plan": WeeklyPlanResponse.model_validate(event["plan"]),
+            "thread_id": event["thread_id"]
+        }
+    ))
+
+
 @router.post("/{plan_id}/chat", response_model=WeeklyPlanChatResponse)
 async def chat_with_plan(
     plan_id: int,
@@ -83,6 +132,72 @@ async def chat_with_plan(
         raise HTTPException(status_code=500, detail=f"채팅 중 오류가 발생했습니다: {str(e)}")
 
 
+@router.post("/{plan_id}/chat/stream")
+async def chat_with_plan_stream(
+    plan_id: int,
+    chat_request: WeeklyPlanChatRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    주간 계획 질의응답 (LLM 토큰 스트리밍, Server-Sent Events)
+    
+    - **plan_id**: 주간 계획 ID
+    - **chat_request**: 채팅 요청 (thread_id, message)
+    
+    Events:
+        token: {"content": str}
+        done:  {"response": str, "thread_id": str}
+        error: {"detail": str}
+    """
+    plan = WeeklyPlanRepository.get_by_id(db, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="주간 계획을 찾을 수 없습니다.")
+
+    events = weekly_plan_service.chat_with_plan_stream(
+        plan_id=plan_id,
+        thread_id=chat_request.thread_id,
+        message=chat_request.message
+    )
+    return sse_response(sse_event_stream(
+        events,
+        lambda event: {"response": event["response"], "thread_id": event["thread_id"]}
+    ))
+
+
+
+@router.post("/{plan_id}/edit", response_model=WeeklyPlanEditResponse)
+async def edit_weekly_plan(
+    plan_id: int,
+    edit_request: WeeklyPlanEditRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    주간 계획 부분 수정 (변경이 필요한 요일/식사만 재생성하여 plan_data에 반영)
+    
+    - **plan_id**: 주간 계획 ID
+    - **edit_request**: 수정 요청 (예: "수요일 저녁을 샐러드로 바꿔줘", "주말 운동 강도를 낮춰줘")
+    
+    Returns:
+        수정된 주간 계획, 재생성된 요일 목록, 변경 내용 요약
+
+    Errors:
+        404: 계획 없음 / 409: 구조화 이전 텍스트 계획 / 502: LLM 응답 해석 실패
+    """
+    try:
+        result = await weekly_plan_service.edit_plan(db, plan_id, edit_request.message)
+        return WeeklyPlanEditResponse(
+            plan=WeeklyPlanResponse.model_validate(result["plan"]),
+            updated_days=result["updated_days"],
+            summary=result["summary"]
+        )
+    except WeeklyPlanNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except WeeklyPlanNotEditableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except WeeklyPlanGenerationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"주간 계획 수정 중 오류가 발생했습니다: {str(e)}")
 
 
 @router.post("/", response_model=WeeklyPlanResponse, status_code=201)
@@ -101,23 +216,25 @@ def create_weekly_plan(
     return new_plan
 
 
-@router.get("/{plan_id}", response_model=WeeklyPlanResponse)
-def get_weekly_plan(plan_id: int, db: Session = Depends(get_db)):
+@router.get("/{plan_id}", response_model=WeeklyPlanView)
+def get_weekly_plan(plan_id: int, view: ResponseView = "full", db: Session = Depends(get_db)):
     """
     특정 주간 계획 조회
     
     - **plan_id**: 계획 ID
+    - **view**: 응답 형태 (metadata: plan_data 없음 / summary: 목표와 요약만 / full: 전체, 기본값)
     """
-    plan = WeeklyPlanRepository.get_by_id(db, plan_id)
+    plan = WeeklyPlanRepository.get_by_id(db, plan_id, view=view)
     if not plan:
         raise HTTPException(status_code=404, detail="주간 계획을 찾을 수 없습니다.")
-    return plan
+    return _plan_view(plan, view)
 
 
-@router.get("/user/{user_id}", response_model=List[WeeklyPlanResponse])
+@router.get("/user/{user_id}", response_model=List[WeeklyPlanView])
 def get_user_weekly_plans(
     user_id: int,
     limit: int = 10,
+    view: ResponseView = "full",
     db: Session = Depends(get_db)
 ):
     """
@@ -125,15 +242,17 @@ def get_user_weekly_plans(
     
     - **user_id**: 사용자 ID
     - **limit**: 조회할 최대 개수 (기본 10)
+    - **view**: 응답 형태 (metadata / summary / full, 기본값 full). 히스토리 화면은 summary 권장
     """
-    plans = WeeklyPlanRepository.get_by_user(db, user_id, limit)
-    return plans
+    plans = WeeklyPlanRepository.get_by_user(db, user_id, limit, view=view)
+    return [_plan_view(plan, view) for plan in plans]
 
 
-@router.get("/user/{user_id}/week/{week_number}", response_model=WeeklyPlanResponse)
+@router.get("/user/{user_id}/week/{week_number}", response_model=WeeklyPlanView)
 def get_weekly_plan_by_week(
     user_id: int,
     week_number: int,
+    view: ResponseView = "full",
     db: Session = Depends(get_db)
 ):
     """
@@ -141,14 +260,15 @@ def get_weekly_plan_by_week(
     
     - **user_id**: 사용자 ID
     - **week_number**: 주차 번호
+    - **view**: 응답 형태 (metadata / summary / full, 기본값 full)
     """
-    plan = WeeklyPlanRepository.get_by_week(db, user_id, week_number)
+    plan = WeeklyPlanRepository.get_by_week(db, user_id, week_number, view=view)
     if not plan:
         raise HTTPException(
             status_code=404,
             detail=f"사용자 {user_id}의 {week_number}주차 계획을 찾을 수 없습니다."
         )
-    return plan
+    return _plan_view(plan, view)
 
 
 @router.patch("/{plan_id}", response_model=WeeklyPlanResponse)
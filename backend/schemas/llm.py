@@ -3,9 +3,16 @@ LLM Schemas - LLM 팀원 전담
 InbodyAnalysisReport, UserDetail, WeeklyPlan, LLM 입출력 (상태 분석 + 주간 계획) 관련 모든 스키마
 """
 
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime, date
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal, Union, Annotated
+
+
+# 조회 API 응답 형태 (view 쿼리 파라미터)
+# - metadata: 식별/날짜/모델 정보만 (본문 없음)
+# - summary:  metadata + 요약 (분석 리포트는 섹션 목록 포함)
+# - full:     전체 본문 포함 (기본값)
+ResponseView = Literal["metadata", "summary", "full"]
 
 
 # ============================================================================
@@ -25,26 +32,75 @@ class AnalysisReportCreate(AnalysisReportBase):
     record_id: int
     embedding_1536: Optional[List[float]] = None  # OpenAI embedding (1536 차원)
     embedding_1024: Optional[List[float]] = None  # Ollama bge-m3 embedding (1024 차원)
+    section_index: Optional[Dict[str, Any]] = None  # 섹션 색인 (parse_utils.build_section_index)
+
+
+class AnalysisSection(BaseModel):
+    """분석 리포트 섹션 (본문 = llm_output[start:end])"""
+    title: str
+    start: int
+    end: int
+
+
+class AnalysisSectionResponse(BaseModel):
+    """분석 리포트 개별 섹션 조회 응답"""
+    report_id: int
+    section_no: int
+    title: str
+    content: str
+
+
+class AnalysisReportMetadataResponse(BaseModel):
+    """분석 리포트 응답 스키마 (view=metadata, 본문 없음)"""
+    view: Literal["metadata"] = "metadata"
+    id: int
+    user_id: int
+    record_id: int
+    model_version: Optional[str] = None
+    analysis_type: Optional[str] = None
+    generated_at: datetime
+    embedding_status: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AnalysisReportSummaryResponse(AnalysisReportMetadataResponse):
+    """분석 리포트 응답 스키마 (view=summary, 요약 + 섹션 목록)"""
+    view: Literal["summary"] = "summary"
+    summary: Optional[str] = None
+    sections: Optional[List[AnalysisSection]] = None
 
 
 class AnalysisReportResponse(AnalysisReportBase):
     """분석 리포트 응답 스키마"""
+    view: Literal["full"] = "full"
     id: int
     user_id: int
     record_id: int
     generated_at: datetime
     thread_id: Optional[str] = None
-    embedding_1536: Optional[List[float]] = None  # OpenAI embedding (1536 차원)
-    embedding_1024: Optional[List[float]] = None  # Ollama bge-m3 embedding (1024 차원)
+    # 임베딩 벡터는 include_embeddings=true로 조회한 경우에만 채움 (기본 null, ORM에서 deferred)
+    embedding_1536: Optional[List[float]] = Field(default=None, validation_alias="loaded_embedding_1536")  # OpenAI embedding (1536 차원)
+    embedding_1024: Optional[List[float]] = Field(default=None, validation_alias="loaded_embedding_1024")  # Ollama bge-m3 embedding (1024 차원)
+    embedding_status: Optional[str] = None  # "pending" / "ready" / "failed" (RAG 검색 가능 여부)
     
     # LLM1 출력 결과를 요약과 전문으로 분리 (프론트엔드 표시용)
     summary: Optional[str] = None  # 종합 체형 평가 등 요약 섹션
     content: Optional[str] = None  # 전체 내용
+    sections: Optional[List[AnalysisSection]] = None  # 섹션 목록 (개별 섹션은 /{report_id}/sections/{section_no})
     
     class Config:
         from_attributes = True
 
 
+# view 파라미터를 받는 조회 엔드포인트의 응답 스키마
+AnalysisReportView = Annotated[
+    Union[AnalysisReportMetadataResponse, AnalysisReportSummaryResponse, AnalysisReportResponse],
+    Field(discriminator="view")
+]
+
+
 # ============================================================================
 # UserDetail Schemas (구 UserGoal)
 # ============================================================================
@@ -150,6 +206,7 @@ class GoalPlanRequest(BaseModel):
     record_id: int
     user_goal_type: Optional[str] = None
     user_goal_description: Optional[str] = None
+    force_regenerate: bool = False  # True면 입력이 같아도 새로 생성
 
 
 class GoalPlanPrepareResponse(BaseModel):
@@ -189,6 +246,45 @@ class WeeklyPlanBase(BaseModel):
     model_version: Optional[str] = None
 
 
+class PlanExercise(BaseModel):
+    """운동 항목 (src/llm/shared/models.py의 Exercise와 동일 구조)"""
+    name: str                            # 운동 이름
+    category: str                        # 웨이트, 유산소, 스트레칭 등
+    target_muscle: Optional[str] = None  # 가슴, 등, 다리 등
+    sets: Optional[int] = None
+    reps: Optional[str] = None           # 반복 횟수 또는 시간
+    rest_seconds: Optional[int] = None
+    notes: Optional[str] = None
+
+
+class PlanMeal(BaseModel):
+    """식사 항목 (src/llm/shared/models.py의 Meal과 동일 구조)"""
+    meal_type: str                       # 아침, 점심, 저녁, 간식
+    foods: List[str]
+    calories: Optional[int] = None
+    protein_g: Optional[float] = None
+    carbs_g: Optional[float] = None
+    fat_g: Optional[float] = None
+    notes: Optional[str] = None
+
+
+class DayPlan(BaseModel):
+    """하루 계획 (src/llm/shared/models.py의 DayPlan과 동일 구조)"""
+    day_of_week: str                     # 월요일, 화요일 등
+    exercises: List[PlanExercise] = []
+    meals: List[PlanMeal] = []
+    total_calories: Optional[int] = None
+    notes: Optional[str] = None
+
+
+class StructuredWeeklyPlan(BaseModel):
+    """요일 단위 구조화 주간 계획 (plan_data에 저장되는 형태)"""
+    weekly_goal: Optional[str] = None
+    weekly_summary: Optional[str] = None
+    days: List[DayPlan] = []
+    tips: List[str] = []
+
+
 class WeeklyPlanCreate(BaseModel):
     """주간 계획 생성 요청"""
     week_number: int = 1
@@ -196,6 +292,7 @@ class WeeklyPlanCreate(BaseModel):
     end_date: date
     plan_data: Dict[str, Any]  # LLM 생성 결과 (content, raw_response 등)
     model_version: Optional[str] = None
+    input_hash: Optional[str] = None  # 생성 입력 해시 (같으면 재생성하지 않음)
 
 
 class WeeklyPlanUpdate(BaseModel):
@@ -206,8 +303,31 @@ class WeeklyPlanUpdate(BaseModel):
     is_completed: Optional[bool] = None
 
 
+class WeeklyPlanMetadataResponse(BaseModel):
+    """주간 계획 응답 (view=metadata, plan_data 없음)"""
+    view: Literal["metadata"] = "metadata"
+    id: int
+    user_id: int
+    week_number: int
+    start_date: date
+    end_date: date
+    model_version: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class WeeklyPlanSummaryResponse(WeeklyPlanMetadataResponse):
+    """주간 계획 응답 (view=summary, plan_data 중 목표/요약만)"""
+    view: Literal["summary"] = "summary"
+    weekly_goal: Optional[str] = None
+    weekly_summary: Optional[str] = None  # 구조화 이전 텍스트 계획은 본문 앞부분
+
+
 class WeeklyPlanResponse(BaseModel):
     """주간 계획 응답"""
+    view: Literal["full"] = "full"
     id: int
     user_id: int
     week_number: int
@@ -221,6 +341,13 @@ class WeeklyPlanResponse(BaseModel):
         from_attributes = True
 
 
+# view 파라미터를 받는 조회 엔드포인트의 응답 스키마
+WeeklyPlanView = Annotated[
+    Union[WeeklyPlanMetadataResponse, WeeklyPlanSummaryResponse, WeeklyPlanResponse],
+    Field(discriminator="view")
+]
+
+
 # ============================================================================
 # Chat / Human Feedback Schemas
 # ============================================================================
@@ -251,4 +378,16 @@ class WeeklyPlanChatRequest(BaseModel):
 
 class WeeklyPlanChatResponse(BaseModel):
     """주간 계획 채팅 응답 스키마"""
-    response: str
\ No newline at end of file
+    response: str
+
+
+class WeeklyPlanEditRequest(BaseModel):
+    """주간 계획 부분 수정 요청 (변경이 필요한 요일/식사만 재생성)"""
+    message: str
+
+
+class WeeklyPlanEditResponse(BaseModel):
+    """주간 계획 부분 수정 응답"""
+    plan: WeeklyPlanResponse
+    updated_days: List[str]  # 재생성된 요일
+    summary: str             # 변경 내용 요약
@@ -13,19 +13,31 @@ from schemas.llm import (
     StatusAnalysisResponse,
     GoalPlanPrepareResponse,
     AnalysisReportResponse,
-    AnalysisReportCreate
+    AnalysisReportCreate,
+    AnalysisSection
 )
 from services.ocr.body_type_service import BodyTypeService
 from services.llm.llm_service import LLMService
-from typing import Optional, Dict, Any
+from services.llm.embedding_jobs import schedule_report_embedding
+from services.common.single_flight import SingleFlight
+from utils.dependencies import get_llm_service
+from typing import Optional, Dict, Any, AsyncIterator
+
+# 같은 (user_id, record_id, analysis_type) 분석 생성 요청 병합 (더블 클릭/재시도 시 LLM 1회만 실행)
+_analysis_flight = SingleFlight("inbody_analysis")
 
 
 class HealthService:
     """건강 기록 관련 비즈니스 로직"""
 
-    def __init__(self):
+    def __init__(self, llm_service: Optional[LLMService] = None):
         self.body_type_service = BodyTypeService()
-        self.llm_service = LLMService()
+        self._llm_service = llm_service
+
+    @property
+    def llm_service(self) -> LLMService:
+        """앱 전역 LLMService (첫 사용 시 생성, 에이전트/대화 스레드 공유)"""
+        return self._llm_service or get_llm_service()
 
     def create_health_record(
         self,
@@ -178,16 +190,31 @@ class HealthService:
         
         if existing_report:
             # 기존 리포트도 summary와 content로 분리하여 반환
-            from services.llm.parse_utils import split_analysis_response
-            
-            response = AnalysisReportResponse.model_validate(existing_report)
-            parsed = split_analysis_response(existing_report.llm_output)
-            response.summary = parsed["summary"]
-            response.content = parsed["content"]
+            return self._build_report_response(existing_report)
             
-            return response
-            
-        # 3. LLM 서비스 호출을 위한 입력 데이터 준비
+        # 3. 같은 기록에 대한 생성이 이미 진행 중이면 그 결과를 공유 (워커 간에는 advisory lock)
+        return await _analysis_flight.run(
+            (user_id, record_id, "status_analysis"),
+            lambda: self._generate_analysis_report(db, user_id, health_record)
+        )
+
+    async def _generate_analysis_report(
+        self,
+        db: Session,
+        user_id: int,
+        health_record
+    ) -> AnalysisReportResponse:
+        """LLM1 분석 실행 후 리포트 저장 (single-flight 선행 호출에서만 실행)"""
+        record_id = health_record.id
+
+        # 락을 기다리는 동안 다른 워커가 저장했을 수 있으므로 다시 확인
+        existing_report = AnalysisReportRepository.get_by_record_id_and_type(
+            db, record_id, "status_analysis"
+        )
+        if existing_report:
+            return self._build_report_response(existing_report)
+
+        # LLM 서비스 호출을 위한 입력 데이터 준비
         # body_type1, body_type2는 measurements JSONB 안에 저장됨
         input_data = self.llm_service.prepare_status_analysis_input(
             record_id=health_record.id,
@@ -198,7 +225,7 @@ class HealthService:
             body_type2=health_record.measurements.get('body_type2')
         )
         
-        # 4. LLM 호출
+        # LLM 호출
         try:
             # dict를 Pydantic 모델로 변환하여 전달해야 함 (llm_service가 객체 속성 접근을 사용하므로)
             analysis_input = StatusAnalysisInput(**input_data)
@@ -224,7 +251,121 @@ class HealthService:
             embedding_1536 = None
             embedding_1024 = None
 
-        # 5. 분석 리포트 저장
+        # 분석 리포트 저장
+        return self._save_analysis_report(
+            db, user_id, record_id, llm_output, thread_id, embedding_1536, embedding_1024
+        )
+
+    async def analyze_health_record_stream(
+        self,
+        db: Session,
+        user_id: int,
+        record_id: int
+    ) -> Optional[AsyncIterator[Dict[str, Any]]]:
+        """
+        건강 기록 분석 (토큰 스트리밍 버전)
+
+        기록 조회/권한 확인은 즉시 수행하고, LLM 호출은 반환된 이터레이터를 소비할 때 실행됩니다.
+        저장 로직은 analyze_health_record와 동일합니다.
+
+        Args:
+            db: 데이터베이스 세션 (이터레이터 소비가 끝날 때까지 유효해야 함)
+            user_id: 사용자 ID
+            record_id: 건강 기록 ID
+
+        Returns:
+            None: 건강 기록이 없거나 권한 없음
+            AsyncIterator:
+                {"type": "token", "content": str}
+                {"type": "done", "report": AnalysisReportResponse}
+        """
+        health_record = HealthRecordRepository.get_by_id(db, record_id)
+        if not health_record or health_record.user_id != user_id:
+            return None
+
+        existing_report = AnalysisReportRepository.get_by_record_id_and_type(
+            db, record_id, "status_analysis"
+        )
+
+        async def _events() -> AsyncIterator[Dict[str, Any]]:
+            # 이미 분석된 기록은 LLM 호출 없이 바로 완료 이벤트만 전달
+            if existing_report:
+                yield {"type": "done", "report": self._build_report_response(existing_report)}
+                return
+
+            # 같은 기록의 생성이 진행 중이면 토큰 없이 완료 결과만 공유
+            flight_key = (user_id, record_id, "status_analysis")
+            shared = await _analysis_flight.wait(flight_key)
+            if shared is not None:
+                yield {"type": "done", "report": shared}
+                return
+
+            async with _analysis_flight.lead(flight_key) as flight:
+                # 락을 기다리는 동안 다른 워커가 저장했을 수 있으므로 다시 확인
+                saved_report = AnalysisReportRepository.get_by_record_id_and_type(
+                    db, record_id, "status_analysis"
+                )
+                if saved_report:
+                    response = self._build_report_response(saved_report)
+                    flight.set_result(response)
+                    yield {"type": "done", "report": response}
+                    return
+
+                async for event in self._stream_analysis(db, user_id, health_record):
+                    if event["type"] == "done":
+                        flight.set_result(event["report"])
+                    yield event
+
+        return _events()
+
+    async def _stream_analysis(
+        self,
+        db: Session,
+        user_id: int,
+        health_record
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """LLM1 분석 스트리밍 실행 후 리포트 저장 (single-flight 선행 호출에서만 실행)"""
+        record_id = health_record.id
+        input_data = self.llm_service.prepare_status_analysis_input(
+            record_id=health_record.id,
+            user_id=health_record.user_id,
+            measured_at=health_record.measured_at,
+            measurements=health_record.measurements,
+            body_type1=health_record.measurements.get('body_type1'),
+            body_type2=health_record.measurements.get('body_type2')
+        )
+        analysis_input = StatusAnalysisInput(**input_data)
+
+        async for event in self.llm_service.stream_status_analysis_llm(analysis_input):
+            if event["type"] == "token":
+                yield event
+                continue
+
+            embedding_data = event.get("embedding") or {}
+            response = self._save_analysis_report(
+                db,
+                user_id,
+                record_id,
+                event["analysis_text"],
+                event.get("thread_id"),
+                embedding_data.get("embedding_1536"),
+                embedding_data.get("embedding_1024")
+            )
+            yield {"type": "done", "report": response}
+
+    def _save_analysis_report(
+        self,
+        db: Session,
+        user_id: int,
+        record_id: int,
+        llm_output: str,
+        thread_id: Optional[str],
+        embedding_1536: Optional[list],
+        embedding_1024: Optional[list]
+    ) -> AnalysisReportResponse:
+        """LLM1 분석 결과를 리포트로 저장하고 응답 객체로 변환 (섹션 색인은 여기서 1회 생성)"""
+        from services.llm.parse_utils import build_section_index
+
         report_data = AnalysisReportCreate(
             record_id=record_id,
             llm_output=llm_output,
@@ -232,23 +373,38 @@ class HealthService:
             analysis_type="status_analysis",
             thread_id=thread_id,
             embedding_1536=embedding_1536,
-            embedding_1024=embedding_1024
+            embedding_1024=embedding_1024,
+            section_index=build_section_index(llm_output)
         )
         
         analysis_report = AnalysisReportRepository.create(db, user_id, report_data)
+
+        # 임베딩이 없으면 커밋된 리포트에 대해 백그라운드로 생성 (응답은 기다리지 않음)
+        if analysis_report.embedding_status == "pending":
+            schedule_report_embedding(analysis_report.id, llm_output, self.llm_service.llm_client)
         
-        # 6. Pydantic 모델로 변환하여 반환
+        # Pydantic 모델로 변환하여 반환
         # DB에는 thread_id가 저장되지 않았으므로, 응답 객체에 수동으로 주입하여 프론트엔드에 전달
-        response = AnalysisReportResponse.model_validate(analysis_report)
+        response = self._build_report_response(analysis_report)
         response.thread_id = thread_id
-        
-        # LLM1 출력 결과를 요약과 전문으로 분리 (프론트엔드 표시용)
-        # 프론트엔드에서 요약만 먼저 보여주고, 전문은 접었다가 펼칠 수 있도록 함
-        from services.llm.parse_utils import split_analysis_response
-        parsed = split_analysis_response(llm_output)
-        response.summary = parsed["summary"]
-        response.content = parsed["content"]
-        
+        return response
+
+    @staticmethod
+    def _build_report_response(report) -> AnalysisReportResponse:
+        """
+        분석 리포트 ORM 객체를 응답 스키마로 변환
+
+        LLM1 출력 결과를 요약과 전문으로 분리 (프론트엔드 표시용)
+        프론트엔드에서 요약만 먼저 보여주고, 전문은 접었다가 펼칠 수 있도록 함
+        저장 시 만든 섹션 색인(section_index)을 사용하므로 조회 시 전문을 다시 파싱하지 않음
+        """
+        from services.llm.parse_utils import get_section_index
+
+        response = AnalysisReportResponse.model_validate(report)
+        index = get_section_index(report)
+        response.summary = index["summary"]
+        response.content = report.llm_output
+        response.sections = [AnalysisSection(**section) for section in index["sections"]]
         return response
 
     def get_record_with_analysis(
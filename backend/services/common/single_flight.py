@@ -0,0 +1,186 @@
+"""
+Single-flight 요청 병합
+같은 키의 생성 작업(LLM 분석/주간 계획)이 동시에 들어오면 한 번만 실행하고 결과를 공유
+
+- 프로세스 내: 진행 중인 작업의 asyncio Future를 키별로 보관하고, 뒤이은 호출은 그 결과를 기다림
+- 워커 간: Postgres advisory lock으로 같은 키의 생성을 직렬화
+  (락을 얻은 뒤 DB를 다시 확인하면 다른 워커가 먼저 저장한 결과를 재사용할 수 있음)
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS", "180"))
+SINGLE_FLIGHT_LOCK_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+
+def advisory_lock_id(key: Hashable) -> int:
+    """키를 Postgres advisory lock용 signed 64bit 정수로 변환"""
+    digest = hashlib.sha256(repr(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+@asynccontextmanager
+async def advisory_lock(
+    key: Hashable, timeout: float = SINGLE_FLIGHT_LOCK_TIMEOUT_SECONDS, quiet: bool = False
+) -> AsyncIterator[bool]:
+    """
+    Postgres 세션 advisory lock (워커 간 직렬화)
+
+    락을 기다리는 동안 스레드를 붙잡지 않도록 pg_try_advisory_lock을 주기적으로 시도합니다.
+    Postgres가 아니거나 연결/대기 시간 초과 시에는 락 없이 진행합니다 (프로세스 내 병합은 계속 동작).
+    quiet=True면 대기 시간 초과를 로그로 남기지 않습니다 (락을 못 얻는 것이 정상인 호출용).
+
+    Yields:
+        락 획득 여부
+    """
+    from sqlalchemy import text
+    from database import engine
+
+    if engine.dialect.name != "postgresql":
+        yield False
+        return
+
+    lock_id = advisory_lock_id(key)
+    try:
+        conn = await asyncio.to_thread(engine.connect)
+    except Exception as e:
+        print(f"⚠️  advisory lock 연결 실패, 락 없이 진행: {e}")
+        yield False
+        return
+
+    acquired = False
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            acquired = await asyncio.to_thread(
+                lambda: conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar()
+            )
+            if acquired or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(SINGLE_FLIGHT_LOCK_POLL_SECONDS)
+        if not acquired and not quiet:
+            print(f"⚠️  advisory lock 대기 시간 초과, 락 없이 진행: {key}")
+        yield bool(acquired)
+    finally:
+        def _release():
+            try:
+                if acquired:
+                    conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+            finally:
+                conn.close()
+        await asyncio.to_thread(_release)
+
+
+def try_advisory_lock(key: Hashable):
+    """
+    advisory lock을 한 번만 시도 (대기/로그 없음)
+
+    주기 작업처럼 여러 워커 중 하나만 실행하면 되는 경우에 사용합니다.
+    호출하는 쪽에서 락 획득 여부(yield 값)를 확인해야 합니다.
+    """
+    return advisory_lock(key, timeout=0, quiet=True)
+
+
+class Flight:
+    """lead()가 넘겨주는 진행 중 작업 핸들 (결과를 기다리는 호출들과 공유)"""
+
+    def __init__(self, future: asyncio.Future):
+        self._future = future
+        self.locked = False
+
+    def set_result(self, result: Any) -> None:
+        if not self._future.done():
+            self._future.set_result(result)
+
+
+class SingleFlight:
+    """
+    키 단위 요청 병합기
+
+    사용법:
+        result = await single_flight.run(key, generate)   # generate: 인자 없는 코루틴 함수
+
+    스트리밍처럼 결과를 단계적으로 만드는 경우:
+        shared = await single_flight.wait(key)             # 진행 중인 작업이 있으면 결과 대기
+        async with single_flight.lead(key) as flight:      # 없으면 직접 실행
+            ...
+            flight.set_result(result)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def _full_key(self, key: Hashable) -> tuple:
+        return (self.name, key)
+
+    async def wait(self, key: Hashable) -> Optional[Any]:
+        """
+        진행 중인 같은 키의 작업이 있으면 결과를 기다려 반환
+
+        Returns:
+            공유된 결과, 또는 None (진행 중인 작업이 없거나 중단됨 → 호출자가 직접 실행)
+
+        Raises:
+            진행 중이던 작업이 실패한 경우 같은 예외
+        """
+        while True:
+            future = self._inflight.get(self._full_key(key))
+            if future is None:
+                return None
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 선행 작업이 중단된 경우(클라이언트 연결 끊김 등)만 다시 확인, 내 작업 취소는 전파
+                if not future.cancelled():
+                    raise
+
+    @asynccontextmanager
+    async def lead(self, key: Hashable) -> AsyncIterator[Flight]:
+        """
+        이 키의 작업을 직접 실행 (프로세스 내 등록 + 워커 간 advisory lock)
+
+        블록 안에서 flight.set_result()로 결과를 공유합니다.
+        결과 없이 블록이 끝나면 기다리던 호출들은 wait()에서 None을 받고 직접 실행합니다.
+        """
+        full_key = self._full_key(key)
+        future = asyncio.get_running_loop().create_future()
+        # 기다리는 호출이 없을 때 예외가 회수되지 않았다는 경고 방지
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[full_key] = future
+        flight = Flight(future)
+        try:
+            async with advisory_lock(full_key) as locked:
+                flight.locked = locked
+                yield flight
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(full_key) is future:
+                del self._inflight[full_key]
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """같은 키의 작업이 진행 중이면 그 결과를, 아니면 fn()을 실행한 결과를 반환"""
+        shared = await self.wait(key)
+        if shared is not None:
+            return shared
+        # wait()가 None을 반환한 뒤 await 없이 바로 등록하므로 다른 호출과 겹치지 않음
+        async with self.lead(key) as flight:
+            result = await fn()
+            flight.set_result(result)
+            return result
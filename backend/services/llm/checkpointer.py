@@ -0,0 +1,338 @@
+"""
+LangGraph 체크포인트 저장소
+MemorySaver를 대체하는 영속/용량 제한 체크포인터 (Postgres 또는 SQLite)
+
+- LANGGRAPH_CHECKPOINTER=postgres : DATABASE_URL의 Postgres에 저장 (여러 uvicorn 워커가 스레드 공유)
+- LANGGRAPH_CHECKPOINTER=sqlite   : 단일 노드용 SQLite 파일 (LANGGRAPH_SQLITE_PATH)
+- LANGGRAPH_CHECKPOINTER=memory   : 기존 인메모리 MemorySaver (개발/테스트용)
+
+보존 정책 (postgres/sqlite):
+- CHECKPOINT_TTL_HOURS        : 마지막 체크포인트 이후 이 시간이 지난 스레드는 통째로 삭제
+- CHECKPOINT_MAX_PER_THREAD   : 스레드당 보관할 최신 체크포인트 수 (나머지는 삭제)
+- 더 이상 어떤 체크포인트에서도 참조하지 않는 채널 값(blob)과 pending write는 함께 정리 (compaction)
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+
+load_dotenv()
+
+CHECKPOINTER_BACKEND = os.getenv("LANGGRAPH_CHECKPOINTER", "postgres").lower()
+CHECKPOINT_SQLITE_PATH = os.getenv("LANGGRAPH_SQLITE_PATH", "langgraph_checkpoints.sqlite")
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", "72"))
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "600"))
+
+# uuid6 타임스탬프 기준점 (1582-10-15, 100ns 단위) → Unix epoch 변환용
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def checkpoint_id_to_timestamp(checkpoint_id: str) -> float:
+    """
+    LangGraph 체크포인트 ID(uuid6)에서 생성 시각(Unix timestamp) 추출
+
+    uuid6는 상위 60비트에 100ns 단위 타임스탬프를 담고 있어 문자열 정렬 순서가 곧 시간 순서입니다.
+    """
+    hex_str = checkpoint_id.replace("-", "")
+    ticks = (int(hex_str[0:8], 16) << 28) | (int(hex_str[8:12], 16) << 12) | int(hex_str[13:16], 16)
+    return (ticks - _UUID_EPOCH_OFFSET) / 1e7
+
+
+class ManagedCheckpointSaver(BaseCheckpointSaver):
+    """
+    영속 체크포인터 래퍼
+
+    - 실제 저장소(AsyncPostgresSaver / AsyncSqliteSaver)는 첫 사용 시 이벤트 루프 안에서 연결
+      (그래프는 import 시점에 컴파일되므로 연결을 늦게 엽니다)
+    - prune()으로 TTL 만료 스레드 삭제, 스레드당 체크포인트 수 제한, 참조되지 않는 blob 정리
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        ttl_hours: float = CHECKPOINT_TTL_HOURS,
+        max_per_thread: int = CHECKPOINT_MAX_PER_THREAD
+    ):
+        super().__init__()
+        self.backend = backend
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_per_thread = max_per_thread
+        self._inner: Optional[BaseCheckpointSaver] = None
+        self._stack: Optional[AsyncExitStack] = None
+        self._lock = asyncio.Lock()
+
+    # -------------------------------------------------
+    # 연결 관리
+    # -------------------------------------------------
+
+    async def _saver(self) -> BaseCheckpointSaver:
+        if self._inner is None:
+            async with self._lock:
+                if self._inner is None:
+                    stack = AsyncExitStack()
+                    self._inner = await self._open(stack)
+                    self._stack = stack
+        return self._inner
+
+    async def _open(self, stack: AsyncExitStack) -> BaseCheckpointSaver:
+        if self.backend == "postgres":
+            from psycopg.rows import dict_row
+            from psycopg_pool import AsyncConnectionPool
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+            pool = AsyncConnectionPool(
+                _psycopg_conninfo(),
+                min_size=1,
+                max_size=int(os.getenv("CHECKPOINT_POOL_SIZE", "10")),
+                kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                open=False,
+            )
+            await pool.open()
+            stack.push_async_callback(pool.close)
+            saver = AsyncPostgresSaver(pool)
+        else:
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            saver = await stack.enter_async_context(AsyncSqliteSaver.from_conn_string(CHECKPOINT_SQLITE_PATH))
+
+        await saver.setup()
+        print(f"✅ LangGraph 체크포인터 연결 완료 ({self.backend})")
+        return saver
+
+    async def aclose(self) -> None:
+        """저장소 연결 종료 (애플리케이션 종료 시 호출)"""
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = None
+        self._inner = None
+
+    # -------------------------------------------------
+    # BaseCheckpointSaver 위임
+    # -------------------------------------------------
+
+    async def aget_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        return await (await self._saver()).aget_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        saver = await self._saver()
+        async for item in saver.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        return await (await self._saver()).aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        return await (await self._saver()).aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await (await self._saver()).adelete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        # 실제 저장소와 같은 버전 포맷을 사용해야 blob 키가 일치함
+        # (aget_tuple이 먼저 호출되므로 실행 중에는 항상 연결되어 있음)
+        if self._inner is not None:
+            return self._inner.get_next_version(current, channel)
+        return MemorySaver().get_next_version(current, channel)
+
+    # -------------------------------------------------
+    # 보존 정책 (TTL / 스레드당 개수 제한 / compaction)
+    # -------------------------------------------------
+
+    async def prune(self) -> Dict[str, int]:
+        """
+        보존 정책 적용
+
+        Returns:
+            {"expired_threads": 만료되어 삭제된 스레드 수, "trimmed_checkpoints": 개수 제한으로 삭제된 체크포인트 수}
+        """
+        await self._saver()
+        if self.backend == "postgres":
+            return await asyncio.to_thread(self._prune_postgres)
+        return await asyncio.to_thread(self._prune_sqlite)
+
+    def _expired_thread_ids(self, latest_ids: Sequence[Tuple[str, str]]) -> list:
+        cutoff = time.time() - self.ttl_seconds
+        return [
+            thread_id for thread_id, latest_id in latest_ids
+            if checkpoint_id_to_timestamp(latest_id) < cutoff
+        ]
+
+    def _prune_postgres(self) -> Dict[str, int]:
+        from sqlalchemy import text
+        from database import engine
+
+        with engine.begin() as conn:
+            latest_ids = conn.execute(text(
+                "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+            )).all()
+            expired = self._expired_thread_ids(latest_ids)
+            if expired:
+                for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints"):
+                    conn.execute(text(f"DELETE FROM {table} WHERE thread_id = ANY(:ids)"), {"ids": expired})
+
+            # 스레드당 최신 N개만 유지 (checkpoint_id는 시간순 정렬 가능)
+            trimmed = conn.execute(text("""
+                DELETE FROM checkpoints c
+                USING (
+                    SELECT thread_id, checkpoint_ns, checkpoint_id,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                           ) AS rn
+                    FROM checkpoints
+                ) ranked
+                WHERE c.thread_id = ranked.thread_id
+                  AND c.checkpoint_ns = ranked.checkpoint_ns
+                  AND c.checkpoint_id = ranked.checkpoint_id
+                  AND ranked.rn > :max_per_thread
+            """), {"max_per_thread": self.max_per_thread}).rowcount
+
+            # compaction: 삭제된 체크포인트의 pending write, 어떤 체크포인트도 참조하지 않는 채널 값 정리
+            conn.execute(text("""
+                DELETE FROM checkpoint_writes w
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = w.thread_id
+                      AND c.checkpoint_ns = w.checkpoint_ns
+                      AND c.checkpoint_id = w.checkpoint_id
+                )
+            """))
+            conn.execute(text("""
+                DELETE FROM checkpoint_blobs b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = b.thread_id
+                      AND c.checkpoint_ns = b.checkpoint_ns
+                      AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+                )
+            """))
+
+        return {"expired_threads": len(expired), "trimmed_checkpoints": trimmed}
+
+    def _prune_sqlite(self) -> Dict[str, int]:
+        # SQLite 저장소는 체크포인트마다 채널 값을 통째로 저장하므로 blob 테이블이 없음
+        conn = sqlite3.connect(CHECKPOINT_SQLITE_PATH)
+        try:
+            with conn:
+                latest_ids = conn.execute(
+                    "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+                ).fetchall()
+                expired = self._expired_thread_ids(latest_ids)
+                for thread_id in expired:
+                    conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                    conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+
+                trimmed = conn.execute("""
+                    DELETE FROM checkpoints
+                    WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, ROW_NUMBER() OVER (
+                                PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                            ) AS rn
+                            FROM checkpoints
+                        ) WHERE rn > ?
+                    )
+                """, (self.max_per_thread,)).rowcount
+
+                conn.execute("""
+                    DELETE FROM writes
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = writes.thread_id
+                          AND c.checkpoint_ns = writes.checkpoint_ns
+                          AND c.checkpoint_id = writes.checkpoint_id
+                    )
+                """)
+        finally:
+            conn.close()
+
+        return {"expired_threads": len(expired), "trimmed_checkpoints": trimmed}
+
+
+def _psycopg_conninfo() -> str:
+    """SQLAlchemy용 DATABASE_URL을 psycopg(3) 접속 문자열로 변환 (postgresql+psycopg2:// → postgresql://)"""
+    from database import DATABASE_URL
+
+    scheme, rest = DATABASE_URL.split("://", 1)
+    return f"{scheme.split('+')[0]}://{rest}"
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """
+    프로세스 공유 체크포인터 반환 (지연 생성)
+
+    영속 저장소 패키지가 없으면 경고 후 MemorySaver로 대체합니다.
+    """
+    global _checkpointer
+    if _checkpointer is not None:
+        return _checkpointer
+
+    if CHECKPOINTER_BACKEND in ("postgres", "sqlite"):
+        try:
+            if CHECKPOINTER_BACKEND == "postgres":
+                import langgraph.checkpoint.postgres.aio  # noqa: F401
+                import psycopg_pool  # noqa: F401
+            else:
+                import langgraph.checkpoint.sqlite.aio  # noqa: F401
+            _checkpointer = ManagedCheckpointSaver(CHECKPOINTER_BACKEND)
+            return _checkpointer
+        except ImportError as e:
+            print(f"⚠️  {CHECKPOINTER_BACKEND} 체크포인터를 사용할 수 없습니다: {e}")
+            print("   인메모리 MemorySaver로 대체합니다. (대화 기록이 워커 간에 공유되지 않음)")
+
+    _checkpointer = MemorySaver()
+    return _checkpointer
+
+
+async def run_checkpoint_pruning(interval_seconds: float = CHECKPOINT_PRUNE_INTERVAL_SECONDS) -> None:
+    """보존 정책을 주기적으로 적용하는 백그라운드 루프 (lifespan에서 태스크로 실행)"""
+    saver = get_checkpointer()
+    if not isinstance(saver, ManagedCheckpointSaver):
+        return
+
+    while True:
+        try:
+            result = await saver.prune()
+            if result["expired_threads"] or result["trimmed_checkpoints"]:
+                print(
+                    f"🧹 체크포인트 정리: 만료 스레드 {result['expired_threads']}개, "
+                    f"초과 체크포인트 {result['trimmed_checkpoints']}개 삭제"
+                )
+        except Exception as e:
+            print(f"⚠️  체크포인트 정리 실패: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def close_checkpointer() -> None:
+    """체크포인터 연결 종료"""
+    if isinstance(_checkpointer, ManagedCheckpointSaver):
+        await _checkpointer.aclose()
@@ -0,0 +1,331 @@
+"""
+분석 리포트 임베딩 백필 워커
+임베딩 API 장애 등으로 embedding_1536 / embedding_1024가 비어 있는 리포트를 주기적으로 채움
+
+- 리포트를 id 순으로 훑으며 (keyset) 비어 있는 차원만 임베딩
+- OpenAI(1536): 요청 하나에 여러 텍스트를 묶어 배치 임베딩
+  (입력 토큰 상한을 넘는 리포트는 잘라서 보내고, 배치가 실패하면 텍스트별로 다시 시도)
+- Ollama bge-m3(1024): EMBEDDING_BACKFILL_OLLAMA_URL 설정 시에만, 동시 요청 수 제한하여 병렬 임베딩
+- 배치 결과는 executemany UPDATE로 한 번에 저장 (비어 있는 컬럼만 채움)
+- 제공자별 분당 텍스트 수 예산 (초과 시 대기)
+- 진행 상태는 DB의 NULL 컬럼 자체이므로, 중간에 중단되어도 다음 실행이 남은 리포트부터 이어서 처리
+- 여러 워커 프로세스 중 하나만 실행 (Postgres advisory lock)
+
+수동 실행 (backend 디렉토리에서):
+    python -m services.llm.embedding_backfill
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from services.llm.token_counter import count_tokens
+
+load_dotenv()
+
+EMBEDDING_BACKFILL = os.getenv("EMBEDDING_BACKFILL", "on")
+EMBEDDING_BACKFILL_INTERVAL_SECONDS = float(os.getenv("EMBEDDING_BACKFILL_INTERVAL_SECONDS", "900"))
+# 이보다 최근에 생성된 리포트는 실시간 임베딩 작업(embedding_jobs)에 맡김
+EMBEDDING_BACKFILL_GRACE_MINUTES = float(os.getenv("EMBEDDING_BACKFILL_GRACE_MINUTES", "10"))
+EMBEDDING_BACKFILL_SCAN_SIZE = int(os.getenv("EMBEDDING_BACKFILL_SCAN_SIZE", "200"))
+EMBEDDING_BACKFILL_OPENAI_BATCH_SIZE = int(os.getenv("EMBEDDING_BACKFILL_OPENAI_BATCH_SIZE", "64"))
+EMBEDDING_BACKFILL_OLLAMA_URL = os.getenv("EMBEDDING_BACKFILL_OLLAMA_URL", "")
+EMBEDDING_BACKFILL_OLLAMA_MODEL = os.getenv("EMBEDDING_BACKFILL_OLLAMA_MODEL", "bge-m3:latest")
+EMBEDDING_BACKFILL_OLLAMA_CONCURRENCY = int(os.getenv("EMBEDDING_BACKFILL_OLLAMA_CONCURRENCY", "4"))
+# 제공자별 분당 임베딩 텍스트 수 상한
+EMBEDDING_BACKFILL_MAX_PER_MINUTE = int(os.getenv("EMBEDDING_BACKFILL_MAX_PER_MINUTE", "300"))
+
+# 서버 시작 직후 requeue_pending_embeddings와 겹치지 않도록 첫 실행 지연
+_START_DELAY_SECONDS = 60
+
+# text-embedding-3-small 입력 하나당 토큰 상한 (8191, 근사치 계산 여유분 제외)
+_OPENAI_EMBEDDING_MAX_TOKENS = 8000
+# text-embedding-3 모델의 tiktoken 인코딩
+_OPENAI_EMBEDDING_ENCODING = "cl100k_base"
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """max_tokens 이하가 되도록 뒤를 잘라냄 (임베딩 입력 상한 초과 방지)"""
+    cut = len(text)
+    tokens = count_tokens(text, _OPENAI_EMBEDDING_ENCODING)
+    while cut > 0 and tokens > max_tokens:
+        # 토큰 비율로 길이를 줄여가며 상한 안에 들어오는 지점 탐색
+        cut = int(cut * max_tokens / tokens * 0.95)
+        tokens = count_tokens(text[:cut], _OPENAI_EMBEDDING_ENCODING)
+    return text[:cut]
+
+
+class RateBudget:
+    """최근 1분 동안 사용한 양을 기준으로 대기하는 분당 예산"""
+
+    def __init__(self, per_minute: int = EMBEDDING_BACKFILL_MAX_PER_MINUTE):
+        self.per_minute = per_minute
+        self._usage: "deque[Tuple[float, int]]" = deque()
+
+    def _used(self, now: float) -> int:
+        while self._usage and self._usage[0][0] <= now - 60:
+            self._usage.popleft()
+        return sum(amount for _, amount in self._usage)
+
+    async def acquire(self, amount: int) -> None:
+        """amount만큼 예산이 생길 때까지 대기 (한 번에 예산보다 큰 양은 빈 창에서 허용)"""
+        while True:
+            now = time.monotonic()
+            used = self._used(now)
+            if used == 0 or used + amount <= self.per_minute:
+                self._usage.append((now, amount))
+                return
+            await asyncio.sleep(max(self._usage[0][0] + 60 - now, 0.1))
+
+
+class OpenAIEmbeddingProvider:
+    """OpenAI text-embedding-3-small (1536차원), 요청당 여러 텍스트"""
+
+    dim = 1536
+    name = "openai"
+
+    def __init__(
+        self,
+        batch_size: int = EMBEDDING_BACKFILL_OPENAI_BATCH_SIZE,
+        model: str = "text-embedding-3-small",
+        max_input_tokens: int = _OPENAI_EMBEDDING_MAX_TOKENS
+    ):
+        self.batch_size = batch_size
+        self.model = model
+        self.max_input_tokens = max_input_tokens
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        from services.llm.llm_clients import get_async_openai_client
+
+        # 입력 하나라도 토큰 상한을 넘으면 요청 전체가 거부되므로 미리 잘라냄
+        texts = [truncate_to_tokens(text, self.max_input_tokens) for text in texts]
+        response = await get_async_openai_client().embeddings.create(input=texts, model=self.model)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        return embeddings
+
+
+class OllamaEmbeddingProvider:
+    """Ollama bge-m3 (1024차원), 텍스트별 요청을 동시에 concurrency개까지"""
+
+    dim = 1024
+    name = "ollama"
+
+    def __init__(
+        self,
+        base_url: str = EMBEDDING_BACKFILL_OLLAMA_URL,
+        model: str = EMBEDDING_BACKFILL_OLLAMA_MODEL,
+        concurrency: int = EMBEDDING_BACKFILL_OLLAMA_CONCURRENCY
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.batch_size = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _embed_one(self, client: httpx.AsyncClient, text: str) -> Optional[List[float]]:
+        async with self._semaphore:
+            try:
+                response = await client.post(
+                    f"{self.base_url}/api/embeddings", json={"model": self.model, "prompt": text}
+                )
+                response.raise_for_status()
+                return response.json()["embedding"]
+            except Exception as e:
+                print(f"  ⚠️  Ollama 임베딩 실패: {e}")
+                return None
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=10.0)) as client:
+            return list(await asyncio.gather(*(self._embed_one(client, text) for text in texts)))
+
+
+def default_providers() -> List[Any]:
+    """설정에 따른 백필 대상 제공자 (Ollama는 URL이 있을 때만)"""
+    providers: List[Any] = [OpenAIEmbeddingProvider()]
+    if EMBEDDING_BACKFILL_OLLAMA_URL:
+        providers.append(OllamaEmbeddingProvider())
+    return providers
+
+
+@dataclass
+class BackfillProgress:
+    """마지막(또는 진행 중인) 백필 실행 상태"""
+    running: bool = False
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    total_reports: int = 0
+    scanned_reports: int = 0
+    last_report_id: int = 0
+    embedded: Dict[int, int] = field(default_factory=dict)
+    failed: Dict[int, int] = field(default_factory=dict)
+
+
+class EmbeddingBackfillWorker:
+    """비어 있는 리포트 임베딩을 제공자별 배치로 채우는 워커"""
+
+    def __init__(
+        self,
+        providers: Optional[List[Any]] = None,
+        scan_size: int = EMBEDDING_BACKFILL_SCAN_SIZE,
+        grace_minutes: float = EMBEDDING_BACKFILL_GRACE_MINUTES,
+        per_minute: int = EMBEDDING_BACKFILL_MAX_PER_MINUTE
+    ):
+        self.providers = providers if providers is not None else default_providers()
+        self.scan_size = scan_size
+        self.grace_minutes = grace_minutes
+        self._budgets = {provider.dim: RateBudget(per_minute) for provider in self.providers}
+        self._progress = BackfillProgress()
+        self._lock = asyncio.Lock()
+
+    @property
+    def embedding_dims(self) -> List[int]:
+        return [provider.dim for provider in self.providers]
+
+    def progress(self) -> Dict[str, Any]:
+        """진행 상태 (/api/health 노출용)"""
+        snapshot = asdict(self._progress)
+        snapshot["dims"] = self.embedding_dims
+        return snapshot
+
+    @staticmethod
+    def _count(dims: List[int], created_before: datetime) -> int:
+        from database import SessionLocal
+        from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+        with SessionLocal() as db:
+            return AnalysisReportRepository.count_missing_embeddings(db, dims, created_before)
+
+    def _scan(self, created_before: datetime, after_id: int) -> List[Tuple[int, str, Dict[int, bool]]]:
+        from database import SessionLocal
+        from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+        with SessionLocal() as db:
+            return AnalysisReportRepository.get_missing_embeddings(
+                db, self.embedding_dims, created_before, after_id=after_id, limit=self.scan_size
+            )
+
+    @staticmethod
+    def _save(dim: int, embeddings: List[Tuple[int, List[float]]]) -> int:
+        from database import SessionLocal
+        from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+        with SessionLocal() as db:
+            return AnalysisReportRepository.bulk_update_embeddings(db, dim, embeddings)
+
+    async def _embed_texts(self, provider: Any, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        배치 임베딩 (배치 요청이 실패하면 텍스트별로 다시 시도)
+
+        문제 있는 리포트 하나 때문에 같은 배치의 나머지가 매번 함께 실패하지 않도록,
+        실패한 텍스트만 None으로 남깁니다.
+        """
+        await self._budgets[provider.dim].acquire(len(texts))
+        try:
+            return await provider.embed(texts)
+        except Exception as e:
+            print(f"  ⚠️  {provider.name} 배치 임베딩 실패 ({len(texts)}건): {e}")
+            if len(texts) == 1:
+                return [None]
+
+        vectors: List[Optional[List[float]]] = []
+        for text in texts:
+            await self._budgets[provider.dim].acquire(1)
+            try:
+                vectors.extend(await provider.embed([text]))
+            except Exception as e:
+                print(f"  ⚠️  {provider.name} 임베딩 실패 (텍스트 {len(text)}자): {e}")
+                vectors.append(None)
+        return vectors
+
+    async def _embed_batch(self, provider: Any, batch: List[Tuple[int, str]]) -> None:
+        progress = self._progress
+        vectors = await self._embed_texts(provider, [text for _, text in batch])
+
+        embeddings = [
+            (report_id, vector)
+            for (report_id, _), vector in zip(batch, vectors)
+            if vector is not None and len(vector) == provider.dim
+        ]
+        if embeddings:
+            await asyncio.to_thread(self._save, provider.dim, embeddings)
+        progress.embedded[provider.dim] = progress.embedded.get(provider.dim, 0) + len(embeddings)
+        progress.failed[provider.dim] = progress.failed.get(provider.dim, 0) + len(batch) - len(embeddings)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        비어 있는 임베딩을 한 바퀴 채움
+
+        실패한 리포트는 이번 실행에서 건너뛰고 (커서는 계속 진행) 다음 실행에서 다시 시도합니다.
+        """
+        if self._lock.locked() or not self.providers:
+            return self.progress()
+
+        from services.common.single_flight import try_advisory_lock
+
+        async with self._lock, try_advisory_lock(("embedding_backfill",)) as locked:
+            if not locked:
+                from database import engine
+                # Postgres에서 락을 얻지 못했으면 다른 워커가 실행 중
+                if engine.dialect.name == "postgresql":
+                    return self.progress()
+
+            created_before = datetime.now(timezone.utc) - timedelta(minutes=self.grace_minutes)
+            total = await asyncio.to_thread(self._count, self.embedding_dims, created_before)
+            self._progress = progress = BackfillProgress(
+                running=True, started_at=datetime.now(timezone.utc).isoformat(), total_reports=total
+            )
+            if total:
+                print(f"🔄 임베딩 백필 시작: 대상 리포트 {total}건 (차원: {self.embedding_dims})")
+
+            try:
+                while True:
+                    rows = await asyncio.to_thread(self._scan, created_before, progress.last_report_id)
+                    if not rows:
+                        break
+                    progress.last_report_id = rows[-1][0]
+                    progress.scanned_reports += len(rows)
+
+                    for provider in self.providers:
+                        items = [
+                            (report_id, text)
+                            for report_id, text, missing in rows
+                            if missing.get(provider.dim) and text and text.strip()
+                        ]
+                        for i in range(0, len(items), provider.batch_size):
+                            await self._embed_batch(provider, items[i:i + provider.batch_size])
+
+                    print(
+                        f"  🔢 임베딩 백필 {progress.scanned_reports}/{total} "
+                        f"(저장 {progress.embedded}, 실패 {progress.failed}, 마지막 id {progress.last_report_id})"
+                    )
+            finally:
+                progress.running = False
+                progress.finished_at = datetime.now(timezone.utc).isoformat()
+        return self.progress()
+
+    async def run_forever(self, interval_seconds: float = EMBEDDING_BACKFILL_INTERVAL_SECONDS) -> None:
+        """주기적으로 run_once 실행 (lifespan에서 태스크로 실행)"""
+        await asyncio.sleep(_START_DELAY_SECONDS)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"⚠️  임베딩 백필 실패: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+# 앱 전역 백필 워커 (진행 상태 공유)
+embedding_backfill_worker = EmbeddingBackfillWorker()
+
+
+if __name__ == "__main__":
+    result = asyncio.run(EmbeddingBackfillWorker(grace_minutes=0).run_once())
+    print(f"✅ 임베딩 백필 완료: {result}")
@@ -0,0 +1,123 @@
+"""
+분석 리포트 임베딩 백그라운드 작업
+임베딩 생성을 분석 응답의 임계 경로에서 분리
+
+- 리포트 행이 커밋된 뒤 백그라운드 태스크가 임베딩을 생성하여 update_embedding으로 채움
+- 실패 시 지수 백오프로 재시도, 재시도를 모두 소진하면 embedding_status="failed"
+- 서버 재시작 등으로 남은 "pending" 리포트는 시작 시 다시 작업에 등록
+"""
+
+import os
+import asyncio
+from typing import Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+EMBEDDING_RETRY_BASE_SECONDS = float(os.getenv("EMBEDDING_RETRY_BASE_SECONDS", "2"))
+
+# 실행 중인 태스크 참조 유지 (가비지 컬렉션으로 취소되지 않도록)
+_running_tasks: Set[asyncio.Task] = set()
+# 같은 리포트에 대한 중복 작업 방지
+_scheduled_reports: Set[int] = set()
+
+
+def _save_embedding(report_id: int, embedding_1536: list) -> None:
+    from database import SessionLocal
+    from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+    with SessionLocal() as db:
+        AnalysisReportRepository.update_embedding(db, report_id, embedding_1536=embedding_1536, status="ready")
+
+
+def _mark_failed(report_id: int) -> None:
+    from database import SessionLocal
+    from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+    with SessionLocal() as db:
+        AnalysisReportRepository.set_embedding_status(db, report_id, "failed")
+
+
+async def embed_report(report_id: int, text: str, llm_client=None) -> bool:
+    """
+    리포트 텍스트 임베딩 생성 후 저장 (재시도 포함)
+
+    Args:
+        report_id: 분석 리포트 ID (이미 커밋된 행)
+        text: 임베딩할 LLM 출력 텍스트
+        llm_client: 임베딩에 사용할 LLM 클라이언트 (기본값: 앱 전역 LLMService의 클라이언트)
+
+    Returns:
+        성공 여부
+    """
+    if llm_client is None:
+        from utils.dependencies import get_llm_service
+        llm_client = get_llm_service().llm_client
+
+    for attempt in range(1, EMBEDDING_MAX_RETRIES + 1):
+        try:
+            # text-embedding-3-small (1536차원)
+            embedding_1536 = await llm_client.acreate_embedding(text)
+            await asyncio.to_thread(_save_embedding, report_id, embedding_1536)
+            print(f"✅ 리포트 {report_id} 임베딩 저장 완료 (차원: {len(embedding_1536)})")
+            return True
+        except Exception as e:
+            print(f"⚠️  리포트 {report_id} 임베딩 생성 실패 ({attempt}/{EMBEDDING_MAX_RETRIES}): {e}")
+            if attempt < EMBEDDING_MAX_RETRIES:
+                await asyncio.sleep(EMBEDDING_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+
+    try:
+        await asyncio.to_thread(_mark_failed, report_id)
+    except Exception as e:
+        print(f"⚠️  리포트 {report_id} 임베딩 상태 갱신 실패: {e}")
+    return False
+
+
+def schedule_report_embedding(report_id: int, text: str, llm_client=None) -> Optional[asyncio.Task]:
+    """
+    리포트 임베딩 작업을 백그라운드 태스크로 등록
+
+    이벤트 루프 밖(동기 컨텍스트)에서 호출되면 등록하지 않고 None을 반환합니다.
+    이 경우 리포트는 "pending" 상태로 남아 다음 시작 시 requeue_pending_embeddings가 처리합니다.
+    """
+    if report_id in _scheduled_reports:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    _scheduled_reports.add(report_id)
+    task = loop.create_task(embed_report(report_id, text, llm_client))
+    _running_tasks.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        _running_tasks.discard(t)
+        _scheduled_reports.discard(report_id)
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def requeue_pending_embeddings(limit: int = 100) -> int:
+    """시작 시 "pending" 상태로 남은 리포트의 임베딩 작업 재등록"""
+    from database import SessionLocal
+    from repositories.llm.analysis_report_repository import AnalysisReportRepository
+
+    def _load():
+        with SessionLocal() as db:
+            return [(r.id, r.llm_output) for r in AnalysisReportRepository.get_pending_embeddings(db, limit)]
+
+    try:
+        pending = await asyncio.to_thread(_load)
+    except Exception as e:
+        print(f"⚠️  임베딩 대기 리포트 조회 실패: {e}")
+        return 0
+
+    for report_id, text in pending:
+        schedule_report_embedding(report_id, text)
+    if pending:
+        print(f"🔄 임베딩 대기 리포트 {len(pending)}건 재등록")
+    return len(pending)
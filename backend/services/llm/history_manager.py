@@ -0,0 +1,222 @@
+"""
+대화 기록 토큰 예산 관리
+Q&A 턴마다 전체 대화 기록을 재전송하지 않도록, 예산 안에서 보낼 기록을 구성
+
+- 고정 컨텍스트(인바디 측정값 프롬프트, 최초 분석/계획, 최신 수정 계획)는 항상 원문 유지
+- 최근 K턴은 원문 유지
+- 그보다 오래된 턴은 백그라운드에서 점진적으로 갱신되는 요약 1개로 대체
+- 턴마다 절감된 토큰 수를 기록
+"""
+
+import os
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from dotenv import load_dotenv
+
+from services.llm.token_counter import count_tokens
+
+load_dotenv()
+
+LLM_HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_HISTORY_TOKEN_BUDGET", "4000"))
+LLM_HISTORY_KEEP_TURNS = int(os.getenv("LLM_HISTORY_KEEP_TURNS", "3"))
+
+# 요약을 기억할 최대 스레드 수 (프로세스 메모리 보호용)
+_SUMMARY_STORE_MAX_THREADS = 1024
+
+SUMMARY_SYSTEM_PROMPT = """당신은 건강/운동 상담 대화를 요약하는 어시스턴트입니다.
+기존 요약과 새로 추가된 대화를 합쳐 하나의 요약으로 갱신해주세요.
+- 사용자가 질문한 내용, 요청한 변경 사항, 알려준 개인 정보(부상, 선호, 일정 등)를 빠짐없이 남기세요.
+- 코치가 제시한 핵심 수치와 결론만 남기고 설명은 줄이세요.
+- 10줄 이내의 불릿 목록으로 작성하세요."""
+
+
+@dataclass
+class HistoryStats:
+    """턴당 기록 압축 통계"""
+    full_tokens: int
+    sent_tokens: int
+    summarized_messages: int
+    dropped_messages: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.full_tokens - self.sent_tokens, 0)
+
+
+class ConversationHistoryManager:
+    """
+    토큰 예산 기반 대화 기록 구성기
+
+    Args:
+        llm_client: 요약 생성에 사용할 LLM 클라이언트
+        token_budget: 시스템 프롬프트 + 기록 전체의 목표 토큰 수
+        keep_turns: 원문으로 유지할 최근 턴 수 (사용자 질문 + AI 답변 = 1턴)
+        pinned_prefix: 항상 유지할 대화 앞부분 메시지 수 (측정값 프롬프트, 최초 분석/계획)
+        pinned_names: 가장 최근 것을 항상 유지할 메시지 name (예: 수정된 주간 계획)
+    """
+
+    def __init__(
+        self,
+        llm_client,
+        token_budget: int = LLM_HISTORY_TOKEN_BUDGET,
+        keep_turns: int = LLM_HISTORY_KEEP_TURNS,
+        pinned_prefix: int = 2,
+        pinned_names: Sequence[str] = ()
+    ):
+        self.llm_client = llm_client
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.pinned_prefix = pinned_prefix
+        self.pinned_names = set(pinned_names)
+        # thread_id -> {"text": 요약, "upto": 요약에 포함된 마지막 메시지 인덱스 + 1}
+        self._summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    # -------------------------------------------------
+    # 기록 구성
+    # -------------------------------------------------
+
+    @staticmethod
+    def _to_tuples(messages: list) -> List[Tuple[str, str]]:
+        # LangGraph 메시지 객체를 LLM 클라이언트가 이해하는 튜플 리스트로 변환
+        return [("user" if msg.type == "human" else "assistant", msg.content) for msg in messages]
+
+    def _pinned_indices(self, messages: list) -> Set[int]:
+        pinned = set(range(min(self.pinned_prefix, len(messages))))
+        if self.pinned_names:
+            for i in range(len(messages) - 1, -1, -1):
+                if getattr(messages[i], "name", None) in self.pinned_names:
+                    pinned.add(i)
+                    break
+        return pinned
+
+    def _older_indices(self, messages: list, keep_messages: int) -> List[int]:
+        """고정 메시지를 제외하고 최근 keep_messages개보다 오래된 메시지 인덱스"""
+        pinned = self._pinned_indices(messages)
+        body = [i for i in range(len(messages)) if i not in pinned]
+        return body[:-keep_messages] if keep_messages else body
+
+    def _best_summary(self, thread_id: Optional[str], state_summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        candidates = [s for s in (state_summary, self._summaries.get(thread_id) if thread_id else None) if s]
+        return max(candidates, key=lambda s: s["upto"]) if candidates else None
+
+    def build(
+        self,
+        system_prompt: str,
+        messages: list,
+        thread_id: Optional[str] = None,
+        state_summary: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, List[Tuple[str, str]], HistoryStats, Optional[Dict[str, Any]]]:
+        """
+        예산에 맞춘 (시스템 프롬프트, 대화 기록) 구성
+
+        마지막 메시지는 현재 사용자 질문이므로 최근 K턴 + 현재 질문을 원문으로 유지합니다.
+
+        Returns:
+            (시스템 프롬프트, 기록 튜플 리스트, 통계, 상태에 저장할 요약 또는 None)
+        """
+        tuples = self._to_tuples(messages)
+        tokens = [count_tokens(content) for _, content in tuples]
+        full_tokens = count_tokens(system_prompt) + sum(tokens)
+
+        older = self._older_indices(messages, 2 * self.keep_turns + 1)
+        summary = self._best_summary(thread_id, state_summary)
+        upto = summary["upto"] if summary else 0
+
+        summarized = [i for i in older if i < upto]
+        unsummarized = [i for i in older if i >= upto]
+        selected = set(range(len(messages))) - set(older)
+
+        if summary and summarized:
+            system_prompt = f"{system_prompt}\n\n[이전 대화 요약]\n{summary['text']}"
+
+        # 요약되지 않은 오래된 메시지는 남은 예산 안에서 최신순으로 원문 포함
+        used = count_tokens(system_prompt) + sum(tokens[i] for i in selected)
+        dropped = 0
+        for i in reversed(unsummarized):
+            if used + tokens[i] <= self.token_budget:
+                selected.add(i)
+                used += tokens[i]
+            else:
+                dropped += 1
+
+        history = [tuples[i] for i in sorted(selected)]
+        stats = HistoryStats(
+            full_tokens=full_tokens,
+            sent_tokens=used,
+            summarized_messages=len(summarized) if summary else 0,
+            dropped_messages=dropped,
+        )
+        if stats.saved_tokens:
+            print(
+                f"📉 대화 기록 압축: {stats.full_tokens} → {stats.sent_tokens} 토큰 "
+                f"({stats.saved_tokens} 절감, 요약 {stats.summarized_messages}개 / 생략 {stats.dropped_messages}개)"
+            )
+
+        # 인메모리 요약이 체크포인트 상태보다 최신이면 상태에 저장 (재시작/다른 워커에서도 재사용)
+        state_update = summary if summary and summary is not state_summary else None
+        return system_prompt, history, stats, state_update
+
+    # -------------------------------------------------
+    # 백그라운드 요약
+    # -------------------------------------------------
+
+    def schedule_summary(
+        self,
+        thread_id: Optional[str],
+        messages: list,
+        state_summary: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        AI 답변 직후 호출: 다음 턴에 최근 K턴 밖으로 밀려날 메시지를 미리 요약
+
+        전체 기록이 예산 안에 들어오면 요약하지 않습니다. 같은 스레드의 요약 작업은 하나만 실행됩니다.
+        """
+        if not thread_id or thread_id in self._pending:
+            return
+
+        tuples = self._to_tuples(messages)
+        if sum(count_tokens(content) for _, content in tuples) <= self.token_budget:
+            return
+
+        # 다음 질문이 추가되면 최근 원문 구간은 (2K + 1)개가 되므로 지금 기준으로는 2K개
+        older = self._older_indices(messages, 2 * self.keep_turns)
+        summary = self._best_summary(thread_id, state_summary)
+        upto = summary["upto"] if summary else 0
+        new_indices = [i for i in older if i >= upto]
+        if not new_indices:
+            return
+
+        task = asyncio.create_task(
+            self._update_summary(thread_id, summary, [tuples[i] for i in new_indices], new_indices[-1] + 1)
+        )
+        self._pending[thread_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(thread_id, None))
+
+    async def _update_summary(
+        self,
+        thread_id: str,
+        previous: Optional[Dict[str, Any]],
+        new_messages: List[Tuple[str, str]],
+        upto: int
+    ) -> None:
+        transcript = "\n".join(
+            f"{'사용자' if role == 'user' else '코치'}: {content}" for role, content in new_messages
+        )
+        user_prompt = (
+            f"[기존 요약]\n{previous['text'] if previous else '(없음)'}\n\n"
+            f"[새로 추가된 대화]\n{transcript}"
+        )
+        try:
+            text = await self.llm_client.agenerate_chat(SUMMARY_SYSTEM_PROMPT, user_prompt)
+        except Exception as e:
+            print(f"⚠️  대화 기록 요약 실패 ({thread_id}): {e}")
+            return
+
+        self._summaries[thread_id] = {"text": text, "upto": upto}
+        self._summaries.move_to_end(thread_id)
+        while len(self._summaries) > _SUMMARY_STORE_MAX_THREADS:
+            self._summaries.popitem(last=False)
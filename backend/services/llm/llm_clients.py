@@ -1,11 +1,73 @@
 import os
-from typing import List, Tuple
+import asyncio
+from typing import List, Tuple, Optional, AsyncIterator
 from abc import ABC, abstractmethod
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+# ============================================================
+# 공유 HTTP 커넥션 풀
+# ============================================================
+# 클라이언트 인스턴스마다 새 커넥션 풀을 만들지 않도록 프로세스 단위로 공유합니다.
+# 비동기 클라이언트는 이벤트 루프를 막지 않으므로, 느린 completion 하나가
+# 같은 워커의 헬스 체크나 다른 요청을 멈추게 하지 않습니다.
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+_sync_openai_client: Optional[OpenAI] = None
+_async_openai_client: Optional[AsyncOpenAI] = None
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=30.0,
+    )
+
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0)
+
+
+def get_openai_client() -> OpenAI:
+    """프로세스 공유 동기 OpenAI 클라이언트 (지연 생성)"""
+    global _sync_openai_client
+    if _sync_openai_client is None:
+        _sync_openai_client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=httpx.Client(limits=_http_limits(), timeout=_http_timeout()),
+        )
+    return _sync_openai_client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """프로세스 공유 비동기 OpenAI 클라이언트 (지연 생성)"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout()),
+        )
+    return _async_openai_client
+
+
+async def close_llm_clients() -> None:
+    """공유 커넥션 풀 정리 (애플리케이션 종료 시 호출)"""
+    global _sync_openai_client, _async_openai_client
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+    if _sync_openai_client is not None:
+        _sync_openai_client.close()
+        _sync_openai_client = None
+
+
 class BaseLLMClient(ABC):
     @abstractmethod
     def generate_chat(self, system_prompt: str, user_prompt: str) -> str:
@@ -22,13 +84,48 @@ class BaseLLMClient(ABC):
         """임베딩 생성"""
         pass
 
+    # 비동기 버전: 네이티브 비동기 클라이언트가 없으면 스레드 풀에서 동기 메서드를 실행
+    async def agenerate_chat(self, system_prompt: str, user_prompt: str) -> str:
+        """단일 턴 채팅 생성 (비동기)"""
+        return await asyncio.to_thread(self.generate_chat, system_prompt, user_prompt)
+
+    async def agenerate_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]]) -> str:
+        """대화 기록을 포함하여 채팅 생성 (비동기)"""
+        return await asyncio.to_thread(self.generate_chat_with_history, system_prompt, messages)
+
+    async def acreate_embedding(self, text: str) -> List[float]:
+        """임베딩 생성 (비동기)"""
+        return await asyncio.to_thread(self.create_embedding, text)
+
+    # 스트리밍 버전: 토큰 스트리밍을 지원하지 않는 클라이언트는 전체 응답을 한 번에 내보냄
+    async def astream_chat(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        """단일 턴 채팅 생성 (토큰 스트리밍)"""
+        yield await self.agenerate_chat(system_prompt, user_prompt)
+
+    async def astream_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]]) -> AsyncIterator[str]:
+        """대화 기록을 포함하여 채팅 생성 (토큰 스트리밍)"""
+        yield await self.agenerate_chat_with_history(system_prompt, messages)
+
 
 class OpenAIClient(BaseLLMClient):
     """OpenAI API 클라이언트"""
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7):
+        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
         self.model = model
+        self.temperature = temperature
+
+    @staticmethod
+    def _format_messages(system_prompt: str, messages: List[Tuple[str, str]]) -> List[dict]:
+        # LangGraph 메시지 튜플 (role, content)을 OpenAI 포맷으로 변환
+        formatted_messages = [{"role": "system", "content": system_prompt}]
+
+        for role, content in messages:
+            # role 매핑: human/user -> user, ai/assistant -> assistant
+            openai_role = "user" if role in ["human", "user"] else "assistant"
+            formatted_messages.append({"role": openai_role, "content": content})
+        return formatted_messages
 
     def generate_chat(self, system_prompt: str, user_prompt: str) -> str:
         response = self.client.chat.completions.create(
@@ -37,23 +134,15 @@ class OpenAIClient(BaseLLMClient):
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            temperature=0.7,
+            temperature=self.temperature,
         )
         return response.choices[0].message.content
 
     def generate_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]]) -> str:
-        # LangGraph 메시지 튜플 (role, content)을 OpenAI 포맷으로 변환
-        formatted_messages = [{"role": "system", "content": system_prompt}]
-        
-        for role, content in messages:
-            # role 매핑: human/user -> user, ai/assistant -> assistant
-            openai_role = "user" if role in ["human", "user"] else "assistant"
-            formatted_messages.append({"role": openai_role, "content": content})
-
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=formatted_messages,
-            temperature=0.7,
+            messages=self._format_messages(system_prompt, messages),
+            temperature=self.temperature,
         )
         return response.choices[0].message.content
 
@@ -65,10 +154,68 @@ class OpenAIClient(BaseLLMClient):
         )
         return response.data[0].embedding
 
+    async def agenerate_chat(self, system_prompt: str, user_prompt: str) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content
+
+    async def agenerate_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]]) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self._format_messages(system_prompt, messages),
+            temperature=self.temperature,
+        )
+        return response.choices[0].message.content
 
-def create_llm_client(model_name: str = "gpt-4o-mini") -> BaseLLMClient:
-    """LLM 클라이언트 팩토리 함수"""
+    async def astream_chat(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        async for token in self._astream([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]):
+            yield token
+
+    async def astream_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]]) -> AsyncIterator[str]:
+        async for token in self._astream(self._format_messages(system_prompt, messages)):
+            yield token
+
+    async def _astream(self, formatted_messages: List[dict]) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=formatted_messages,
+            temperature=self.temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def acreate_embedding(self, text: str) -> List[float]:
+        response = await self.async_client.embeddings.create(
+            input=text,
+            model="text-embedding-3-small"
+        )
+        return response.data[0].embedding
+
+
+def create_llm_client(model_name: str = "gpt-4o-mini", use_response_cache: bool = True) -> BaseLLMClient:
+    """LLM 클라이언트 팩토리 함수 (LLM_RESPONSE_CACHE 설정 시 응답 캐시 적용)"""
     if "gpt" in model_name:
-        return OpenAIClient(model=model_name)
+        client = OpenAIClient(model=model_name)
     else:
-        raise ValueError(f"지원하지 않는 모델입니다: {model_name}")
\ No newline at end of file
+        raise ValueError(f"지원하지 않는 모델입니다: {model_name}")
+
+    if not use_response_cache:
+        return client
+
+    from services.llm.response_cache import CachedLLMClient, create_response_cache_backend
+
+    backend = create_response_cache_backend()
+    if backend is None:
+        return client
+    return CachedLLMClient(client, backend)
@@ -3,7 +3,7 @@ LLM 서비스
 AI 분석 및 계획 생성 (LangGraph 에이전트 사용)
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -116,7 +116,7 @@ class LLMService:
         Returns:
             {
                 "analysis_text": str,
-                "embedding": {"embedding_1536": [...], "embedding_1024": [...]},
+                "embedding": None,  # 임베딩은 리포트 저장 후 백그라운드에서 생성 (embedding_jobs)
                 "thread_id": str
             }
         """
@@ -124,8 +124,8 @@ class LLMService:
         thread_id = f"analysis_{input_data.user_id}_{input_data.record_id}_{datetime.now().timestamp()}"
         config = {"configurable": {"thread_id": thread_id}}
 
-        # 2. LangGraph 에이전트 호출 (최초 분석)
-        initial_state = self.analysis_agent.invoke(
+        # 2. LangGraph 에이전트 호출 (최초 분석, 비동기 실행으로 이벤트 루프를 막지 않음)
+        initial_state = await self.analysis_agent.ainvoke(
             {"analysis_input": input_data},
             config=config
         )
@@ -149,7 +149,7 @@ class LLMService:
         
         # LangGraph 실행 (이전 상태에서 이어서 실행)
         # messages 키에 새로운 사용자 메시지 추가
-        result = self.analysis_agent.invoke(
+        result = await self.analysis_agent.ainvoke(
             {"messages": [("human", user_message)]},
             config=config
         )
@@ -175,13 +175,13 @@ class LLMService:
         config = {"configurable": {"thread_id": thread_id}}
 
         # 2. LangGraph 에이전트 호출
-        initial_state = self.weekly_plan_agent.invoke(
+        initial_state = await self.weekly_plan_agent.ainvoke(
             {"plan_input": input_data},
             config=config
         )
 
-        # 3. 결과 반환 (마지막 AI 메시지)
-        return initial_state['messages'][-1].content
+        # 3. 결과 반환 (요일별 JSON 원문, 대화 기록의 마지막 AI 메시지는 렌더링된 마크다운)
+        return initial_state.get("plan_text") or initial_state['messages'][-1].content
 
     async def chat_with_plan(
         self,
@@ -194,10 +194,127 @@ class LLMService:
         config = {"configurable": {"thread_id": thread_id}}
         
         # LangGraph 실행 (이전 상태에서 이어서 실행)
-        result = self.weekly_plan_agent.invoke(
+        result = await self.weekly_plan_agent.ainvoke(
             {"messages": [("human", user_message)]},
             config=config
         )
         
         # 마지막 AI 응답 반환
         return result["messages"][-1].content
+
+    # =====================================================
+    # 토큰 스트리밍 (SSE용)
+    # =====================================================
+
+    async def _astream_agent(
+        self,
+        agent,
+        agent_input: Dict[str, Any],
+        config: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        LangGraph 에이전트를 스트리밍 모드로 실행
+
+        Yields:
+            {"type": "token", "content": str}  # LLM 토큰
+            {"type": "state", "state": dict}   # 마지막에 한 번, 최종 그래프 상태
+        """
+        final_state = None
+        async for mode, chunk in agent.astream(
+            agent_input,
+            config=config,
+            stream_mode=["custom", "values"]
+        ):
+            if mode == "custom" and isinstance(chunk, dict) and "token" in chunk:
+                yield {"type": "token", "content": chunk["token"]}
+            elif mode == "values":
+                final_state = chunk
+        yield {"type": "state", "state": final_state}
+
+    async def stream_status_analysis_llm(
+        self,
+        input_data: StatusAnalysisInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        call_status_analysis_llm의 스트리밍 버전
+
+        Yields:
+            {"type": "token", "content": str}
+            {"type": "done", "analysis_text": str, "embedding": dict, "thread_id": str}
+        """
+        thread_id = f"analysis_{input_data.user_id}_{input_data.record_id}_{datetime.now().timestamp()}"
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async for event in self._astream_agent(self.analysis_agent, {"analysis_input": input_data}, config):
+            if event["type"] == "token":
+                yield event
+            else:
+                state = event["state"]
+                yield {
+                    "type": "done",
+                    "analysis_text": state['messages'][-1].content,
+                    "embedding": state.get("embedding"),
+                    "thread_id": thread_id
+                }
+
+    async def stream_chat_with_analysis(
+        self,
+        thread_id: str,
+        user_message: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        chat_with_analysis의 스트리밍 버전
+
+        Yields:
+            {"type": "token", "content": str}
+            {"type": "done", "response": str, "thread_id": str}
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async for event in self._astream_agent(self.analysis_agent, {"messages": [("human", user_message)]}, config):
+            if event["type"] == "token":
+                yield event
+            else:
+                yield {"type": "done", "response": event["state"]["messages"][-1].content, "thread_id": thread_id}
+
+    async def stream_goal_plan_llm(
+        self,
+        input_data: GoalPlanInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        call_goal_plan_llm의 스트리밍 버전
+
+        Yields:
+            {"type": "token", "content": str}  # 완성된 요일의 마크다운 조각 (JSON 원문 아님)
+            {"type": "done", "plan_text": str, "thread_id": str}
+        """
+        thread_id = f"plan_{input_data.user_id}_{input_data.record_id}_{datetime.now().timestamp()}"
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async for event in self._astream_agent(self.weekly_plan_agent, {"plan_input": input_data}, config):
+            if event["type"] == "token":
+                yield event
+            else:
+                state = event["state"]
+                plan_text = state.get("plan_text") or state["messages"][-1].content
+                yield {"type": "done", "plan_text": plan_text, "thread_id": thread_id}
+
+    async def stream_chat_with_plan(
+        self,
+        thread_id: str,
+        user_message: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        chat_with_plan의 스트리밍 버전
+
+        Yields:
+            {"type": "token", "content": str}
+            {"type": "done", "response": str, "thread_id": str}
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async for event in self._astream_agent(self.weekly_plan_agent, {"messages": [("human", user_message)]}, config):
+            if event["type"] == "token":
+                yield event
+            else:
+                yield {"type": "done", "response": event["state"]["messages"][-1].content, "thread_id": thread_id}
@@ -1,10 +1,94 @@
 """
 LLM 응답 파싱 유틸리티
 LLM1 출력 결과를 요약(summary)과 전문(content)으로 분리하는 기능 제공
+
+리포트 저장 시 build_section_index로 섹션 색인(제목 + 본문 오프셋, 요약)을 한 번만 만들어
+section_index 컬럼에 저장하고, 조회 시에는 저장된 색인을 그대로 사용합니다.
 """
 
 import re
-from typing import Dict
+from typing import Any, Dict, List, Optional
+
+# 섹션 색인 형식 버전 (형식이 바뀌면 올려서 이전 색인을 다시 만들도록 함)
+SECTION_INDEX_VERSION = 1
+
+_SECTION_HEADING = re.compile(r"###\s*\[([^\]]+)\]")
+
+# 요약 섹션 우선순위: "### [종합 체형 평가]" → "### [요약]" → "### [분석 요약]"
+_SUMMARY_TITLES = [
+    re.compile(r"종합\s*체형\s*평가", re.IGNORECASE),
+    re.compile(r"요약", re.IGNORECASE),
+    re.compile(r"분석\s*요약", re.IGNORECASE),
+]
+
+
+def build_section_index(text: str) -> Dict[str, Any]:
+    """
+    LLM 분석 응답의 섹션 색인 생성 (리포트 저장 시 1회)
+
+    Args:
+        text: LLM 응답 전문
+
+    Returns:
+        {
+            "version": 색인 형식 버전,
+            "summary": 요약 내용 (split_analysis_response와 같은 우선순위),
+            "sections": [{"title": 섹션 제목, "start": 본문 시작 오프셋, "end": 본문 끝 오프셋}, ...]
+        }
+        오프셋은 llm_output 기준 문자 단위이며, 본문은 llm_output[start:end] 입니다 (제목 제외).
+    """
+    sections: List[Dict[str, Any]] = []
+    if text:
+        headings = list(_SECTION_HEADING.finditer(text))
+        for i, heading in enumerate(headings):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            body = text[heading.end():end]
+            # 앞뒤 공백을 제외한 본문 범위로 저장 (조회 시 strip 불필요)
+            start = heading.end() + (len(body) - len(body.lstrip()))
+            end = max(start, heading.end() + len(body.rstrip()))
+            sections.append({"title": heading.group(1).strip(), "start": start, "end": end})
+
+    return {
+        "version": SECTION_INDEX_VERSION,
+        "summary": _pick_summary(text, sections),
+        "sections": sections,
+    }
+
+
+def _pick_summary(text: str, sections: List[Dict[str, Any]]) -> str:
+    if not text or not text.strip():
+        return ""
+
+    # 우선순위 패턴 → 첫 번째 섹션 순으로 요약 섹션 선택
+    for pattern in _SUMMARY_TITLES:
+        for section in sections:
+            if pattern.fullmatch(section["title"]):
+                return text[section["start"]:section["end"]]
+    if sections:
+        return text[sections[0]["start"]:sections[0]["end"]]
+
+    # 어떤 섹션도 찾지 못한 경우, 처음 500자를 summary로 사용
+    summary = text[:500].strip()
+    if len(text) > 500:
+        summary += "..."
+    return summary
+
+
+def get_section_index(report) -> Dict[str, Any]:
+    """
+    리포트의 섹션 색인 (저장된 색인이 없거나 이전 형식이면 즉석에서 생성)
+
+    Args:
+        report: section_index, llm_output 속성을 가진 리포트 객체
+            (view="summary" 조회 결과는 llm_output 대신 미리 로드한 legacy_llm_output 사용)
+    """
+    index: Optional[Dict[str, Any]] = getattr(report, "section_index", None)
+    if index and index.get("version") == SECTION_INDEX_VERSION:
+        return index
+    text = getattr(report, "legacy_llm_output", None)
+    if text is None:
+        text = report.llm_output
+    return build_section_index(text or "")
 
 
 def split_analysis_response(text: str) -> Dict[str, str]:
@@ -28,55 +112,9 @@ def split_analysis_response(text: str) -> Dict[str, str]:
     """
     if not text or not text.strip():
         return {"summary": "", "content": ""}
-    
-    # 우선순위 1: "### [종합 체형 평가]" 섹션
-    summary_patterns = [
-        r"###\s*\[종합\s*체형\s*평가\]",
-        r"###\s*\[요약\]",
-        r"###\s*\[분석\s*요약\]",
-    ]
-    
-    summary_content = None
-    summary_start_idx = -1
-    summary_end_idx = -1
-    
-    # 우선순위 순서대로 패턴 검색
-    for pattern in summary_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            summary_start_idx = match.start()
-            # 해당 섹션의 시작 위치부터 다음 "###" 섹션까지 또는 끝까지
-            next_section = re.search(r"\n###\s*\[", text[match.end():])
-            if next_section:
-                summary_end_idx = match.end() + next_section.start()
-            else:
-                summary_end_idx = len(text)
-            
-            # 섹션 제목을 제외한 내용만 추출
-            summary_content = text[match.end():summary_end_idx].strip()
-            break
-    
-    # 우선순위 패턴에서 찾지 못한 경우, 첫 번째 "###" 섹션 사용
-    if summary_content is None:
-        first_section = re.search(r"###\s*\[([^\]]+)\]", text)
-        if first_section:
-            summary_start_idx = first_section.start()
-            next_section = re.search(r"\n###\s*\[", text[first_section.end():])
-            if next_section:
-                summary_end_idx = first_section.end() + next_section.start()
-            else:
-                summary_end_idx = len(text)
-            
-            summary_content = text[first_section.end():summary_end_idx].strip()
-    
-    # 어떤 섹션도 찾지 못한 경우, 처음 500자를 summary로 사용
-    if summary_content is None:
-        summary_content = text[:500].strip()
-        if len(text) > 500:
-            summary_content += "..."
-    
+
     # content는 항상 전체 텍스트
     return {
-        "summary": summary_content,
+        "summary": build_section_index(text)["summary"],
         "content": text
     }
@@ -260,11 +260,25 @@ def create_weekly_plan_prompt(
 4. **동기부여**: 계획의 의도와 기대 효과를 함께 설명하여 동기를 부여하세요.
 
 ## 출력 형식
-자연스러운 줄글과 리스트 형식을 혼용하여 가독성 있게 작성해주세요.
-- **주간 목표 요약**: 이번 주 집중할 포인트
-- **운동 계획**: 요일별 또는 분할별 운동 루틴 (유산소/무산소 비중 포함)
-- **식단 가이드**: 아침/점심/저녁/간식 추천 메뉴 및 영양 섭취 포인트
-- **생활 습관 팁**: 수면, 수분 섭취 등
+아래 JSON 객체 하나만 출력하세요 (코드 블록/설명 문장 없이). 월요일부터 일요일까지 7일을 모두 작성하세요.
+{
+  "weekly_goal": "이번 주 집중할 포인트 (1~2문장)",
+  "weekly_summary": "계획의 의도와 기대 효과, 유산소/무산소 비중",
+  "days": [
+    {
+      "day_of_week": "월요일",
+      "exercises": [
+        {"name": "스쿼트", "category": "웨이트", "target_muscle": "하체", "sets": 4, "reps": "10회", "rest_seconds": 90, "notes": "선택"}
+      ],
+      "meals": [
+        {"meal_type": "아침", "foods": ["현미밥", "닭가슴살"], "calories": 450, "protein_g": 35, "carbs_g": 50, "fat_g": 8, "notes": "선택"}
+      ],
+      "total_calories": 1900,
+      "notes": "휴식일이면 exercises를 빈 배열로 두고 회복 팁을 적으세요"
+    }
+  ],
+  "tips": ["수면, 수분 섭취 등 생활 습관 팁"]
+}
 """
 
     user_prompt_parts = []
@@ -284,4 +298,39 @@ def create_weekly_plan_prompt(
         
     user_prompt = "\n".join(user_prompt_parts)
     
-    return system_prompt, user_prompt
\ No newline at end of file
+    return system_prompt, user_prompt
+
+
+def create_plan_patch_prompt(days_json: str, request: str) -> Tuple[str, str]:
+    """
+    주간 계획 부분 수정용 프롬프트 생성
+
+    전체 계획을 다시 쓰지 않고, 수정이 필요한 요일만 JSON으로 재생성하도록 요청합니다.
+
+    Args:
+        days_json: 수정 대상 요일의 현재 계획 (DayPlan JSON 배열)
+        request: 사용자의 수정 요청
+
+    Returns:
+        (system_prompt, user_prompt)
+    """
+    system_prompt = """당신은 사용자의 주간 운동 및 식단 계획을 조정하는 전문 퍼스널 트레이너입니다.
+주어진 요일의 현재 계획과 사용자의 수정 요청을 보고, 변경이 필요한 요일만 다시 작성하세요.
+
+## 작성 지침
+1. 요청과 관계없는 요일은 출력하지 마세요.
+2. 수정하는 요일은 해당 요일 전체(exercises, meals, total_calories, notes)를 입력과 같은 구조로 작성하세요.
+3. 요청과 관계없는 운동/식사 항목은 그대로 유지하세요.
+
+## 출력 형식
+아래 JSON 객체 하나만 출력하세요 (코드 블록/설명 문장 없이).
+{"days": [수정한 요일의 계획, ...], "summary": "변경 내용 요약 (1~2문장)"}
+"""
+
+    user_prompt = f"""# 현재 계획
+{days_json}
+
+# 수정 요청
+{request}"""
+
+    return system_prompt, user_prompt
@@ -0,0 +1,403 @@
+"""
+LLM 응답 캐시
+동일한 (모델, temperature, 시스템 프롬프트, 메시지) 요청에 대해 저장된 응답을 재사용
+
+- 같은 측정값으로 리포트를 삭제 후 재생성하거나, QA 환경에서 fixture를 재생할 때
+  프롬프트가 바이트 단위로 같으므로 토큰 비용 없이 즉시 응답합니다.
+- 저장소는 교체 가능 (LLM_RESPONSE_CACHE=memory | disk | postgres | off, 기본 off)
+- temperature가 0인 클라이언트의 응답만 캐시 (그 외에는 호출 시 use_cache=True로 명시해야 캐시)
+  temperature > 0 응답을 같은 프롬프트의 다른 요청에 그대로 재생하지 않기 위함
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.llm.llm_clients import BaseLLMClient
+
+load_dotenv()
+
+LLM_RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE", "off").lower()
+LLM_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "86400"))
+LLM_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+LLM_RESPONSE_CACHE_DIR = os.getenv("LLM_RESPONSE_CACHE_DIR", ".llm_response_cache")
+# postgres 저장소의 만료/초과 항목 정리 주기 (저장할 때마다가 아니라 주기마다 한 번)
+LLM_RESPONSE_CACHE_PRUNE_INTERVAL_SECONDS = float(os.getenv("LLM_RESPONSE_CACHE_PRUNE_INTERVAL_SECONDS", "300"))
+
+
+def make_cache_key(
+    model: str,
+    temperature: Optional[float],
+    system_prompt: str,
+    messages: List[Tuple[str, str]]
+) -> str:
+    """(모델, temperature, 시스템 프롬프트, 메시지) 해시"""
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "system": system_prompt,
+            "messages": [[role, content] for role, content in messages],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# 저장소 (Backend)
+# ============================================================
+
+class ResponseCacheBackend(ABC):
+    """응답 캐시 저장소 인터페이스"""
+
+    # True면 I/O가 발생하므로 비동기 경로에서 스레드 풀로 실행
+    blocking: bool = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """만료되지 않은 응답 조회 (없으면 None)"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, model: Optional[str] = None) -> None:
+        """응답 저장"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """캐시 전체 삭제"""
+        pass
+
+
+class MemoryResponseCache(ResponseCacheBackend):
+    """프로세스 내 LRU 캐시"""
+
+    def __init__(self, max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, model: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskResponseCache(ResponseCacheBackend):
+    """디스크 캐시 (키당 JSON 파일 1개, 재시작 후에도 유지)"""
+
+    blocking = True
+
+    def __init__(
+        self,
+        directory: str = LLM_RESPONSE_CACHE_DIR,
+        max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_RESPONSE_CACHE_TTL_SECONDS
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry["expires_at"] < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: str, model: Optional[str] = None) -> None:
+        entry = {"expires_at": time.time() + self.ttl_seconds, "model": model, "value": value}
+        # 임시 파일에 쓴 뒤 교체 (동시 읽기 시 반쯤 쓰인 파일 방지)
+        tmp_path = self._path(key).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self._path(key))
+        self._evict_overflow()
+
+    def _evict_overflow(self) -> None:
+        files = list(self.directory.glob("*.json"))
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+class PostgresResponseCache(ResponseCacheBackend):
+    """Postgres 캐시 (llm_response_cache 테이블, 워커 간 공유)"""
+
+    blocking = True
+
+    def __init__(
+        self,
+        max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_RESPONSE_CACHE_TTL_SECONDS,
+        prune_interval_seconds: float = LLM_RESPONSE_CACHE_PRUNE_INTERVAL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self._next_prune_at = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _prune_due(self) -> bool:
+        """정리 주기가 지났으면 True (동시에 여러 스레드가 정리하지 않도록 다음 시각을 먼저 기록)"""
+        with self._prune_lock:
+            now = time.monotonic()
+            if now < self._next_prune_at:
+                return False
+            self._next_prune_at = now + self.prune_interval_seconds
+            return True
+
+    def get(self, key: str) -> Optional[str]:
+        from database import SessionLocal
+        from repositories.llm.llm_response_cache_repository import LLMResponseCacheRepository
+
+        with SessionLocal() as db:
+            return LLMResponseCacheRepository.get(db, key)
+
+    def set(self, key: str, value: str, model: Optional[str] = None) -> None:
+        from database import SessionLocal
+        from repositories.llm.llm_response_cache_repository import LLMResponseCacheRepository
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        with SessionLocal() as db:
+            LLMResponseCacheRepository.upsert(db, key, model, value, expires_at)
+            if self._prune_due():
+                LLMResponseCacheRepository.prune(db, self.max_entries)
+
+    def clear(self) -> None:
+        from database import SessionLocal
+        from repositories.llm.llm_response_cache_repository import LLMResponseCacheRepository
+
+        with SessionLocal() as db:
+            LLMResponseCacheRepository.clear(db)
+
+
+def create_response_cache_backend(backend: str = LLM_RESPONSE_CACHE) -> Optional[ResponseCacheBackend]:
+    """환경변수 설정에 맞는 캐시 저장소 생성 (off면 None)"""
+    if backend == "memory":
+        return MemoryResponseCache()
+    if backend == "disk":
+        return DiskResponseCache()
+    if backend == "postgres":
+        return PostgresResponseCache()
+    if backend in ("off", "none", ""):
+        return None
+    raise ValueError(f"지원하지 않는 LLM 응답 캐시 저장소입니다: {backend}")
+
+
+# ============================================================
+# 캐시 적용 클라이언트
+# ============================================================
+
+class CachedLLMClient(BaseLLMClient):
+    """
+    BaseLLMClient 앞단의 응답 캐시
+
+    - generate_chat / generate_chat_with_history (+ 비동기/스트리밍 버전)에 적용
+    - use_cache=None(기본): temperature가 0인 클라이언트만 캐시
+    - use_cache=True: temperature와 관계없이 캐시 (호출자가 재사용을 명시적으로 허용)
+    - use_cache=False: 캐시 우회 (읽기/쓰기 모두 생략)
+    - 임베딩은 캐시하지 않고 그대로 위임
+    """
+
+    def __init__(self, client: BaseLLMClient, backend: ResponseCacheBackend):
+        self.client = client
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    def _key(self, system_prompt: str, messages: List[Tuple[str, str]]) -> str:
+        return make_cache_key(
+            self.client.model,
+            getattr(self.client, "temperature", None),
+            system_prompt,
+            messages
+        )
+
+    def _should_cache(self, use_cache: Optional[bool]) -> bool:
+        if use_cache is None:
+            return getattr(self.client, "temperature", None) == 0
+        return use_cache
+
+    def _lookup(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"⚠️  LLM 응답 캐시 조회 실패: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _store(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value, model=self.client.model)
+        except Exception as e:
+            print(f"⚠️  LLM 응답 캐시 저장 실패: {e}")
+
+    async def _alookup(self, key: str) -> Optional[str]:
+        if self.backend.blocking:
+            return await asyncio.to_thread(self._lookup, key)
+        return self._lookup(key)
+
+    async def _astore(self, key: str, value: str) -> None:
+        if self.backend.blocking:
+            await asyncio.to_thread(self._store, key, value)
+        else:
+            self._store(key, value)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """캐시 적중 통계"""
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    # -------------------------------------------------
+    # 동기
+    # -------------------------------------------------
+
+    def generate_chat(self, system_prompt: str, user_prompt: str, use_cache: Optional[bool] = None) -> str:
+        if not self._should_cache(use_cache):
+            return self.client.generate_chat(system_prompt, user_prompt)
+        key = self._key(system_prompt, [("user", user_prompt)])
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.generate_chat(system_prompt, user_prompt)
+        self._store(key, response)
+        return response
+
+    def generate_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]], use_cache: Optional[bool] = None) -> str:
+        if not self._should_cache(use_cache):
+            return self.client.generate_chat_with_history(system_prompt, messages)
+        key = self._key(system_prompt, messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.client.generate_chat_with_history(system_prompt, messages)
+        self._store(key, response)
+        return response
+
+    def create_embedding(self, text: str) -> List[float]:
+        return self.client.create_embedding(text)
+
+    # -------------------------------------------------
+    # 비동기
+    # -------------------------------------------------
+
+    async def agenerate_chat(self, system_prompt: str, user_prompt: str, use_cache: Optional[bool] = None) -> str:
+        if not self._should_cache(use_cache):
+            return await self.client.agenerate_chat(system_prompt, user_prompt)
+        key = self._key(system_prompt, [("user", user_prompt)])
+        cached = await self._alookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.agenerate_chat(system_prompt, user_prompt)
+        await self._astore(key, response)
+        return response
+
+    async def agenerate_chat_with_history(self, system_prompt: str, messages: List[Tuple[str, str]], use_cache: Optional[bool] = None) -> str:
+        if not self._should_cache(use_cache):
+            return await self.client.agenerate_chat_with_history(system_prompt, messages)
+        key = self._key(system_prompt, messages)
+        cached = await self._alookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.agenerate_chat_with_history(system_prompt, messages)
+        await self._astore(key, response)
+        return response
+
+    async def acreate_embedding(self, text: str) -> List[float]:
+        return await self.client.acreate_embedding(text)
+
+    # -------------------------------------------------
+    # 스트리밍 (적중 시 전체 응답을 한 번에 전달, 미스 시 스트리밍 후 전체 응답 저장)
+    # -------------------------------------------------
+
+    async def astream_chat(self, system_prompt: str, user_prompt: str, use_cache: Optional[bool] = None) -> AsyncIterator[str]:
+        stream = self.client.astream_chat(system_prompt, user_prompt)
+        if not self._should_cache(use_cache):
+            async for token in stream:
+                yield token
+            return
+        async for token in self._astream_cached(self._key(system_prompt, [("user", user_prompt)]), stream):
+            yield token
+
+    async def astream_chat_with_history(
+        self,
+        system_prompt: str,
+        messages: List[Tuple[str, str]],
+        use_cache: Optional[bool] = None
+    ) -> AsyncIterator[str]:
+        stream = self.client.astream_chat_with_history(system_prompt, messages)
+        if not self._should_cache(use_cache):
+            async for token in stream:
+                yield token
+            return
+        async for token in self._astream_cached(self._key(system_prompt, messages), stream):
+            yield token
+
+    async def _astream_cached(self, key: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        cached = await self._alookup(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for token in stream:
+            chunks.append(token)
+            yield token
+        await self._astore(key, "".join(chunks))
@@ -0,0 +1,256 @@
+"""
+메뉴 Q&A 답변 선계산 (Speculative precomputation)
+최초 분석/계획 직후, 사용자가 누를 가능성이 높은 메뉴 답변을 백그라운드에서 미리 생성
+
+- 사용자가 메뉴 번호만 눌렀을 때(예: "1") 미리 만든 답변을 즉시 반환
+- 메뉴가 아닌 자유 질문을 하면(대화가 갈라지면) 남은 선계산 작업을 취소
+- 비용 상한: 스레드당 선계산 개수, 프로세스 전체 동시 실행 수, 시간당 토큰 예산
+
+SPECULATIVE_QA=on 일 때만 동작합니다 (기본값 off).
+"""
+
+import os
+import time
+import asyncio
+from dataclasses import dataclass, field
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from services.llm.history_manager import count_tokens
+
+load_dotenv()
+
+SPECULATIVE_QA = os.getenv("SPECULATIVE_QA", "off").lower() in ("on", "true", "1")
+SPECULATIVE_QA_MAX_ANSWERS = int(os.getenv("SPECULATIVE_QA_MAX_ANSWERS", "2"))
+SPECULATIVE_QA_MAX_CONCURRENT = int(os.getenv("SPECULATIVE_QA_MAX_CONCURRENT", "8"))
+SPECULATIVE_QA_TOKEN_BUDGET_PER_HOUR = int(os.getenv("SPECULATIVE_QA_TOKEN_BUDGET_PER_HOUR", "200000"))
+SPECULATIVE_QA_TTL_SECONDS = float(os.getenv("SPECULATIVE_QA_TTL_SECONDS", "900"))
+
+
+@dataclass(frozen=True)
+class MenuItem:
+    """
+    번호 메뉴 항목
+
+    Args:
+        key: 메뉴 번호 (route_qa가 보는 첫 글자)
+        category: Q&A 카테고리 이름 (노드 로그/선계산 키)
+        system_prompt: 해당 Q&A 노드의 시스템 프롬프트
+        question: 메뉴 클릭 시 전송되는 대표 질문 (선계산 입력)
+    """
+    key: str
+    category: str
+    system_prompt: str
+    question: str
+
+    def matches(self, user_message: str) -> bool:
+        """
+        추가 내용 없이 메뉴만 선택한 메시지인지 확인
+
+        route_qa는 첫 글자(메뉴 번호)로 라우팅하므로 번호로 시작하는 형태만 인정합니다.
+        번호 없이 대표 질문만 보낸 메시지는 qa_general로 가므로 선계산 답변을 쓰지 않습니다.
+        """
+        text = user_message.strip()
+        return text in (self.key, f"{self.key}.", f"{self.key}. {self.question}")
+
+
+class SpeculationBudget:
+    """프로세스 전체 선계산 비용 상한 (동시 실행 수 + 시간당 토큰)"""
+
+    def __init__(
+        self,
+        max_concurrent: int = SPECULATIVE_QA_MAX_CONCURRENT,
+        tokens_per_hour: int = SPECULATIVE_QA_TOKEN_BUDGET_PER_HOUR
+    ):
+        self.max_concurrent = max_concurrent
+        self.tokens_per_hour = tokens_per_hour
+        self.in_flight = 0
+        self._usage: "deque[tuple[float, int]]" = deque()
+
+    def _used_tokens(self) -> int:
+        cutoff = time.time() - 3600
+        while self._usage and self._usage[0][0] < cutoff:
+            self._usage.popleft()
+        return sum(tokens for _, tokens in self._usage)
+
+    def try_acquire(self, estimated_tokens: int) -> bool:
+        """예산이 남아 있으면 실행 슬롯 확보 (대기하지 않고 즉시 실패)"""
+        if self.in_flight >= self.max_concurrent:
+            return False
+        if self._used_tokens() + estimated_tokens > self.tokens_per_hour:
+            return False
+        self.in_flight += 1
+        self._usage.append((time.time(), estimated_tokens))
+        return True
+
+    def release(self, completion_tokens: int = 0) -> None:
+        self.in_flight -= 1
+        if completion_tokens:
+            self._usage.append((time.time(), completion_tokens))
+
+
+_budget = SpeculationBudget()
+
+
+@dataclass
+class _ThreadSpeculation:
+    expected_len: int
+    tasks: Dict[str, asyncio.Task] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+
+class SpeculativeAnswerCache:
+    """
+    스레드별 메뉴 답변 선계산 관리
+
+    선계산 답변은 메뉴만 연속으로 누르는 동안 유효합니다.
+    메뉴가 아닌 질문이 들어오거나, 대화 길이가 예상과 다르면(다른 경로로 진행) 모두 취소합니다.
+
+    Args:
+        menu: 메뉴 항목 (클릭 가능성이 높은 순서)
+        max_answers: 스레드당 미리 생성할 답변 수 (앞에서부터)
+        enabled: False면 아무 작업도 하지 않음
+    """
+
+    def __init__(
+        self,
+        menu: Sequence[MenuItem],
+        max_answers: int = SPECULATIVE_QA_MAX_ANSWERS,
+        enabled: bool = SPECULATIVE_QA,
+        budget: SpeculationBudget = _budget
+    ):
+        self.menu = list(menu)
+        self.max_answers = max_answers
+        self.enabled = enabled
+        self.budget = budget
+        self._threads: Dict[str, _ThreadSpeculation] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def start(
+        self,
+        thread_id: Optional[str],
+        base_len: int,
+        generate: Callable[[MenuItem], Awaitable[str]]
+    ) -> None:
+        """
+        최초 응답 직후 호출: 상위 메뉴 답변을 백그라운드에서 동시에 생성
+
+        Args:
+            thread_id: 대화 스레드 ID
+            base_len: 선계산 시점의 대화 메시지 수 (다음 사용자 질문 직전 길이)
+            generate: 메뉴 항목을 받아 답변을 생성하는 코루틴 함수
+        """
+        if not self.enabled or not thread_id:
+            return
+        self._purge_expired()
+        self.cancel(thread_id)
+
+        speculation = _ThreadSpeculation(expected_len=base_len)
+        for item in self.menu[:self.max_answers]:
+            estimated = count_tokens(item.system_prompt) + count_tokens(item.question)
+            if not self.budget.try_acquire(estimated):
+                print(f"⏭️  선계산 예산 초과로 건너뜀 ({item.category})")
+                break
+            task = asyncio.create_task(self._run(item, generate))
+            # 사용되지 않고 실패한 작업의 예외를 회수 (경고 로그 방지)
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            speculation.tasks[item.key] = task
+        if speculation.tasks:
+            self._threads[thread_id] = speculation
+
+    async def _run(self, item: MenuItem, generate: Callable[[MenuItem], Awaitable[str]]) -> str:
+        completion_tokens = 0
+        try:
+            answer = await generate(item)
+            completion_tokens = count_tokens(answer)
+            return answer
+        finally:
+            self.budget.release(completion_tokens)
+
+    async def take(self, thread_id: Optional[str], user_message: str, history_len: int) -> Optional[str]:
+        """
+        Q&A 노드에서 호출: 메뉴 클릭이면 선계산 답변 반환 (생성 중이면 완료까지 대기)
+
+        Args:
+            thread_id: 대화 스레드 ID
+            user_message: 이번 사용자 메시지
+            history_len: 이번 사용자 메시지를 제외한 대화 메시지 수
+
+        Returns:
+            선계산 답변 또는 None (직접 생성 필요)
+        """
+        speculation = self._threads.get(thread_id) if thread_id else None
+        if speculation is None:
+            return None
+
+        item = next((m for m in self.menu if m.matches(user_message)), None)
+        if item is None or history_len != speculation.expected_len:
+            # 자유 질문 또는 다른 경로로 진행 → 남은 선계산 취소
+            self.cancel(thread_id)
+            return None
+
+        # 메뉴 클릭이 이어지는 동안은 (질문 + 답변) 2개씩 늘어난 길이를 기대
+        speculation.expected_len += 2
+        task = speculation.tasks.pop(item.key, None)
+        if not speculation.tasks:
+            self._threads.pop(thread_id, None)
+        if task is None:
+            self.misses += 1
+            return None
+        try:
+            answer = await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"⚠️  선계산 답변 생성 실패 ({item.category}): {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        print(f"⚡ 선계산 답변 사용 ({item.category})")
+        return answer
+
+    def cancel(self, thread_id: Optional[str]) -> None:
+        """스레드의 남은 선계산 작업 취소"""
+        speculation = self._threads.pop(thread_id, None) if thread_id else None
+        if speculation:
+            for task in speculation.tasks.values():
+                task.cancel()
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - SPECULATIVE_QA_TTL_SECONDS
+        for thread_id in [t for t, s in self._threads.items() if s.created_at < cutoff]:
+            self.cancel(thread_id)
+
+
+def make_menu_answer_generator(
+    llm_client,
+    history_manager,
+    base_messages: List,
+    thread_id: Optional[str]
+) -> Callable[[MenuItem], Awaitable[str]]:
+    """
+    선계산용 답변 생성 함수
+
+    Q&A 노드와 같은 방식(토큰 예산 기록 + 메뉴 시스템 프롬프트)으로,
+    base_messages 뒤에 메뉴 대표 질문이 붙은 대화에 대한 답변을 생성합니다.
+    """
+    from langchain_core.messages import HumanMessage
+
+    async def generate(item: MenuItem) -> str:
+        system_prompt, history, _, _ = history_manager.build(
+            item.system_prompt, base_messages + [HumanMessage(content=item.question)], thread_id
+        )
+        return await llm_client.agenerate_chat_with_history(system_prompt, history)
+
+    return generate
+
+
+async def replay_text(text: str) -> AsyncIterator[str]:
+    """선계산 답변을 stream_tokens에 넘기기 위한 단일 청크 스트림"""
+    yield text
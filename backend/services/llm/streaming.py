@@ -0,0 +1,33 @@
+"""
+LLM 토큰 스트리밍 유틸리티
+LangGraph 노드 안에서 LLM 토큰을 custom 스트림으로 흘려보내는 기능 제공
+"""
+
+from typing import AsyncIterator, Callable, List, Optional
+from langgraph.config import get_stream_writer
+
+
+async def stream_tokens(
+    token_stream: AsyncIterator[str],
+    transform: Optional[Callable[[str], List[str]]] = None
+) -> str:
+    """
+    LLM 토큰을 LangGraph 스트림 라이터로 전달하면서 전체 응답을 수집
+
+    - astream(stream_mode="custom")으로 실행하면 토큰이 {"token": ...} 이벤트로 전달됨
+    - ainvoke로 실행하면 라이터가 no-op이므로 전체 응답만 반환됨
+
+    Args:
+        token_stream: LLM 클라이언트의 astream_chat / astream_chat_with_history 결과
+        transform: 토큰 → 클라이언트에 보낼 조각 목록 (예: JSON 응답을 마크다운으로 렌더링), None이면 토큰 그대로
+
+    Returns:
+        토큰을 모두 이어붙인 전체 응답 텍스트
+    """
+    writer = get_stream_writer()
+    chunks = []
+    async for token in token_stream:
+        chunks.append(token)
+        for piece in (transform(token) if transform else [token]):
+            writer({"token": piece})
+    return "".join(chunks)
@@ -0,0 +1,50 @@
+"""
+로컬 토큰 수 계산 (tiktoken이 있으면 정확한 값, 없으면 근사치)
+
+tiktoken 인코딩(BPE 파일)은 첫 호출 시 불러옵니다.
+tiktoken이 설치되어 있어도 인코딩을 내려받지 못하는 환경(오프라인, 외부 접속 차단)에서는
+근사치로 대체하므로, 이 모듈을 import하는 서비스의 시작이 실패하지 않습니다.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+# 인코딩 이름 → tiktoken 인코딩 (불러오기 실패 시 None, 다시 시도하지 않음)
+_encodings: Dict[str, Optional[Any]] = {}
+_encodings_lock = threading.Lock()
+
+
+def _get_encoding(name: str) -> Optional[Any]:
+    if name not in _encodings:
+        with _encodings_lock:
+            if name not in _encodings:
+                try:
+                    import tiktoken
+
+                    _encodings[name] = tiktoken.get_encoding(name)
+                except ImportError:
+                    _encodings[name] = None
+                except Exception as e:
+                    print(f"⚠️  tiktoken 인코딩({name}) 로드 실패, 토큰 수 근사치 사용: {e}")
+                    _encodings[name] = None
+    return _encodings[name]
+
+
+def approximate_tokens(text: str) -> int:
+    """토큰 수 근사치: ASCII 4자당 1토큰, 한글 등은 1자당 1토큰"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def count_tokens(text: str, encoding_name: str = "o200k_base") -> int:
+    """
+    텍스트 토큰 수
+
+    Args:
+        text: 텍스트
+        encoding_name: tiktoken 인코딩 (채팅 모델: o200k_base, text-embedding-3: cl100k_base)
+    """
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return approximate_tokens(text)
+    return len(encoding.encode(text))
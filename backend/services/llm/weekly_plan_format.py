@@ -0,0 +1,260 @@
+"""
+구조화 주간 계획 유틸리티
+LLM2가 JSON으로 생성한 요일별 계획의 파싱, 마크다운 렌더링, 부분 수정(patch) 기능 제공
+(스트리밍 중에는 PlanStreamRenderer가 완성된 요일부터 마크다운으로 변환하므로 JSON 원문은 클라이언트에 보내지 않음)
+
+plan_data 저장 형태:
+    {
+        "format": "structured",
+        "weekly_goal": str, "weekly_summary": str, "tips": [str],
+        "days": [DayPlan, ...],          # 요일별 구조화 데이터
+        "content": str,                   # days로부터 렌더링한 마크다운 (프론트엔드 표시용)
+        "revision": int,                  # 부분 수정 횟수
+        "record_id": int, "thread_id": str
+    }
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from schemas.llm import DayPlan, StructuredWeeklyPlan
+
+WEEKDAYS = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+
+_WEEKDAY_PATTERN = re.compile(r"([월화수목금토일])요일")
+_DAYS_ARRAY_PATTERN = re.compile(r'"days"\s*:\s*\[')
+_STRING_FIELD_PATTERN = r'"{}"\s*:\s*("(?:[^"\\]|\\.)*")'
+
+
+def parse_structured_plan(text: str) -> Optional[StructuredWeeklyPlan]:
+    """
+    LLM 응답에서 구조화 주간 계획 JSON 추출
+
+    코드 블록(```json ... ```)이나 앞뒤 설명이 섞여 있어도 첫 '{'부터 마지막 '}'까지를 파싱합니다.
+
+    Returns:
+        StructuredWeeklyPlan 또는 None (JSON이 아니거나 요일 계획이 없음)
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        plan = StructuredWeeklyPlan.model_validate(json.loads(text[start:end + 1]))
+    except (json.JSONDecodeError, ValidationError):
+        return None
+    return plan if plan.days else None
+
+
+def parse_day_patch(text: str) -> Optional[Dict[str, Any]]:
+    """
+    부분 수정 응답 파싱: {"days": [DayPlan, ...], "summary": str}
+
+    Returns:
+        {"days": List[DayPlan], "summary": str} 또는 None
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+        days = [DayPlan.model_validate(day) for day in data.get("days", [])]
+    except (json.JSONDecodeError, ValidationError, AttributeError):
+        return None
+    return {"days": days, "summary": str(data.get("summary") or "")}
+
+
+def detect_days(message: str) -> List[str]:
+    """사용자 요청에서 언급된 요일 추출 (평일/주말 포함, 언급이 없으면 빈 리스트)"""
+    days = {f"{m}요일" for m in _WEEKDAY_PATTERN.findall(message)}
+    if "평일" in message:
+        days.update(WEEKDAYS[:5])
+    if "주말" in message:
+        days.update(WEEKDAYS[5:])
+    return [d for d in WEEKDAYS if d in days]
+
+
+def _render_exercise(ex: Dict[str, Any]) -> str:
+    line = f"- {ex['name']} ({ex['category']}"
+    if ex.get("target_muscle"):
+        line += f", {ex['target_muscle']}"
+    line += ")"
+    volume = []
+    if ex.get("sets"):
+        volume.append(f"{ex['sets']}세트")
+    if ex.get("reps"):
+        volume.append(f"{ex['reps']}")
+    if volume:
+        line += " " + " × ".join(volume)
+    if ex.get("rest_seconds"):
+        line += f", 휴식 {ex['rest_seconds']}초"
+    if ex.get("notes"):
+        line += f" — {ex['notes']}"
+    return line
+
+
+def _render_meal(meal: Dict[str, Any]) -> str:
+    line = f"- {meal['meal_type']}: {', '.join(meal.get('foods') or [])}"
+    nutrition = []
+    if meal.get("calories"):
+        nutrition.append(f"{meal['calories']}kcal")
+    for key, label in (("protein_g", "단백질"), ("carbs_g", "탄수화물"), ("fat_g", "지방")):
+        if meal.get(key):
+            nutrition.append(f"{label} {meal[key]:g}g")
+    if nutrition:
+        line += f" ({', '.join(nutrition)})"
+    if meal.get("notes"):
+        line += f" — {meal['notes']}"
+    return line
+
+
+def _render_header(plan_data: Dict[str, Any]) -> List[str]:
+    parts = []
+    if plan_data.get("weekly_goal"):
+        parts.append(f"## 주간 목표\n{plan_data['weekly_goal']}")
+    if plan_data.get("weekly_summary"):
+        parts.append(plan_data["weekly_summary"])
+    return parts
+
+
+def render_day_markdown(day: Dict[str, Any]) -> str:
+    """하루 계획 마크다운"""
+    lines = [f"## {day['day_of_week']}"]
+    if day.get("exercises"):
+        lines.append("**운동**")
+        lines.extend(_render_exercise(ex) for ex in day["exercises"])
+    if day.get("meals"):
+        lines.append("**식단**" + (f" (총 {day['total_calories']}kcal)" if day.get("total_calories") else ""))
+        lines.extend(_render_meal(meal) for meal in day["meals"])
+    if day.get("notes"):
+        lines.append(f"> {day['notes']}")
+    return "\n".join(lines)
+
+
+def render_plan_markdown(plan_data: Dict[str, Any]) -> str:
+    """구조화 plan_data를 프론트엔드 표시용 마크다운으로 렌더링"""
+    parts = _render_header(plan_data)
+    parts.extend(render_day_markdown(day) for day in plan_data.get("days", []))
+
+    if plan_data.get("tips"):
+        parts.append("## 생활 습관 팁\n" + "\n".join(f"- {tip}" for tip in plan_data["tips"]))
+    return "\n\n".join(parts)
+
+
+def render_plan_text(plan_text: str) -> str:
+    """LLM 원문 → 표시용 마크다운 (구조화 JSON이 아니면 원문 그대로)"""
+    plan = parse_structured_plan(plan_text)
+    return render_plan_markdown(plan.model_dump(exclude_none=True)) if plan else plan_text
+
+
+class PlanStreamRenderer:
+    """
+    스트리밍 중인 주간 계획 JSON → 표시용 마크다운 조각
+
+    토큰을 받을 때마다 "days" 배열에서 새로 완성된 요일 객체를 찾아 마크다운으로 변환합니다.
+    (주간 목표/요약은 첫 요일 앞에 한 번 출력, 팁은 done 이벤트의 content에만 포함)
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: Optional[int] = None  # days 배열 안에서 다음에 검사할 위치
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = 0
+        self._finished = False
+
+    def _header(self, end: int) -> List[str]:
+        fields = {}
+        for key in ("weekly_goal", "weekly_summary"):
+            match = re.search(_STRING_FIELD_PATTERN.format(key), self._buffer[:end])
+            if match:
+                try:
+                    fields[key] = json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    pass
+        return _render_header(fields)
+
+    def feed(self, token: str) -> List[str]:
+        """토큰 추가 후 새로 완성된 마크다운 조각 목록 반환 (각 조각 끝에 빈 줄 포함)"""
+        if self._finished:
+            return []
+        self._buffer += token
+        parts: List[str] = []
+        if self._pos is None:
+            match = _DAYS_ARRAY_PATTERN.search(self._buffer)
+            if not match:
+                return []
+            parts.extend(self._header(match.start()))
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._object_start = self._pos - 1
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        day = DayPlan.model_validate(json.loads(buffer[self._object_start:self._pos]))
+                    except (json.JSONDecodeError, ValidationError):
+                        continue
+                    parts.append(render_day_markdown(day.model_dump(exclude_none=True)))
+            elif ch == "]" and self._depth == 0:
+                self._finished = True
+                break
+        return [f"{part}\n\n" for part in parts]
+
+
+def build_plan_data(plan: StructuredWeeklyPlan) -> Dict[str, Any]:
+    """StructuredWeeklyPlan → 저장용 plan_data (content 렌더링 포함)"""
+    plan_data = plan.model_dump(exclude_none=True)
+    plan_data["format"] = "structured"
+    plan_data["revision"] = 0
+    plan_data["content"] = render_plan_markdown(plan_data)
+    return plan_data
+
+
+def is_structured(plan_data: Optional[Dict[str, Any]]) -> bool:
+    return bool(plan_data) and plan_data.get("format") == "structured" and bool(plan_data.get("days"))
+
+
+def select_days(plan_data: Dict[str, Any], day_names: List[str]) -> List[Dict[str, Any]]:
+    """plan_data에서 지정한 요일만 추출 (day_names가 비어 있으면 전체)"""
+    days = plan_data.get("days", [])
+    if not day_names:
+        return days
+    return [day for day in days if day["day_of_week"] in day_names]
+
+
+def apply_day_patch(plan_data: Dict[str, Any], patched_days: List[DayPlan]) -> Dict[str, Any]:
+    """
+    재생성된 요일만 교체한 새 plan_data 반환 (원본은 변경하지 않음)
+
+    JSONB 컬럼 변경 감지를 위해 항상 새 dict를 만들어 반환합니다.
+    """
+    replacements = {day.day_of_week: day.model_dump(exclude_none=True) for day in patched_days}
+    days = [replacements.pop(day["day_of_week"], day) for day in plan_data.get("days", [])]
+    # 기존 계획에 없던 요일(예: 휴식일에 운동 추가)은 요일 순서대로 삽입
+    days.extend(replacements.values())
+    order = {name: i for i, name in enumerate(WEEKDAYS)}
+    days.sort(key=lambda day: order.get(day["day_of_week"], len(WEEKDAYS)))
+
+    new_plan_data = {**plan_data, "days": days, "revision": plan_data.get("revision", 0) + 1}
+    new_plan_data["content"] = render_plan_markdown(new_plan_data)
+    return new_plan_data
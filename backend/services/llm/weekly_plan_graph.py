@@ -1,7 +1,8 @@
-from typing import TypedDict, Annotated
+from typing import TypedDict, Annotated, Optional, Dict, Any
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.config import get_config
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,14 @@ from services.llm.llm_clients import create_llm_client
 from schemas.llm import GoalPlanInput
 from schemas.inbody import InBodyData as InBodyMeasurements
 from services.llm.prompt_generator import create_weekly_plan_prompt
+from services.llm.streaming import stream_tokens
+from services.llm.checkpointer import get_checkpointer
+from services.llm.history_manager import ConversationHistoryManager
+from services.llm.speculation import MenuItem, SpeculativeAnswerCache, make_menu_answer_generator, replay_text
+from services.llm import weekly_plan_format
+
+# 계획을 수정하는 Q&A 답변에 붙이는 메시지 이름 (가장 최근 수정본은 항상 원문 유지)
+PLAN_REVISION_NAME = "plan_revision"
 
 
 # --- 1. 상태 정의 ---
@@ -17,14 +26,54 @@ class PlanState(TypedDict):
     """LLM2 (주간 계획 / Q&A) 에이전트의 상태"""
     plan_input: GoalPlanInput
     messages: Annotated[list, add_messages]
+    # 오래된 Q&A 턴 요약 {"text": 요약, "upto": 요약된 메시지 인덱스 끝}
+    history_summary: Optional[Dict[str, Any]]
+    # 최초 계획 LLM 원문 (요일별 JSON, 저장용), 대화 기록에는 렌더링한 마크다운을 남김
+    plan_text: Optional[str]
+
+
+# --- Q&A 노드 시스템 프롬프트 (메뉴 답변 선계산에서도 사용) ---
+QA_EXERCISE_GUIDE_PROMPT = """당신은 전문 트레이너입니다. 
+        사용자가 특정 운동 동작에 대해 질문했습니다. 
+        해당 운동의 올바른 자세, 자극 부위, 호흡법, 그리고 주의사항을 초보자도 이해하기 쉽게 구체적으로 설명해주세요."""
+
+QA_PLAN_ADJUSTMENT_PROMPT = """당신은 전문 트레이너입니다. 
+        사용자가 운동 플랜(일정, 종목, 분할 방식 등)의 조정을 요청했습니다. 
+        사용자가 요청 사항을 반영하여 수정된 구체적인 운동 계획을 제시해주세요. 
+        수정된 이유도 함께 설명하면 좋습니다."""
+
+QA_DIET_ADJUSTMENT_PROMPT = """당신은 영양 전문가입니다. 
+        사용자가 식단 계획의 조정을 요청했습니다. 
+        사용자의 기호, 알레르기, 또는 상황(외식, 편의점 등)을 고려하여 대체 식단이나 수정된 메뉴를 제안해주세요. 
+        칼로리와 영양 밸런스를 고려하여 조언해주세요."""
+
+QA_INTENSITY_ADJUSTMENT_PROMPT = """당신은 전문 트레이너입니다. 
+        사용자가 운동 강도(무게, 횟수, 세트, 휴식 시간 등)의 조정을 요청했습니다. 
+        사용자가 느끼는 난이도에 맞춰 강도를 높이거나 낮추는 구체적인 가이드를 제공해주세요. 
+        부상 방지를 위한 조언도 포함해주세요."""
+
+# 번호 메뉴 (클릭 가능성이 높은 순서, 앞에서부터 SPECULATIVE_QA_MAX_ANSWERS개 선계산)
+PLAN_MENU = [
+    MenuItem(key="1", category="운동 가이드", system_prompt=QA_EXERCISE_GUIDE_PROMPT, question="이번 주 계획에 있는 운동들의 올바른 방법을 알려주세요."),
+    MenuItem(key="2", category="플랜 조정", system_prompt=QA_PLAN_ADJUSTMENT_PROMPT, question="운동 플랜을 조정하고 싶어요."),
+    MenuItem(key="3", category="식단 조정", system_prompt=QA_DIET_ADJUSTMENT_PROMPT, question="식단을 조정하고 싶어요."),
+    MenuItem(key="4", category="강도 조정", system_prompt=QA_INTENSITY_ADJUSTMENT_PROMPT, question="운동 강도를 조정하고 싶어요."),
+]
 
 
 # --- 3. 그래프 생성 ---
 def create_weekly_plan_agent(llm_client):
     """주간 계획 생성 에이전트 그래프 생성"""
-    
+
+    # 측정값 프롬프트와 최초 계획, 가장 최근 수정 계획은 항상 원문 유지
+    history_manager = ConversationHistoryManager(
+        llm_client, pinned_prefix=2, pinned_names=[PLAN_REVISION_NAME]
+    )
+    # 메뉴 답변 선계산 (SPECULATIVE_QA=on 일 때만 동작)
+    speculator = SpeculativeAnswerCache(PLAN_MENU)
+
     # --- 2. 노드 정의 ---
-    def generate_initial_plan(state: PlanState) -> dict:
+    async def generate_initial_plan(state: PlanState) -> dict:
         """Node 1: 주간 계획 초안 생성"""
         print("--- LLM2: 주간 계획 생성 ---")
         plan_input = state["plan_input"]
@@ -38,71 +87,93 @@ def create_weekly_plan_agent(llm_client):
             measurements=measurements
         )
 
-        # LLM 호출
-        response = llm_client.generate_chat(system_prompt, user_prompt)
+        # LLM 호출 (JSON 원문 대신 완성된 요일부터 마크다운으로 스트리밍)
+        renderer = weekly_plan_format.PlanStreamRenderer()
+        response = await stream_tokens(llm_client.astream_chat(system_prompt, user_prompt), transform=renderer.feed)
+        plan_markdown = weekly_plan_format.render_plan_text(response)
+
+        # 사용자가 누를 가능성이 높은 메뉴 답변을 백그라운드에서 미리 생성
+        base_messages = [HumanMessage(content=user_prompt), AIMessage(content=plan_markdown)]
+        thread_id = get_config().get("configurable", {}).get("thread_id")
+        speculator.start(
+            thread_id,
+            len(base_messages),
+            make_menu_answer_generator(llm_client, history_manager, base_messages, thread_id)
+        )
 
-        # 결과 반환 (대화 기록에 추가)
-        return {"messages": [("human", user_prompt), ("ai", response)]}
+        # 결과 반환 (대화 기록에는 마크다운, 원문은 저장용으로 별도 보관)
+        return {"messages": [("human", user_prompt), ("ai", plan_markdown)], "plan_text": response}
 
-    def _generate_qa_response(state: PlanState, category_name: str, system_prompt: str) -> dict:
-        """공통 Q&A 답변 생성 로직"""
+    async def _generate_qa_response(
+        state: PlanState,
+        category_name: str,
+        system_prompt: str,
+        revises_plan: bool = False
+    ) -> dict:
+        """공통 Q&A 답변 생성 로직 (revises_plan=True면 답변을 최신 계획으로 고정)"""
         print(f"--- LLM2: 주간 계획 Q&A ({category_name}) ---")
 
-        # 대화 기록 변환
-        history = []
-        for msg in state["messages"]:
-            role = "user" if msg.type == "human" else "assistant"
-            history.append((role, msg.content))
+        thread_id = get_config().get("configurable", {}).get("thread_id")
+        state_summary = state.get("history_summary")
+        summary_update = None
 
-        # LLM 호출 (히스토리 포함)
-        response = llm_client.generate_chat_with_history(
-            system_prompt=system_prompt,
-            messages=history
+        # 메뉴만 눌렀다면 미리 생성해 둔 답변 사용 (자유 질문이면 남은 선계산 취소)
+        precomputed = await speculator.take(
+            thread_id, state["messages"][-1].content, len(state["messages"]) - 1
+        )
+        if precomputed is not None:
+            response = await stream_tokens(replay_text(precomputed))
+        else:
+            # 토큰 예산에 맞춰 대화 기록 구성 (오래된 턴은 요약으로 대체)
+            system_prompt, history, _, summary_update = history_manager.build(
+                system_prompt, state["messages"], thread_id, state_summary
+            )
+
+            # LLM 호출 (히스토리 포함)
+            response = await stream_tokens(llm_client.astream_chat_with_history(
+                system_prompt=system_prompt,
+                messages=history
+            ))
+
+        message = AIMessage(content=response, name=PLAN_REVISION_NAME if revises_plan else None)
+
+        # 다음 턴에 밀려날 기록은 응답 이후 백그라운드에서 미리 요약
+        history_manager.schedule_summary(
+            thread_id, state["messages"] + [message], summary_update or state_summary
         )
 
-        return {"messages": [("ai", response)]}
+        result = {"messages": [message]}
+        if summary_update:
+            result["history_summary"] = summary_update
+        return result
 
-    def qa_exercise_guide(state: PlanState) -> dict:
+    async def qa_exercise_guide(state: PlanState) -> dict:
         """Node 2-1: 운동 방법 가이드"""
-        system_prompt = """당신은 전문 트레이너입니다. 
-        사용자가 특정 운동 동작에 대해 질문했습니다. 
-        해당 운동의 올바른 자세, 자극 부위, 호흡법, 그리고 주의사항을 초보자도 이해하기 쉽게 구체적으로 설명해주세요."""
-        return _generate_qa_response(state, "운동 가이드", system_prompt)
+        return await _generate_qa_response(state, "운동 가이드", QA_EXERCISE_GUIDE_PROMPT)
 
-    def qa_plan_adjustment(state: PlanState) -> dict:
+    async def qa_plan_adjustment(state: PlanState) -> dict:
         """Node 2-2: 운동 플랜 조정"""
-        system_prompt = """당신은 전문 트레이너입니다. 
-        사용자가 운동 플랜(일정, 종목, 분할 방식 등)의 조정을 요청했습니다. 
-        사용자가 요청 사항을 반영하여 수정된 구체적인 운동 계획을 제시해주세요. 
-        수정된 이유도 함께 설명하면 좋습니다."""
-        return _generate_qa_response(state, "플랜 조정", system_prompt)
+        return await _generate_qa_response(state, "플랜 조정", QA_PLAN_ADJUSTMENT_PROMPT, revises_plan=True)
 
-    def qa_diet_adjustment(state: PlanState) -> dict:
+    async def qa_diet_adjustment(state: PlanState) -> dict:
         """Node 2-3: 식단 조정"""
-        system_prompt = """당신은 영양 전문가입니다. 
-        사용자가 식단 계획의 조정을 요청했습니다. 
-        사용자의 기호, 알레르기, 또는 상황(외식, 편의점 등)을 고려하여 대체 식단이나 수정된 메뉴를 제안해주세요. 
-        칼로리와 영양 밸런스를 고려하여 조언해주세요."""
-        return _generate_qa_response(state, "식단 조정", system_prompt)
+        return await _generate_qa_response(state, "식단 조정", QA_DIET_ADJUSTMENT_PROMPT, revises_plan=True)
 
-    def qa_intensity_adjustment(state: PlanState) -> dict:
+    async def qa_intensity_adjustment(state: PlanState) -> dict:
         """Node 2-4: 강도 조정"""
-        system_prompt = """당신은 전문 트레이너입니다. 
-        사용자가 운동 강도(무게, 횟수, 세트, 휴식 시간 등)의 조정을 요청했습니다. 
-        사용자가 느끼는 난이도에 맞춰 강도를 높이거나 낮추는 구체적인 가이드를 제공해주세요. 
-        부상 방지를 위한 조언도 포함해주세요."""
-        return _generate_qa_response(state, "강도 조정", system_prompt)
+        return await _generate_qa_response(state, "강도 조정", QA_INTENSITY_ADJUSTMENT_PROMPT, revises_plan=True)
 
-    def qa_general(state: PlanState) -> dict:
+    async def qa_general(state: PlanState) -> dict:
         """Node 2-5: 일반 Q&A"""
         system_prompt = """당신은 사용자의 주간 운동 및 식단 계획을 담당하는 퍼스널 트레이너입니다.
         사용자가 생성된 계획에 대해 질문하거나 수정을 요청하면, 전문적이고 친절하게 답변해주세요.
         이전 대화 맥락(사용자의 신체 정보, 목표, 생성된 계획)을 모두 고려해야 합니다."""
-        return _generate_qa_response(state, "일반", system_prompt)
+        return await _generate_qa_response(state, "일반", system_prompt)
 
     def finalize_plan(state: PlanState) -> dict:
         """Node 3: 계획 확정 및 저장"""
         print("--- LLM2: 계획 확정 ---")
+        speculator.cancel(get_config().get("configurable", {}).get("thread_id"))
         return {"messages": [("ai", "네, 현재 계획으로 확정하여 저장하겠습니다. 일주일 동안 화이팅하세요!")]}
 
     def route_qa(state: PlanState) -> str:
@@ -165,7 +236,8 @@ def create_weekly_plan_agent(llm_client):
     # 확정 후 종료
     workflow.add_edge("finalize_plan", END)
 
-    memory = MemorySaver()
+    # 분석 에이전트와 같은 영속 체크포인터 공유 (스레드 ID 접두사로 구분)
+    memory = get_checkpointer()
     
     # 각 단계 후 중단하여 사용자 피드백 대기
     return workflow.compile(
@@ -5,28 +5,44 @@ LLM2를 사용하여 주간 계획을 생성하고 관리
 from sqlalchemy.orm import Session
 from datetime import date, timedelta
 import json
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, AsyncIterator, Optional
 
 from services.llm.llm_service import LLMService
 from services.common.health_service import HealthService
+from services.common.single_flight import SingleFlight
+from utils.dependencies import get_llm_service
 from repositories.llm.weekly_plan_repository import WeeklyPlanRepository
+from repositories.llm.user_detail_repository import UserDetailRepository
+from repositories.common.health_record_repository import HealthRecordRepository
 from schemas.llm import WeeklyPlanCreate, GoalPlanRequest, GoalPlanInput
+from services.llm.prompt_generator import create_plan_patch_prompt
+from services.llm import weekly_plan_format
+from exceptions import WeeklyPlanNotFoundError, WeeklyPlanNotEditableError, WeeklyPlanGenerationError
 
-# 가장 최신 주간 계획이 있는지 없는지 확인
+# 주간 계획 재사용 규칙 (_find_fresh_plan)
+# - 가장 최신 주간 계획이 아직 끝나지 않았고 (today <= end_date)
+#   (계획은 다음 주 월요일부터 시작하므로 시작 전인 계획도 유효한 것으로 봄)
+# - 계획 생성 이후 새로운 인바디 측정값이 없고 (measured_at <= created_at)
+# - 생성 입력 해시(목표/선호/건강 특이사항/근거 기록)가 같으면
+# → LLM을 호출하지 않고 기존 주간 계획서 반환, 하나라도 다르면 새로 작성
 
-# 있다면 가장 최신 주간 계획 가져오기
-
-# 주간 계획이 현재 진행중인지 확인 (start_date <= today <= end_date)
-# 새로운 inbody 측정값이 있는지 확인 (start_date <= measured_at)
-
-# 하나라도 True면 새로운 주간 계획서 작성
-# 둘 다 False면 새로운 주간 계획서 작성하지 않음 & 기존 주간 계획서 반환
+# 같은 (user_id, record_id, "weekly_plan", 입력 해시) 생성 요청 병합 (더블 클릭/재시도 시 LLM 1회만 실행)
+# - 입력(목표/선호 등)이 바뀐 요청은 해시가 달라 병합되지 않음
+# - 워커 간: advisory lock을 얻은 뒤, 요청 시점 이후 같은 해시로 저장된 계획이 있으면 그 결과를 재사용
+# - force_regenerate 요청은 병합하지 않고 항상 새로 생성
+_plan_flight = SingleFlight("weekly_plan")
 
 
 class WeeklyPlanService:
-    def __init__(self):
-        self.llm_service = LLMService()
-        self.health_service = HealthService()
+    def __init__(self, llm_service: Optional[LLMService] = None):
+        self._llm_service = llm_service
+        self.health_service = HealthService(llm_service)
+
+    @property
+    def llm_service(self) -> LLMService:
+        """앱 전역 LLMService (첫 사용 시 생성, 에이전트/대화 스레드 공유)"""
+        return self._llm_service or get_llm_service()
 
     async def generate_plan(
         self,
@@ -38,6 +54,175 @@ class WeeklyPlanService:
         주간 계획 생성 (LLM 호출)
         """
         # 1. LLM 입력 데이터 준비 (HealthService 활용)
+        llm_input = self._prepare_plan_input(db, user_id, request_data)
+
+        # 입력이 바뀌지 않았다면 기존 계획 그대로 반환 (LLM 호출 없음)
+        input_hash = self._plan_input_hash(db, user_id, llm_input)
+        if request_data.force_regenerate:
+            plan_text = await self.llm_service.call_goal_plan_llm(llm_input)
+            return self._save_plan(
+                db, user_id, plan_text, record_id=request_data.record_id, input_hash=input_hash
+            )
+
+        fresh_plan = self._find_fresh_plan(db, user_id, input_hash)
+        if fresh_plan:
+            return fresh_plan
+        baseline_id = self._latest_plan_id(db, user_id, input_hash)
+
+        async def _generate():
+            # 락을 기다리는 동안 다른 워커가 같은 입력으로 저장했을 수 있으므로 다시 확인
+            concurrent_plan = self._find_concurrent_plan(db, user_id, input_hash, baseline_id)
+            if concurrent_plan:
+                return concurrent_plan
+
+            # 2. LLM 호출 (주간 계획 생성, 요일별 JSON 텍스트)
+            plan_text = await self.llm_service.call_goal_plan_llm(llm_input)
+
+            # 3. 데이터 저장
+            return self._save_plan(
+                db, user_id, plan_text, record_id=request_data.record_id, input_hash=input_hash
+            )
+
+        # 같은 입력으로 생성 중인 계획이 있으면 그 결과를 공유 (워커 간에는 advisory lock)
+        return await _plan_flight.run(
+            (user_id, request_data.record_id, "weekly_plan", input_hash), _generate
+        )
+
+    async def generate_plan_stream(
+        self,
+        db: Session,
+        user_id: int,
+        request_data: GoalPlanRequest
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        주간 계획 생성 (토큰 스트리밍 버전)
+
+        입력 준비(건강 기록 조회/권한 확인)는 즉시 수행하므로 ValueError는 스트림 시작 전에 발생합니다.
+
+        Returns:
+            AsyncIterator:
+                {"type": "token", "content": str}
+                {"type": "done", "plan": WeeklyPlan, "thread_id": str}
+        """
+        llm_input = self._prepare_plan_input(db, user_id, request_data)
+        record_id = request_data.record_id
+        input_hash = self._plan_input_hash(db, user_id, llm_input)
+        flight_key = (user_id, record_id, "weekly_plan", input_hash)
+        force = request_data.force_regenerate
+        fresh_plan = None if force else self._find_fresh_plan(db, user_id, input_hash)
+        baseline_id = self._latest_plan_id(db, user_id, input_hash)
+
+        async def _generate_events(flight=None) -> AsyncIterator[Dict[str, Any]]:
+            async for event in self.llm_service.stream_goal_plan_llm(llm_input):
+                if event["type"] == "token":
+                    yield event
+                    continue
+
+                new_plan = self._save_plan(
+                    db,
+                    user_id,
+                    event["plan_text"],
+                    record_id=record_id,
+                    thread_id=event["thread_id"],
+                    input_hash=input_hash
+                )
+                if flight:
+                    flight.set_result(new_plan)
+                yield self._plan_done_event(new_plan)
+
+        async def _events() -> AsyncIterator[Dict[str, Any]]:
+            # 강제 재생성은 진행 중인 생성과 병합하지 않음
+            if force:
+                async for event in _generate_events():
+                    yield event
+                return
+
+            # 입력이 바뀌지 않았다면 기존 계획으로 바로 완료 (LLM 호출 없음)
+            if fresh_plan:
+                yield self._plan_done_event(fresh_plan)
+                return
+
+            # 같은 입력의 생성이 진행 중이면 토큰 없이 완료 결과만 공유
+            shared = await _plan_flight.wait(flight_key)
+            if shared is not None:
+                yield self._plan_done_event(shared)
+                return
+
+            async with _plan_flight.lead(flight_key) as flight:
+                # 락을 기다리는 동안 다른 워커가 같은 입력으로 저장했을 수 있으므로 다시 확인
+                concurrent_plan = self._find_concurrent_plan(db, user_id, input_hash, baseline_id)
+                if concurrent_plan:
+                    flight.set_result(concurrent_plan)
+                    yield self._plan_done_event(concurrent_plan)
+                    return
+
+                async for event in _generate_events(flight):
+                    yield event
+
+        return _events()
+
+    @staticmethod
+    def _plan_done_event(plan) -> Dict[str, Any]:
+        return {"type": "done", "plan": plan, "thread_id": (plan.plan_data or {}).get("thread_id")}
+
+    def _plan_input_hash(self, db: Session, user_id: int, llm_input: GoalPlanInput) -> str:
+        """
+        주간 계획 생성 입력의 변경 감지 해시
+
+        목표 유형/설명, 활성 상세정보(선호도/건강 특이사항), 근거 건강 기록과 상태 분석, 모델 버전을 포함합니다.
+        """
+        details = UserDetailRepository.get_active_details(db, user_id)
+        payload = {
+            "goal_type": llm_input.user_goal_type,
+            "goal_description": llm_input.user_goal_description,
+            "details": sorted(
+                json.dumps([d.goal_type, d.goal_description, d.preferences, d.health_specifics], ensure_ascii=False)
+                for d in details
+            ),
+            "record_id": llm_input.record_id,
+            "status_analysis_id": llm_input.status_analysis_id,
+            "model_version": self.llm_service.model_version,
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _find_fresh_plan(db: Session, user_id: int, input_hash: str):
+        """재사용 가능한 최신 주간 계획 (재사용 규칙은 모듈 상단 주석 참고, 없으면 None)"""
+        latest_plan = WeeklyPlanRepository.get_latest(db, user_id)
+        if not latest_plan or latest_plan.input_hash != input_hash:
+            return None
+        if date.today() > latest_plan.end_date:
+            return None
+
+        latest_record = HealthRecordRepository.get_latest(db, user_id)
+        if latest_record and latest_plan.created_at and latest_record.measured_at > latest_plan.created_at:
+            return None
+
+        print(f"♻️  입력 변경 없음, 기존 주간 계획 재사용 (plan_id={latest_plan.id})")
+        return latest_plan
+
+    @staticmethod
+    def _latest_plan_id(db: Session, user_id: int, input_hash: str) -> int:
+        """요청 시점에 같은 입력 해시로 저장되어 있던 최신 계획 ID (없으면 0)"""
+        plan = WeeklyPlanRepository.get_latest_by_input_hash(db, user_id, input_hash)
+        return plan.id if plan else 0
+
+    @staticmethod
+    def _find_concurrent_plan(db: Session, user_id: int, input_hash: str, baseline_id: int):
+        """요청 이후 같은 입력 해시로 저장된 계획 (락을 먼저 잡은 동시 요청이 만든 결과, 없으면 None)"""
+        plan = WeeklyPlanRepository.get_latest_by_input_hash(db, user_id, input_hash)
+        if plan and plan.id > baseline_id:
+            return plan
+        return None
+
+    def _prepare_plan_input(
+        self,
+        db: Session,
+        user_id: int,
+        request_data: GoalPlanRequest
+    ) -> GoalPlanInput:
+        """LLM2 입력 데이터 준비 (건강 기록이 없거나 권한이 없으면 ValueError)"""
         # prepare_goal_plan은 Response 객체를 반환하므로 input_data만 추출
         prepared_response = self.health_service.prepare_goal_plan(
             db=db,
@@ -50,32 +235,94 @@ class WeeklyPlanService:
         if not prepared_response:
             raise ValueError("건강 기록을 찾을 수 없거나 권한이 없습니다.")
             
-        llm_input: GoalPlanInput = prepared_response.input_data
+        return prepared_response.input_data
 
-        # 2. LLM 호출 (주간 계획 생성)
-        # 현재 LLM은 텍스트(str)를 반환함. 추후 JSON 파싱 로직 고도화 필요.
-        plan_text = await self.llm_service.call_goal_plan_llm(llm_input)
-        
-        # 3. 데이터 저장
-        # LLM이 준 텍스트를 plan_data의 'content' 필드에 저장 (임시)
-        # 프론트엔드에서는 이 content를 마크다운으로 렌더링
+    def _save_plan(
+        self,
+        db: Session,
+        user_id: int,
+        plan_text: str,
+        record_id: Optional[int] = None,
+        thread_id: Optional[str] = None,
+        input_hash: Optional[str] = None
+    ):
+        """
+        LLM이 생성한 주간 계획 저장 (근거 건강 기록 ID와 대화 스레드 ID도 함께 보관)
+
+        요일별 JSON이면 구조화 데이터(days)와 렌더링한 마크다운(content)을 함께 저장하고,
+        JSON 파싱에 실패하면 기존처럼 텍스트를 content에 그대로 저장합니다.
+        프론트엔드에서는 content를 마크다운으로 렌더링
+        """
         today = date.today()
         next_monday = today + timedelta(days=(7 - today.weekday()))
-        
+
+        structured = weekly_plan_format.parse_structured_plan(plan_text)
+        if structured:
+            plan_data = weekly_plan_format.build_plan_data(structured)
+        else:
+            print("⚠️  주간 계획 JSON 파싱 실패, 텍스트로 저장")
+            plan_data = {"content": plan_text}
+        plan_data.update(record_id=record_id, thread_id=thread_id)
+
         plan_create = WeeklyPlanCreate(
             week_number=1, # 로직에 따라 계산 필요
             start_date=next_monday,
             end_date=next_monday + timedelta(days=6),
-            plan_data={
-                "content": plan_text,
-                "raw_response": plan_text
-            },
-            model_version=self.llm_service.model_version
+            plan_data=plan_data,
+            model_version=self.llm_service.model_version,
+            input_hash=input_hash
         )
         
         new_plan = WeeklyPlanRepository.create(db, user_id, plan_create)
         return new_plan
 
+    async def edit_plan(
+        self,
+        db: Session,
+        plan_id: int,
+        message: str
+    ) -> Dict[str, Any]:
+        """
+        주간 계획 부분 수정 (요일 단위 재생성)
+
+        요청에 언급된 요일(없으면 전체 요일)의 현재 계획만 LLM에 보내고,
+        LLM이 돌려준 변경 요일만 plan_data에 반영합니다. 전체 계획을 다시 생성하지 않으므로
+        출력 토큰이 변경된 요일 분량으로 줄어듭니다.
+
+        Returns:
+            {"plan": WeeklyPlan, "updated_days": List[str], "summary": str}
+
+        Raises:
+            WeeklyPlanNotFoundError: 계획이 없음
+            WeeklyPlanNotEditableError: 구조화되지 않은(텍스트) 계획
+            WeeklyPlanGenerationError: LLM 응답 파싱 실패
+        """
+        plan = WeeklyPlanRepository.get_by_id(db, plan_id)
+        if not plan:
+            raise WeeklyPlanNotFoundError("주간 계획을 찾을 수 없습니다.")
+        if not weekly_plan_format.is_structured(plan.plan_data):
+            raise WeeklyPlanNotEditableError("요일별 구조화 데이터가 없는 계획은 부분 수정할 수 없습니다.")
+
+        target_days = weekly_plan_format.select_days(
+            plan.plan_data, weekly_plan_format.detect_days(message)
+        )
+        system_prompt, user_prompt = create_plan_patch_prompt(
+            json.dumps(target_days, ensure_ascii=False), message
+        )
+        response = await self.llm_service.llm_client.agenerate_chat(system_prompt, user_prompt)
+
+        patch = weekly_plan_format.parse_day_patch(response)
+        if patch is None:
+            raise WeeklyPlanGenerationError("주간 계획 수정 결과를 해석할 수 없습니다.")
+
+        updated_days = [day.day_of_week for day in patch["days"]]
+        if updated_days:
+            plan_data = weekly_plan_format.apply_day_patch(plan.plan_data, patch["days"])
+            plan = WeeklyPlanRepository.update(db, plan_id, plan_data=plan_data)
+            print(f"✏️  주간 계획 부분 수정 (plan_id={plan_id}, 요일: {', '.join(updated_days)})")
+
+        return {"plan": plan, "updated_days": updated_days, "summary": patch["summary"]}
+
     async def chat_with_plan(
         self,
         plan_id: int, # DB 조회용 (스레드 ID 매핑 필요 시)
@@ -87,4 +334,15 @@ class WeeklyPlanService:
         """
         # LangGraph 상태 유지를 위해 thread_id 사용
         response = await self.llm_service.chat_with_plan(thread_id, message)
-        return response
\ No newline at end of file
+        return response
+
+    def chat_with_plan_stream(
+        self,
+        plan_id: int,
+        thread_id: str,
+        message: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        주간 계획 질의응답 (토큰 스트리밍 버전)
+        """
+        return self.llm_service.stream_chat_with_plan(thread_id, message)
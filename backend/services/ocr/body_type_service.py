@@ -11,21 +11,46 @@ import os
 # backend/services/ocr/ → backend/ → ExplainMyBody/ → src/rule_based_bodytype
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../../src/rule_based_bodytype"))
 
-from typing import Dict, Any, Optional
+import math
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 from schemas.body_type import BodyTypeAnalysisInput, BodyTypeAnalysisOutput
 
+# 분석기가 예외/잘못된 값에 대해 돌려주는 대체 분류 (캐시하지 않음)
+UNKNOWN_BODY_TYPE = "알 수 없음"
+
 
 class BodyTypeService:
     """체형 분류 서비스"""
     
-    def __init__(self):
-        """체형 분석기 초기화"""
+    def __init__(self, cache_size: int = 256):
+        """
+        체형 분석기 초기화
+
+        Args:
+            cache_size: 분석 결과 LRU 캐시 최대 항목 수 (0이면 캐시 비활성화)
+        """
         try:
             from body_analysis.pipeline import BodyCompositionAnalyzer
+            from body_analysis import constants
             self.analyzer = BodyCompositionAnalyzer(margin=0.10)
+            self.constants = constants
         except Exception as e:
             print(f"⚠️  체형 분석기 초기화 실패: {e}")
             self.analyzer = None
+            self.constants = None
+
+        # 분석 결과 LRU 캐시
+        # 키는 원본 float가 아니라 임계값 구간 인덱스 + 부위별 등급이므로
+        # 분류 결과에 영향이 없는 값 차이는 같은 항목을 공유합니다.
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, BodyTypeAnalysisOutput]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._constants_version: Optional[int] = None
     
     def classify_body_type(self, input_data: BodyTypeAnalysisInput) -> Optional[str]:
         """
@@ -102,12 +127,171 @@ class BodyTypeService:
         
         try:
             user_data = self._convert_to_analyzer_format(input_data)
+
+            cache_key = self._make_cache_key(user_data) if self.cache_size > 0 else None
+            if cache_key is not None:
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return cached.model_copy()
+
             result = self.analyzer.analyze_full_pipeline(user_data)
             
             if result and "stage2" in result and "stage3" in result:
-                return BodyTypeAnalysisOutput(**result)
+                output = BodyTypeAnalysisOutput(**result)
+                # 대체 분류는 일시적 오류일 수 있으므로 캐시하지 않음
+                if UNKNOWN_BODY_TYPE in (output.stage2, output.stage3):
+                    return output
+                if cache_key is not None:
+                    self._cache_put(cache_key, output)
+                return output.model_copy() if cache_key is not None else output
             
             return None
         except Exception as e:
             print(f"⚠️  체형 분석 중 오류 발생: {e}")
             return None
+
+    # =====================================================
+    # 분석 결과 캐시
+    # =====================================================
+
+    def cache_info(self) -> Dict[str, Any]:
+        """
+        분석 결과 캐시 통계 반환
+
+        Returns:
+            {"hits", "misses", "hit_rate", "size", "maxsize", "constants_version"}
+        """
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": (self._cache_hits / total) if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self.cache_size,
+                "constants_version": self._constants_version,
+            }
+
+    def cache_clear(self) -> None:
+        """분석 결과 캐시 및 통계 초기화"""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_hits = 0
+            self._cache_misses = 0
+
+    def _cache_get(self, key: Tuple) -> Optional[BodyTypeAnalysisOutput]:
+        """캐시 조회 (적중 시 LRU 순서 갱신)"""
+        with self._cache_lock:
+            self._check_constants_version()
+            cached = self._cache.get(key)
+            if cached is None:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+            return cached
+
+    def _cache_put(self, key: Tuple, value: BodyTypeAnalysisOutput) -> None:
+        """캐시 저장 (최대 크기 초과 시 가장 오래된 항목 제거)"""
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _check_constants_version(self) -> None:
+        """
+        임계값 상수가 바뀌었으면 캐시 무효화
+
+        constants.py의 임계값은 런타임에 수정될 수 있으므로 (테스트, 핫 리로드 등)
+        조회할 때마다 상수 지문(fingerprint)을 비교합니다. 호출자가 lock을 잡고 있어야 합니다.
+        """
+        version = self._constants_fingerprint()
+        if version != self._constants_version:
+            if self._constants_version is not None:
+                print("🔄 체형 분류 임계값 변경 감지, 분석 캐시 초기화")
+            self._cache.clear()
+            self._constants_version = version
+
+    def _constants_fingerprint(self) -> int:
+        """분류 결과에 영향을 주는 상수 값들의 해시"""
+        c = self.constants
+        return hash((
+            self._bmi_thresholds(),
+            self._fat_thresholds(),
+            self._muscle_ratio_thresholds(),
+            self.analyzer.margin,
+            c.BodyPartLevel.ABOVE, c.BodyPartLevel.NORMAL, c.BodyPartLevel.BELOW,
+        ))
+
+    def _bmi_thresholds(self) -> Tuple[float, ...]:
+        t = self.constants.BMIThreshold
+        return (t.UNDERWEIGHT, t.NORMAL, t.OVERWEIGHT, t.OBESE_1, t.OBESE_2)
+
+    def _fat_thresholds(self) -> Tuple[float, ...]:
+        t = self.constants.BodyFatThreshold
+        return (t.LOW, t.NORMAL, t.OVERWEIGHT)
+
+    def _muscle_ratio_thresholds(self) -> Tuple[float, ...]:
+        # MuscleClassifier는 ratio >= 임계값 으로 비교하므로 오름차순으로 정렬
+        t = self.constants.MuscleRatioThreshold
+        return (t.NORMAL, t.SUFFICIENT, t.HIGH, t.VERY_HIGH)
+
+    @staticmethod
+    def _grades_key(grades: Any) -> Any:
+        """부위별 등급 dict를 해시 가능한 튜플로 변환 (fat_seg 없음 등은 그대로)"""
+        if isinstance(grades, dict):
+            return tuple(sorted(grades.items()))
+        return grades
+
+    def _make_cache_key(self, user_data: Dict[str, Any]) -> Optional[Tuple]:
+        """
+        분류에 영향을 주는 값만 추려낸 캐시 키 생성
+
+        - BMI / 체지방률 / 골격근량 비율: 임계값 구간 인덱스
+          (metrics.py의 분류기와 같은 경계 비교: value < threshold → 하위 구간)
+        - 부위별 근육/지방: 분석기와 동일한 정규화를 거친 등급
+
+        키를 만들 수 없는 입력이면 None (캐시 우회)
+        NaN/inf는 어느 구간 비교에도 걸리지 않아 정상 값과 같은 키가 되므로 캐시하지 않습니다.
+        """
+        from body_analysis.segmental import DataNormalizer
+
+        try:
+            weight = float(user_data["weight_kg"])
+            fat_rate = float(user_data["fat_rate"])
+            smm = float(user_data["smm"])
+            bmi = float(user_data["bmi"])
+            if weight <= 0:
+                return None
+            segment_values = [
+                value
+                for seg in (user_data["muscle_seg"], user_data["fat_seg"])
+                if isinstance(seg, dict)
+                for value in seg.values()
+                if isinstance(value, (int, float))
+            ]
+            if not all(math.isfinite(v) for v in (weight, fat_rate, smm, bmi, *segment_values)):
+                return None
+
+            bmi_bucket = bisect_right(self._bmi_thresholds(), bmi)
+            fat_bucket = bisect_right(self._fat_thresholds(), fat_rate)
+            muscle_bucket = bisect_right(self._muscle_ratio_thresholds(), smm / weight)
+
+            margin = self.analyzer.margin
+            muscle_grades = DataNormalizer.normalize_muscle_segment(
+                user_data["muscle_seg"], smm, margin
+            )
+            fat_grades = DataNormalizer.normalize_fat_segment(
+                user_data["fat_seg"], weight * fat_rate / 100.0, margin
+            )
+
+            return (
+                bmi_bucket,
+                fat_bucket,
+                muscle_bucket,
+                self._grades_key(muscle_grades),
+                self._grades_key(fat_grades),
+            )
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
@@ -0,0 +1,169 @@
+"""
+분석 리포트 조회 시 임베딩 컬럼(행당 약 20KB) 로드 여부 검증
+
+- 조회 SQL의 SELECT 목록에 embedding_1536/embedding_1024가 없어야 함
+- 응답 변환(AnalysisReportResponse) 과정에서 deferred 컬럼 lazy load가 일어나지 않아야 함
+- include_embeddings=True일 때만 같은 쿼리에서 임베딩을 함께 로드
+
+쿼리 수를 세는 테스트는 pgvector가 설치된 PostgreSQL이 필요합니다 (TEST_DATABASE_URL).
+모든 작업은 트랜잭션 안에서 수행하고 롤백합니다.
+"""
+
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import User, HealthRecord, InbodyAnalysisReport
+from repositories.llm.analysis_report_repository import AnalysisReportRepository
+from schemas.llm import AnalysisReportResponse
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+EMBEDDING_COLUMNS = ("embedding_1536", "embedding_1024")
+
+requires_db = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL이 설정되지 않음 (pgvector가 설치된 PostgreSQL 필요)",
+)
+
+
+def _select_list(statement: str) -> str:
+    # SQLAlchemy는 최상위 FROM을 줄 맨 앞에 출력함 (CASE 안의 IS DISTINCT FROM 등과 구분)
+    return statement.split("\nFROM ", 1)[0]
+
+
+def _has_embedding_column(statement: str) -> bool:
+    select_list = _select_list(statement)
+    return any(column in select_list for column in EMBEDDING_COLUMNS)
+
+
+# ============================================================
+# SQL 컴파일 (DB 불필요)
+# ============================================================
+
+@pytest.mark.parametrize("view", ["metadata", "summary", "full"])
+def test_report_query_does_not_select_embeddings(view):
+    query = AnalysisReportRepository._query(Session(), view)
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert not _has_embedding_column(sql)
+
+
+def test_summary_query_does_not_select_full_text_unconditionally():
+    query = AnalysisReportRepository._query(Session(), "summary")
+    select_list = _select_list(str(query.statement.compile(dialect=postgresql.dialect())))
+    # 전문은 섹션 색인이 없는 리포트에만 CASE 안에서 함께 조회 (그 외 위치에서는 선택하지 않음)
+    assert "CASE WHEN" in select_list
+    assert select_list.count("inbody_analysis_reports.llm_output") == 1
+    assert select_list.index("CASE WHEN") < select_list.index("inbody_analysis_reports.llm_output")
+
+
+# ============================================================
+# 쿼리 수 / SELECT 목록 (PostgreSQL)
+# ============================================================
+
+@pytest.fixture
+def db():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.commit()
+        transaction = conn.begin()
+        Base.metadata.create_all(conn)
+        session = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            session.close()
+            transaction.rollback()
+    engine.dispose()
+
+
+@pytest.fixture
+def report(db):
+    user = User(username="loading-test", email="loading-test@example.com")
+    db.add(user)
+    db.flush()
+    record = HealthRecord(user_id=user.id, measurements={"체중": 70.0})
+    db.add(record)
+    db.flush()
+    report = InbodyAnalysisReport(
+        user_id=user.id,
+        record_id=record.id,
+        llm_output="### [종합 체형 평가]\n표준 체형입니다.",
+        embedding_1536=[0.1] * 1536,
+        embedding_1024=[0.1] * 1024,
+        embedding_status="ready",
+    )
+    db.add(report)
+    db.flush()
+    # 생성 시 넣은 임베딩이 identity map에서 재사용되지 않도록 분리
+    db.expunge_all()
+    return report
+
+
+@contextmanager
+def record_statements(db: Session):
+    """이 세션 연결에서 실행된 SQL 문 수집"""
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@requires_db
+def test_get_by_id_loads_report_in_one_query_without_embeddings(db, report):
+    with record_statements(db) as statements:
+        loaded = AnalysisReportRepository.get_by_id(db, report.id)
+        response = AnalysisReportResponse.model_validate(loaded)
+
+    assert len(statements) == 1
+    assert not _has_embedding_column(statements[0])
+    assert response.embedding_1536 is None
+    assert response.embedding_1024 is None
+
+
+@requires_db
+def test_get_by_id_include_embeddings_loads_vectors_in_same_query(db, report):
+    with record_statements(db) as statements:
+        loaded = AnalysisReportRepository.get_by_id(db, report.id, include_embeddings=True)
+        response = AnalysisReportResponse.model_validate(loaded)
+
+    assert len(statements) == 1
+    assert _has_embedding_column(statements[0])
+    assert len(response.embedding_1536) == 1536
+    assert len(response.embedding_1024) == 1024
+
+
+@requires_db
+@pytest.mark.parametrize("view", ["metadata", "summary", "full"])
+def test_get_by_user_loads_reports_in_one_query_without_embeddings(db, report, view):
+    with record_statements(db) as statements:
+        reports = AnalysisReportRepository.get_by_user(db, report.user_id, view=view)
+        if view == "full":
+            [AnalysisReportResponse.model_validate(r) for r in reports]
+
+    assert len(reports) == 1
+    assert len(statements) == 1
+    assert not _has_embedding_column(statements[0])
+
+
+@requires_db
+def test_health_record_relationship_does_not_load_embeddings(db, report):
+    record = db.get(HealthRecord, report.record_id)
+    with record_statements(db) as statements:
+        reports = record.inbody_analysis_reports
+
+    assert len(reports) == 1
+    assert len(statements) == 1
+    assert not _has_embedding_column(statements[0])
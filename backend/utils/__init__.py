@@ -3,5 +3,6 @@
 """
 
 from database import get_db
+from .dependencies import get_llm_service
 
-__all__ = ["get_db"]
+__all__ = ["get_db", "get_llm_service"]
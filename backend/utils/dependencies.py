@@ -2,6 +2,7 @@
 의존성 주입 함수들
 """
 
+import threading
 from database import get_db
 from typing import Generator
 from sqlalchemy.orm import Session
@@ -9,4 +10,25 @@ from sqlalchemy.orm import Session
 # 추후 인증 관련 의존성 추가 가능
 # 예: get_current_user, verify_token 등
 
-__all__ = ["get_db"]
+_llm_service_lock = threading.Lock()
+
+
+def get_llm_service():
+    """
+    앱 전역 LLMService 반환 (지연 생성)
+
+    LLM 클라이언트와 컴파일된 LangGraph 에이전트(분석/주간 계획 각 1개)는 프로세스당 하나만 존재합니다.
+    라우터는 Depends(get_llm_service)로, 서비스 레이어는 직접 호출해서 같은 인스턴스를 공유하므로
+    어느 경로로 시작한 대화 스레드든 같은 에이전트에서 이어집니다.
+    """
+    from app_state import AppState
+
+    if AppState.llm_service is None:
+        with _llm_service_lock:
+            if AppState.llm_service is None:
+                from services.llm.llm_service import LLMService
+                AppState.llm_service = LLMService()
+    return AppState.llm_service
+
+
+__all__ = ["get_db", "get_llm_service"]
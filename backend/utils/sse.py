@@ -0,0 +1,58 @@
+"""
+Server-Sent Events 포맷 유틸리티
+"""
+
+import json
+from typing import Any, AsyncIterator, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    SSE 이벤트 문자열 생성
+
+    Args:
+        event: 이벤트 이름 (token, done, error 등)
+        data: JSON으로 직렬화할 데이터
+
+    Returns:
+        "event: ...\\ndata: ...\\n\\n" 형식의 문자열
+    """
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def sse_event_stream(
+    events: AsyncIterator[Dict[str, Any]],
+    build_done: Callable[[Dict[str, Any]], Any]
+) -> AsyncIterator[str]:
+    """
+    서비스 레이어의 스트리밍 이벤트를 SSE 문자열로 변환
+
+    - {"type": "token", "content": str} → event: token
+    - {"type": "done", ...}             → event: done (build_done으로 응답 데이터 생성)
+    - 스트리밍 중 예외                  → event: error (HTTP 상태 코드는 이미 전송되었으므로)
+
+    Args:
+        events: 서비스 레이어가 반환한 이벤트 이터레이터
+        build_done: done 이벤트를 응답 데이터로 변환하는 함수
+    """
+    try:
+        async for event in events:
+            if event["type"] == "token":
+                yield format_sse("token", {"content": event["content"]})
+            elif event["type"] == "done":
+                yield format_sse("done", build_done(event))
+    except Exception as e:
+        yield format_sse("error", {"detail": f"응답 생성 중 오류가 발생했습니다: {str(e)}"})
+
+
+def sse_response(body: AsyncIterator[str]) -> StreamingResponse:
+    """SSE StreamingResponse 생성 (프록시 버퍼링 비활성화)"""
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,200 @@
+"""
+벡터 HNSW 인덱스 저장 형식 마이그레이션 / 벤치마크
+
+분석 리포트 임베딩(embedding_1536 / embedding_1024)의 근사 검색 인덱스를
+full(float32) / halfvec(float16) / binary(1bit 양자화) 중에서 고르기 위한 도구입니다.
+원본 float32 컬럼은 그대로 두고 (최종 재정렬에 사용), 인덱스만 표현식 인덱스로 추가/삭제합니다.
+인덱스 정의와 검색은 src/llm의 shared.vector_search / Database.search_similar_analyses를 그대로 사용합니다.
+
+사용법 (저장소 루트에서 실행):
+    # 인덱스/테이블 크기 확인
+    python src/DB/migrations/vector_storage.py status
+
+    # halfvec 인덱스 생성 (서비스 중단 없이 CONCURRENTLY)
+    python src/DB/migrations/vector_storage.py migrate --storage halfvec
+
+    # 형식별 recall@k / 지연 시간 비교 (정확 검색 결과 기준)
+    python src/DB/migrations/vector_storage.py benchmark --storage full,halfvec,binary --samples 50
+
+    # 전환 확정: .env에 VECTOR_STORAGE=halfvec 설정 후 사용하지 않는 인덱스 삭제
+    python src/DB/migrations/vector_storage.py migrate --storage halfvec --drop-unused
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# src/llm 공용 모듈 임포트 (shared.database, shared.vector_search)
+sys.path.append(str(Path(__file__).resolve().parents[2] / "llm"))
+
+from sqlalchemy import select, text
+
+from shared.database import Database
+from shared.db_models import InbodyAnalysisReport
+from shared.vector_search import (
+    ANN, EXACT, VECTOR_SEARCH_EF_SEARCH, VECTOR_STORAGE, VECTOR_STORAGE_MODES,
+    report_vector_index_name, report_vector_index_statement
+)
+
+EMBEDDING_DIMS = (1536, 1024)
+
+
+def _parse_storages(value: str):
+    storages = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in storages if s not in VECTOR_STORAGE_MODES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"알 수 없는 저장 형식: {', '.join(unknown)}")
+    return storages
+
+
+def _existing_indexes(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT indexname, pg_relation_size(format('%I', indexname)::regclass) AS size "
+            "FROM pg_indexes WHERE tablename = 'inbody_analysis_reports'"
+        )).all()
+    return {r.indexname: r.size for r in rows}
+
+
+def status(engine):
+    """인덱스 형식별 크기 출력"""
+    indexes = _existing_indexes(engine)
+    with engine.connect() as conn:
+        table_size = conn.execute(text("SELECT pg_total_relation_size('inbody_analysis_reports')")).scalar()
+        counts = {
+            dim: conn.execute(text(
+                f"SELECT count(*) FROM inbody_analysis_reports WHERE embedding_{dim} IS NOT NULL"
+            )).scalar()
+            for dim in EMBEDDING_DIMS
+        }
+    print(f"현재 VECTOR_STORAGE: {VECTOR_STORAGE}")
+    print(f"inbody_analysis_reports 전체 크기: {table_size / 1024 / 1024:.1f} MB")
+    for dim in EMBEDDING_DIMS:
+        print(f"\nembedding_{dim} (임베딩 {counts[dim]}건)")
+        for storage in VECTOR_STORAGE_MODES:
+            name = report_vector_index_name(storage, dim)
+            size = indexes.get(name)
+            state = f"{size / 1024 / 1024:.1f} MB" if size is not None else "없음"
+            print(f"  {storage:<8} {name}: {state}")
+
+
+def migrate(engine, storage: str, drop_unused: bool):
+    """지정 형식 인덱스 생성 (CONCURRENTLY), --drop-unused면 다른 형식 인덱스 삭제"""
+    # CREATE/DROP INDEX CONCURRENTLY는 트랜잭션 밖에서 실행해야 함
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for dim in EMBEDDING_DIMS:
+            started = time.perf_counter()
+            conn.execute(text(report_vector_index_statement(storage, dim, concurrently=True)))
+            print(f"✅ {report_vector_index_name(storage, dim)} ({time.perf_counter() - started:.1f}초)")
+
+        if drop_unused:
+            for other in VECTOR_STORAGE_MODES:
+                if other == storage:
+                    continue
+                for dim in EMBEDDING_DIMS:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {report_vector_index_name(other, dim)}"))
+                    print(f"🗑️  {report_vector_index_name(other, dim)} 삭제")
+
+    if storage != VECTOR_STORAGE:
+        print(f"\n⚠️  .env의 VECTOR_STORAGE={storage}로 설정해야 검색에 사용됩니다 (현재 {VECTOR_STORAGE}).")
+        if drop_unused:
+            print("   설정 전까지 현재 형식의 인덱스가 없어 근사 검색이 순차 탐색으로 동작합니다.")
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)] if ordered else 0.0
+
+
+def benchmark(db: Database, storages, samples: int, top_k: int, dim: int, rerank: bool):
+    """
+    저장된 리포트 임베딩을 쿼리로 사용하여 형식별 recall@k / 지연 시간 측정
+
+    기준은 정확 검색(strategy=exact) 결과이며, 각 쿼리는 해당 리포트 사용자의 리포트 안에서 검색합니다.
+    """
+    if db.use_numpy_vectors:
+        print("NumPy 벡터 저장소 사용 중에는 HNSW 인덱스를 사용하지 않습니다 (VECTOR_STORE 확인).")
+        return
+
+    indexes = _existing_indexes(db.engine)
+    for storage in storages:
+        if report_vector_index_name(storage, dim) not in indexes:
+            print(f"⚠️  {report_vector_index_name(storage, dim)} 인덱스가 없어 {storage} 결과는 순차 탐색 기준입니다.")
+
+    embedding_col = getattr(InbodyAnalysisReport, f"embedding_{dim}")
+    with db.get_session() as session:
+        queries = session.execute(
+            select(InbodyAnalysisReport.user_id, embedding_col)
+            .where(embedding_col.isnot(None))
+            .order_by(text("random()"))
+            .limit(samples)
+        ).all()
+    if not queries:
+        print("임베딩이 있는 리포트가 없습니다.")
+        return
+
+    latencies = {name: [] for name in [EXACT, *storages]}
+    recalls = {storage: [] for storage in storages}
+    for user_id, embedding in queries:
+        params = dict(
+            user_id=user_id,
+            query_embedding=[float(v) for v in embedding],
+            top_k=top_k,
+            embedding_dim=dim,
+            rerank=rerank,
+        )
+        started = time.perf_counter()
+        expected = {r["id"] for r in db.search_similar_analyses(strategy=EXACT, **params)}
+        latencies[EXACT].append((time.perf_counter() - started) * 1000)
+
+        for storage in storages:
+            started = time.perf_counter()
+            found = {r["id"] for r in db.search_similar_analyses(strategy=ANN, storage=storage, **params)}
+            latencies[storage].append((time.perf_counter() - started) * 1000)
+            if expected:
+                recalls[storage].append(len(expected & found) / len(expected))
+
+    print(
+        f"\nembedding_{dim}, 쿼리 {len(queries)}건, top_k={top_k}, rerank={rerank}, "
+        f"ef_search>={VECTOR_SEARCH_EF_SEARCH}"
+    )
+    print(f"{'형식':<8} {'recall@k':>9} {'min':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, values in latencies.items():
+        samples_recall = recalls.get(name)
+        if samples_recall:
+            recall = f"{sum(samples_recall) / len(samples_recall):9.4f} {min(samples_recall):6.2f}"
+        else:
+            recall = f"{'1.0000' if name == EXACT else '-':>9} {'':>6}"
+        print(f"{name:<8} {recall} {_percentile(values, 0.5):8.2f} {_percentile(values, 0.95):8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 HNSW 인덱스 저장 형식 마이그레이션 / 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status", help="인덱스 형식별 크기 출력")
+
+    migrate_parser = sub.add_parser("migrate", help="지정 형식 HNSW 인덱스 생성")
+    migrate_parser.add_argument("--storage", choices=VECTOR_STORAGE_MODES, required=True)
+    migrate_parser.add_argument("--drop-unused", action="store_true", help="다른 형식의 인덱스 삭제")
+
+    bench_parser = sub.add_parser("benchmark", help="형식별 recall@k / 지연 시간 비교")
+    bench_parser.add_argument("--storage", type=_parse_storages, default=list(VECTOR_STORAGE_MODES))
+    bench_parser.add_argument("--samples", type=int, default=50)
+    bench_parser.add_argument("--top-k", type=int, default=6)
+    bench_parser.add_argument("--dim", type=int, choices=EMBEDDING_DIMS, default=1536)
+    bench_parser.add_argument("--no-rerank", action="store_true", help="시간 가중치 없이 순수 벡터 거리 기준으로 비교")
+
+    args = parser.parse_args()
+    db = Database()
+    if args.command == "status":
+        status(db.engine)
+    elif args.command == "migrate":
+        migrate(db.engine, args.storage, args.drop_unused)
+    else:
+        benchmark(db, args.storage, args.samples, args.top_k, args.dim, not args.no_rerank)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,97 @@
 """
 임베딩 생성 및 저장 (OpenAI + Ollama bge-m3)
+
+- 두 제공자를 동시에 호출하므로 지연 시간은 합이 아니라 느린 쪽 기준
+- 클라이언트는 프로세스 단위로 재사용 (커넥션 풀 유지)
+- 제공자별 제한 시간, 생성할 차원은 환경변수로 설정
+- 리포트 전체 임베딩과 별도로 "### [제목]" 섹션 청크별 임베딩 저장 (RAG 섹션 검색용)
+- 섹션 청크가 없는 기존 리포트 / 임베딩이 빠진 청크는 분석 파이프라인에서 백필 (검색 요청 경로에서는 임베딩하지 않음)
 """
 
-from typing import List, Optional
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
 from shared.llm_clients import BaseLLMClient, OpenAIClient, OllamaClient
 from shared.database import Database
+from shared.section_chunks import split_report_sections, chunk_embedding_text
+
+load_dotenv()
+
+# 생성할 임베딩 차원 (검색에 쓰는 차원만 지정, 예: "1536")
+EMBEDDING_DIMS = tuple(
+    int(dim) for dim in os.getenv("EMBEDDING_DIMS", "1536,1024").split(",") if dim.strip()
+)
+EMBEDDING_OPENAI_TIMEOUT = float(os.getenv("EMBEDDING_OPENAI_TIMEOUT", "15"))
+EMBEDDING_OLLAMA_TIMEOUT = float(os.getenv("EMBEDDING_OLLAMA_TIMEOUT", "30"))
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# 섹션 청크는 주간 계획 RAG가 섹션 검색(RAG_MODE=section)일 때만 생성 (다른 모드에서는 읽지 않음)
+SECTION_CHUNKS_ENABLED = os.getenv("RAG_MODE", "text") == "section"
+# 백필 1회당 섹션 청크를 만들 최대 리포트 수 / 임베딩을 다시 시도할 최대 청크 수 (차원별)
+SECTION_CHUNK_BACKFILL_REPORTS = int(os.getenv("SECTION_CHUNK_BACKFILL_REPORTS", "20"))
+SECTION_CHUNK_BACKFILL_CHUNKS = int(os.getenv("SECTION_CHUNK_BACKFILL_CHUNKS", "200"))
+
+# 재사용 클라이언트 / 스레드 풀 (지연 생성)
+_openai_client: Optional[OpenAIClient] = None
+_ollama_client: Optional[OllamaClient] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_openai_client() -> OpenAIClient:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAIClient()
+    return _openai_client
+
+
+def _get_ollama_client() -> OllamaClient:
+    global _ollama_client
+    if _ollama_client is None:
+        _ollama_client = OllamaClient(
+            model="bge-m3:latest", base_url=OLLAMA_BASE_URL, embedding_model="bge-m3:latest"
+        )
+    return _ollama_client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embedding")
+    return _executor
+
+
+def _embed_1536(text: str) -> List[float]:
+    return _get_openai_client().create_embedding(text=text, timeout=EMBEDDING_OPENAI_TIMEOUT)
+
+
+def _embed_1024(text: str) -> List[float]:
+    return _get_ollama_client().create_embedding(text=text, timeout=EMBEDDING_OLLAMA_TIMEOUT)
+
+
+def _embed_batch_1536(texts: List[str]) -> List[List[float]]:
+    # 요청 하나에 여러 텍스트
+    return _get_openai_client().create_embeddings(texts=texts, timeout=EMBEDDING_OPENAI_TIMEOUT)
+
+
+def _embed_batch_1024(texts: List[str]) -> List[List[float]]:
+    # Ollama는 텍스트별 요청 (같은 세션으로 커넥션 재사용)
+    return [_embed_1024(text) for text in texts]
+
+
+# 차원별 (제공자 이름, 임베딩 함수, 제한 시간)
+_PROVIDERS = {
+    1536: ("OpenAI", _embed_1536, EMBEDDING_OPENAI_TIMEOUT),
+    1024: ("Ollama bge-m3", _embed_1024, EMBEDDING_OLLAMA_TIMEOUT),
+}
+
+# 차원별 배치 임베딩 함수 (섹션 청크용)
+_BATCH_PROVIDERS = {
+    1536: _embed_batch_1536,
+    1024: _embed_batch_1024,
+}
 
 
 class InBodyEmbedder:
@@ -15,22 +102,49 @@ class InBodyEmbedder:
         db: Database,
         llm_client: BaseLLMClient,
         embedding_model: Optional[str] = None,
+        dims: Optional[Sequence[int]] = None,
     ):
         """
         Args:
             db: Database 인스턴스
             llm_client: LLM 클라이언트 (분석에 사용된 모델)
             embedding_model: 임베딩 모델 이름 (None이면 클라이언트 기본값 사용)
+            dims: 생성할 임베딩 차원 (None이면 EMBEDDING_DIMS)
         """
         self.db = db
         self.llm_client = llm_client
         self.embedding_model = embedding_model
+        self.dims = [dim for dim in (dims or EMBEDDING_DIMS) if dim in _PROVIDERS]
+
+    def _create_embeddings(self, analysis_text: str) -> Dict[int, Optional[List[float]]]:
+        """설정된 차원의 임베딩을 동시에 생성 (실패/시간 초과한 차원은 None)"""
+        executor = _get_executor()
+        started = time.monotonic()
+        futures = {
+            dim: executor.submit(_PROVIDERS[dim][1], analysis_text) for dim in self.dims
+        }
+
+        embeddings: Dict[int, Optional[List[float]]] = {}
+        for dim, future in futures.items():
+            name, _, timeout = _PROVIDERS[dim]
+            try:
+                # 제출 시점 기준 제한 시간 (HTTP 제한 시간 외 지연 대비 여유 1초)
+                remaining = max(started + timeout + 1 - time.monotonic(), 0)
+                embeddings[dim] = future.result(timeout=remaining)
+                print(f"  ✓ {name} 임베딩 생성 완료 (차원: {len(embeddings[dim])})")
+            except FutureTimeoutError:
+                embeddings[dim] = None
+                print(f"  ⚠️  {name} 임베딩 생성 시간 초과 ({timeout}초)")
+            except Exception as e:
+                embeddings[dim] = None
+                print(f"  ⚠️  {name} 임베딩 생성 실패: {e}")
+        return embeddings
 
     def create_and_save_embedding(
         self, analysis_id: int, analysis_text: str
     ) -> Optional[dict]:
         """
-        분석 텍스트를 임베딩하고 DB에 저장 (OpenAI + Ollama 동시 생성)
+        분석 텍스트를 임베딩하고 DB에 저장 (OpenAI + Ollama 동시 생성, 한 번의 UPDATE로 저장)
 
         Args:
             analysis_id: 분석 리포트 ID
@@ -42,34 +156,11 @@ class InBodyEmbedder:
         print("\n🔢 임베딩 생성 중...")
 
         try:
-            embedding_1536 = None
-            embedding_1024 = None
+            embeddings = self._create_embeddings(analysis_text)
+            embedding_1536 = embeddings.get(1536)
+            embedding_1024 = embeddings.get(1024)
 
-            # 1. OpenAI 임베딩 생성 (1536차원)
-            try:
-                openai_client = OpenAIClient()
-                if hasattr(openai_client, "create_embedding"):
-                    embedding_1536 = openai_client.create_embedding(text=analysis_text)
-                    print(
-                        f"  ✓ OpenAI 임베딩 생성 완료 (차원: {len(embedding_1536)})"
-                    )
-            except Exception as e:
-                print(f"  ⚠️  OpenAI 임베딩 생성 실패: {e}")
-
-            # 2. Ollama bge-m3 임베딩 생성 (1024차원)
-            try:
-                ollama_client = OllamaClient(
-                    model="bge-m3:latest", embedding_model="bge-m3:latest"
-                )
-                if hasattr(ollama_client, "create_embedding"):
-                    embedding_1024 = ollama_client.create_embedding(text=analysis_text)
-                    print(
-                        f"  ✓ Ollama bge-m3 임베딩 생성 완료 (차원: {len(embedding_1024)})"
-                    )
-            except Exception as e:
-                print(f"  ⚠️  Ollama 임베딩 생성 실패: {e}")
-
-            # 3. DB에 임베딩 저장
+            # DB에 임베딩 저장
             if embedding_1536 or embedding_1024:
                 success = self.db.update_analysis_embedding(
                     analysis_id,
@@ -93,7 +184,7 @@ class InBodyEmbedder:
                     "embedding_1024": embedding_1024,
                 }
             else:
-                print("  ⚠️  임베딩 생성 실패: OpenAI와 Ollama 모두 실패")
+                print(f"  ⚠️  임베딩 생성 실패: 모든 제공자 실패 (차원: {self.dims})")
                 return None
 
         except Exception as e:
@@ -102,3 +193,83 @@ class InBodyEmbedder:
 
             traceback.print_exc()
             return None
+
+    def create_and_save_chunks(self, analysis_id: int, analysis_text: str) -> int:
+        """
+        분석 텍스트를 섹션 청크로 나눠 차원별로 동시에 임베딩하고 저장 (기존 청크는 교체)
+
+        임베딩에 실패한 차원은 비워서 저장합니다 (backfill_section_chunks에서 다시 시도).
+        섹션이 없는 리포트도 청크 0개로 기록하여 백필 대상에서 제외합니다.
+
+        Returns:
+            저장한 청크 수
+        """
+        chunks = split_report_sections(analysis_text or "")
+        if not chunks:
+            try:
+                self.db.save_analysis_chunks(analysis_id, [])
+            except Exception as e:
+                print(f"  ⚠️  섹션 청크 저장 실패: {e}")
+            return 0
+
+        texts = [chunk_embedding_text(chunk) for chunk in chunks]
+        executor = _get_executor()
+        futures = {dim: executor.submit(_BATCH_PROVIDERS[dim], texts) for dim in self.dims}
+        for dim, future in futures.items():
+            name = _PROVIDERS[dim][0]
+            try:
+                vectors = future.result()
+            except Exception as e:
+                print(f"  ⚠️  {name} 섹션 청크 임베딩 실패: {e}")
+                continue
+            for chunk, vector in zip(chunks, vectors):
+                chunk[f"embedding_{dim}"] = vector
+
+        try:
+            saved = self.db.save_analysis_chunks(analysis_id, chunks)
+        except Exception as e:
+            print(f"  ⚠️  섹션 청크 저장 실패: {e}")
+            return 0
+        print(f"  ✓ 섹션 청크 {saved}개 저장 (Analysis ID: {analysis_id})")
+        return saved
+
+    def backfill_section_chunks(
+        self,
+        user_id: Optional[int] = None,
+        report_limit: int = SECTION_CHUNK_BACKFILL_REPORTS,
+        chunk_limit: int = SECTION_CHUNK_BACKFILL_CHUNKS,
+    ) -> Dict[str, int]:
+        """
+        섹션 청크 백필
+
+        1. 청크를 아직 만들지 않은 기존 리포트의 청크 생성 (최신순 report_limit건)
+        2. 저장 시 임베딩에 실패해 비어 있는 차원을 다시 임베딩 (차원별 chunk_limit개)
+
+        Args:
+            user_id: 대상 사용자 (None이면 전체 사용자)
+
+        Returns:
+            {"reports": 청크를 만든 리포트 수, "embeddings": 다시 채운 청크 임베딩 수}
+        """
+        reports = self.db.get_reports_without_chunks(user_id, limit=report_limit)
+        for report in reports:
+            self.create_and_save_chunks(report["id"], report["llm_output"])
+
+        refilled = 0
+        for dim in self.dims:
+            chunks = self.db.get_chunks_missing_embedding(dim, user_id=user_id, limit=chunk_limit)
+            if not chunks:
+                continue
+            name = _PROVIDERS[dim][0]
+            try:
+                vectors = _BATCH_PROVIDERS[dim]([chunk_embedding_text(chunk) for chunk in chunks])
+            except Exception as e:
+                print(f"  ⚠️  {name} 섹션 청크 임베딩 재시도 실패 ({len(chunks)}개): {e}")
+                continue
+            refilled += self.db.update_chunk_embeddings(
+                dim, [(chunk["id"], vector) for chunk, vector in zip(chunks, vectors)]
+            )
+
+        if reports or refilled:
+            print(f"  ✓ 섹션 청크 백필: 리포트 {len(reports)}건, 청크 임베딩 {refilled}개")
+        return {"reports": len(reports), "embeddings": refilled}
@@ -18,7 +18,7 @@ from shared.llm_clients import create_llm_client
 from shared.models import InBodyMeasurements, InBodyAnalysisRequest, InBodyAnalysisResponse
 
 from pipeline_inbody_analysis.analyzer import InBodyAnalyzer
-from pipeline_inbody_analysis.embedder import InBodyEmbedder
+from pipeline_inbody_analysis.embedder import InBodyEmbedder, SECTION_CHUNKS_ENABLED
 
 load_dotenv()
 
@@ -68,6 +68,13 @@ def run_inbody_analysis(
                 result["analysis_id"], result["analysis_text"]
             )
             result["embedding"] = embedding
+            # 섹션 청크는 RAG_MODE=section일 때만 사용하므로 그때만 생성
+            if SECTION_CHUNKS_ENABLED:
+                embedder.create_and_save_chunks(
+                    result["analysis_id"], result["analysis_text"]
+                )
+                # 같은 사용자의 청크 없는 기존 리포트 / 임베딩이 빠진 청크 보충 (RAG 검색 시에는 임베딩하지 않음)
+                embedder.backfill_section_chunks(user_id=user_id)
 
         # 5. 성공 응답
         return InBodyAnalysisResponse(
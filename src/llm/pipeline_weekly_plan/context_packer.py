@@ -0,0 +1,176 @@
+"""
+주간 계획 RAG 컨텍스트 패킹
+InBodyRAGRetriever 결과를 토큰 예산 안으로 줄여 create_weekly_plan_prompt에 전달
+
+- rerank 점수가 높은 순으로 채우고, 남은 예산보다 긴 항목은 잘라서 포함
+- 같은 기록을 다시 분석한 리포트(같은 record_id, 섹션이면 같은 제목)나
+  본문이 거의 같은 항목은 점수가 높은 하나만 남김
+- 토큰 수는 로컬에서 계산 (tiktoken이 있으면 정확한 값, 없으면 근사치)
+- 잘리거나 빠진 토큰 수를 보고
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "3000"))
+# 본문 단어 3-gram Jaccard 유사도가 이 이상이면 중복으로 간주
+RAG_CONTEXT_DEDUP_THRESHOLD = float(os.getenv("RAG_CONTEXT_DEDUP_THRESHOLD", "0.8"))
+# 남은 예산이 이보다 적으면 항목을 잘라 넣지 않고 제외
+_MIN_TRUNCATED_TOKENS = 80
+_TRUNCATED_MARK = "\n…(이하 생략)"
+
+# tiktoken 인코딩 (첫 호출 시 로드, 실패하면 False로 두고 근사치 사용)
+_encoding: Any = None
+
+
+def _get_encoding() -> Any:
+    """
+    o200k_base 인코딩 (tiktoken이 없거나 BPE 파일을 내려받지 못하면 None)
+
+    import 시점에 로드하지 않으므로 오프라인 환경에서도 모듈 import가 실패하지 않습니다.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encoding = False
+        except Exception as e:
+            print(f"⚠️  tiktoken 인코딩 로드 실패, 토큰 수 근사치 사용: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 (tiktoken을 쓸 수 없으면 근사치: ASCII 4자당 1토큰, 한글 등은 1자당 1토큰)"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+@dataclass
+class PackedContext:
+    """패킹 결과 및 통계"""
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    budget_tokens: int = 0
+    total_tokens: int = 0  # 패킹 전 전체 토큰 수
+    used_tokens: int = 0
+    truncated_items: int = 0
+    deduplicated_items: int = 0
+    dropped_items: int = 0
+
+    @property
+    def dropped_tokens(self) -> int:
+        return max(self.total_tokens - self.used_tokens, 0)
+
+
+def _text_key(item: Dict[str, Any]) -> str:
+    """항목 본문 키 (섹션 청크: content, 리포트: analysis_text 또는 llm_output)"""
+    if "section_title" in item:
+        return "content"
+    return "analysis_text" if item.get("analysis_text") else "llm_output"
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _jaccard(a: Set[Tuple[str, ...]], b: Set[Tuple[str, ...]]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _identity(item: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """같은 기록 재분석 판별 키 (record_id가 없으면 None)"""
+    if item.get("record_id") is None:
+        return None
+    return (item["record_id"], item.get("section_title"))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """max_tokens 이하가 되도록 뒤를 잘라냄 (가능하면 줄 단위, 생략 표시 포함)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(max_tokens - count_tokens(_TRUNCATED_MARK), 1)
+    cut = len(text)
+    while cut > 0:
+        # 토큰 비율로 길이를 줄여가며 예산 안에 들어오는 지점 탐색
+        cut = int(cut * budget / max(count_tokens(text[:cut]), 1) * 0.95)
+        if count_tokens(text[:cut]) <= budget:
+            break
+    head = text[:cut]
+    newline = head.rfind("\n")
+    if newline > cut // 2:
+        head = head[:newline]
+    return head.rstrip() + _TRUNCATED_MARK
+
+
+def pack_context(
+    items: List[Dict[str, Any]],
+    token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+    dedup_threshold: float = RAG_CONTEXT_DEDUP_THRESHOLD,
+) -> PackedContext:
+    """
+    RAG 결과를 토큰 예산 안으로 선택/절단
+
+    Args:
+        items: InBodyRAGRetriever 결과 (리포트 또는 섹션 청크)
+        token_budget: 본문 토큰 합계 상한
+        dedup_threshold: 본문 중복 판정 Jaccard 유사도
+
+    Returns:
+        PackedContext (items는 점수 높은 순, 원본 dict는 변경하지 않음)
+    """
+    ranked = sorted(
+        items,
+        key=lambda item: item.get("rerank_score", item.get("similarity", 0.0)),
+        reverse=True,
+    )
+    packed = PackedContext(budget_tokens=token_budget)
+    seen_identities: Set[Tuple[Any, ...]] = set()
+    seen_shingles: List[Set[Tuple[str, ...]]] = []
+
+    for item in ranked:
+        key = _text_key(item)
+        text = item.get(key) or ""
+        tokens = count_tokens(text)
+        packed.total_tokens += tokens
+
+        identity = _identity(item)
+        shingles = _shingles(text)
+        if (identity is not None and identity in seen_identities) or any(
+            _jaccard(shingles, seen) >= dedup_threshold for seen in seen_shingles
+        ):
+            packed.deduplicated_items += 1
+            continue
+
+        remaining = token_budget - packed.used_tokens
+        if tokens > remaining:
+            if remaining < _MIN_TRUNCATED_TOKENS:
+                packed.dropped_items += 1
+                continue
+            text = truncate_to_tokens(text, remaining)
+            tokens = count_tokens(text)
+            packed.truncated_items += 1
+
+        if identity is not None:
+            seen_identities.add(identity)
+        seen_shingles.append(shingles)
+        packed.items.append({**item, key: text})
+        packed.used_tokens += tokens
+
+    return packed
@@ -9,7 +9,8 @@ from shared.models import UserGoal, UserPreferences, WeeklyPlan
 from shared.llm_clients import BaseLLMClient
 from shared.database import Database
 
-from pipeline_weekly_plan.rag_retriever import InBodyRAGRetriever
+from pipeline_weekly_plan.rag_retriever import InBodyRAGRetriever, DEFAULT_RAG_QUERY
+from pipeline_weekly_plan.context_packer import pack_context, RAG_CONTEXT_TOKEN_BUDGET
 from pipeline_weekly_plan.prompt_generator import create_weekly_plan_prompt
 
 
@@ -17,7 +18,12 @@ class WeeklyPlanner:
     """주간 운동/식단 계획 생성기"""
 
     def __init__(
-        self, db: Database, llm_client: BaseLLMClient, model_version: str, use_ollama_rag: bool = False
+        self,
+        db: Database,
+        llm_client: BaseLLMClient,
+        model_version: str,
+        use_ollama_rag: bool = False,
+        context_token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
     ):
         """
         Args:
@@ -25,10 +31,12 @@ class WeeklyPlanner:
             llm_client: LLM 클라이언트
             model_version: 모델 버전
             use_ollama_rag: RAG에서 Ollama bge-m3 사용 여부
+            context_token_budget: 프롬프트에 넣을 InBody 분석 컨텍스트 토큰 상한
         """
         self.db = db
         self.llm_client = llm_client
         self.model_version = model_version
+        self.context_token_budget = context_token_budget
         self.rag_retriever = InBodyRAGRetriever(db, use_ollama=use_ollama_rag)
 
     def generate_plan(
@@ -59,11 +67,20 @@ class WeeklyPlanner:
         # 1단계: InBody 분석 결과 검색 (RAG)
         print("\n🔍 1단계: InBody 분석 결과 검색...")
         inbody_context = self.rag_retriever.retrieve_similar_analyses(
-            user_id=user_id, query="체형 분석", top_k=6
+            user_id=user_id, query=DEFAULT_RAG_QUERY, top_k=6
         )
 
         if not inbody_context:
             print("  ⚠️  InBody 분석 결과가 없습니다. 일반적인 계획을 생성합니다.")
+        else:
+            # 토큰 예산 안으로 선택/절단 (중복 분석 제거)
+            packed = pack_context(inbody_context, token_budget=self.context_token_budget)
+            inbody_context = packed.items
+            print(
+                f"  ✓ 컨텍스트 패킹: {len(inbody_context)}개, {packed.used_tokens}/{packed.budget_tokens} 토큰 "
+                f"(제외 {packed.dropped_tokens} 토큰, 절단 {packed.truncated_items}개, "
+                f"중복 {packed.deduplicated_items}개, 예산 초과 {packed.dropped_items}개)"
+            )
 
         # 2단계: 날짜 계산
         if not start_date:
@@ -524,10 +524,17 @@ def create_weekly_plan_prompt(
     # 2. InBody 분석 결과 (RAG Context)
     user_prompt_parts.append("\n## InBody 분석 결과 (참고용)")
 
-    if inbody_context:
+    if inbody_context and "section_title" in inbody_context[0]:
+        # 섹션 RAG 결과: 관련 섹션 본문만 포함 (리포트 전체 대신)
+        for section in inbody_context:
+            report_date = section.get("report_date")
+            date_label = report_date.strftime("%Y-%m-%d") if report_date else "N/A"
+            user_prompt_parts.append(f"\n### [{section['section_title']}] ({date_label} 분석)")
+            user_prompt_parts.append(section.get("content", ""))
+    elif inbody_context:
         latest = inbody_context[0]
         user_prompt_parts.append(f"\n### 최신 분석 ({latest.get('generated_at', 'N/A')})")
-        user_prompt_parts.append(latest.get("analysis_text", ""))
+        user_prompt_parts.append(latest.get("analysis_text") or latest.get("llm_output", ""))
 
         # 측정 데이터 요약
         if "measurements" in latest:
@@ -2,39 +2,82 @@
 Vector RAG 검색 (SQLAlchemy + pgvector + Reranking)
 - OpenAI 1536차원 또는 Ollama bge-m3 1024차원 임베딩 사용
 - 시간 가중치 기반 Reranking (자연로그 decay)
+- 쿼리 임베딩 캐시 (메모리 LRU + DB, 고정 쿼리는 시작 시 prewarm)
+- RAG_MODE=text(기본): 리포트 전체 임베딩 검색
+- RAG_MODE=section: 리포트 전체 대신 관련 "### [제목]" 섹션 청크만 검색
+  (청크는 분석 파이프라인에서 생성/백필, 검색 시 청크가 없으면 리포트 단위 검색)
+- RAG_MODE=measurement: 텍스트 임베딩 대신 측정값 특징 벡터로 검색 (네트워크 호출 없음)
 """
 
+import os
 from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
 from shared.database import Database
+from shared.embedding_cache import QueryEmbeddingCache
 from shared.llm_clients import OpenAIClient, OllamaClient
 
+# 주간 계획 생성 시 사용하는 고정 RAG 쿼리
+DEFAULT_RAG_QUERY = "체형 분석"
+# 시작 시 임베딩을 미리 캐시할 고정 쿼리
+PREWARM_QUERIES = (DEFAULT_RAG_QUERY,)
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+
+load_dotenv()
+
+# 검색 모드: text (리포트 전체 임베딩) | section (섹션 청크 임베딩) | measurement (측정값 특징 벡터)
+RAG_MODE = os.getenv("RAG_MODE", "text")
+
 
 class InBodyRAGRetriever:
     """
     인바디 분석 결과 벡터 검색 (pgvector + Reranking)
     - OpenAI (1536D) 또는 Ollama bge-m3 (1024D) 자동 선택
+    - measurement 모드에서는 임베딩 클라이언트를 만들지 않음
     """
 
-    def __init__(self, db: Database, use_ollama: bool = False):
+    def __init__(self, db: Database, use_ollama: bool = False, mode: str = RAG_MODE):
         """
         Args:
             db: Database 인스턴스 (SQLAlchemy)
             use_ollama: Ollama bge-m3 사용 여부 (False=OpenAI, True=Ollama)
+            mode: 검색 모드 (section | text | measurement)
         """
         self.db = db
         self.use_ollama = use_ollama
+        self.mode = mode
+
+        if mode == "measurement":
+            self.embedding_client = None
+            self.query_cache = None
+            print("  🔧 RAG: 측정값 특징 벡터 검색 (임베딩 미사용)")
+            return
 
         if use_ollama:
             self.embedding_client = OllamaClient(
                 model="bge-m3:latest", embedding_model="bge-m3:latest"
             )
+            self.embedding_model = self.embedding_client.embedding_model
             self.embedding_dim = 1024
             print("  🔧 RAG Embedder: Ollama bge-m3 (1024D)")
         else:
             self.embedding_client = OpenAIClient()
+            self.embedding_model = OPENAI_EMBEDDING_MODEL
             self.embedding_dim = 1536
             print("  🔧 RAG Embedder: OpenAI (1536D)")
 
+        # 쿼리 임베딩 캐시: 같은 쿼리는 임베딩 API를 다시 호출하지 않음
+        self.query_cache = QueryEmbeddingCache(
+            embed_fn=lambda text: self.embedding_client.create_embedding(
+                text=text, model=self.embedding_model
+            ),
+            embedding_model=self.embedding_model,
+            dimension=self.embedding_dim,
+            db=db,
+        )
+        warmed = self.query_cache.prewarm(PREWARM_QUERIES)
+        print(f"  🔧 쿼리 임베딩 캐시 준비 ({warmed}/{len(PREWARM_QUERIES)}개 prewarm)")
+
     def retrieve_similar_analyses(
         self, user_id: int, query: str, top_k: int = 6
     ) -> List[Dict[str, Any]]:
@@ -49,13 +92,23 @@ class InBodyRAGRetriever:
         Returns:
             유사도 + 시간 가중치가 반영된 분석 리포트 리스트
         """
+        if self.mode == "measurement":
+            return self.retrieve_by_measurements(user_id, top_k=top_k)
+        if self.mode == "section":
+            sections = self.retrieve_similar_sections(user_id, query, top_k=top_k)
+            if sections:
+                return sections
+            print("  ⚠️  검색된 섹션이 없습니다. 리포트 단위로 검색합니다.")
+
         print(f"\n🔍 Vector RAG 검색 중 (top_k={top_k})...")
 
         try:
-            # 1. 쿼리를 임베딩으로 변환
-            print(f"  - 쿼리 임베딩 생성 중: '{query[:50]}...'")
-            query_embedding = self.embedding_client.create_embedding(text=query)
-            print(f"  ✓ 쿼리 임베딩 완료 (차원: {len(query_embedding)})")
+            # 1. 쿼리를 임베딩으로 변환 (캐시에 있으면 API 호출 없음)
+            print(f"  - 쿼리 임베딩 조회 중: '{query[:50]}...'")
+            hits = self.query_cache.hits
+            query_embedding = self.query_cache.get(query)
+            source = "캐시" if self.query_cache.hits > hits else "API"
+            print(f"  ✓ 쿼리 임베딩 완료 (차원: {len(query_embedding)}, {source})")
 
             # 2. pgvector로 유사도 검색 + Reranking
             results = self.db.search_similar_analyses(
@@ -65,6 +118,8 @@ class InBodyRAGRetriever:
                 embedding_dim=self.embedding_dim,
                 rerank=True,  # 시간 가중치 reranking 활성화
             )
+            # 전략별(exact/ann) 지연 시간 및 근사 검색 recall 누적 통계
+            print(f"  - 벡터 검색 통계: {self.db.vector_search_stats.snapshot()}")
 
             if results:
                 print(f"  ✓ {len(results)}개 유사 분석 검색 완료 (Reranked)")
@@ -89,6 +144,93 @@ class InBodyRAGRetriever:
             traceback.print_exc()
             return self._fallback_to_latest(user_id, top_k)
 
+    def retrieve_similar_sections(
+        self, user_id: int, query: str, top_k: int = 6
+    ) -> List[Dict[str, Any]]:
+        """
+        관련 분석 섹션 검색 (섹션 청크 Vector RAG + Reranking)
+
+        리포트 전체 대신 "### [제목]" 섹션 본문만 반환하므로 프롬프트가 짧아집니다.
+        청크는 분석 파이프라인(InBodyEmbedder.backfill_section_chunks)에서 만들어 두며,
+        검색 중에는 임베딩 API를 쿼리 임베딩에만 사용합니다.
+
+        Returns:
+            섹션 청크 리스트 (section_title, content, report_date 등), 실패 시 빈 리스트
+        """
+        print(f"\n🔍 섹션 RAG 검색 중 (top_k={top_k})...")
+
+        try:
+            query_embedding = self.query_cache.get(query)
+            results = self.db.search_similar_chunks(
+                user_id=user_id,
+                query_embedding=query_embedding,
+                top_k=top_k,
+                embedding_dim=self.embedding_dim,
+                rerank=True,
+            )
+            if results:
+                print(f"  ✓ {len(results)}개 관련 섹션 검색 완료 (Reranked)")
+                for i, r in enumerate(results, 1):
+                    print(
+                        f"    {i}. [{r['section_title']}] Score: {r.get('rerank_score', 0):.3f} "
+                        f"(Sim: {r['similarity']:.3f}, Days: {r.get('days_ago', 0)})"
+                    )
+            return results
+
+        except Exception as e:
+            print(f"  ⚠️  섹션 검색 실패: {e}")
+            return []
+
+    def retrieve_by_measurements(
+        self, user_id: int, measurements: Optional[Dict[str, Any]] = None, top_k: int = 6
+    ) -> List[Dict[str, Any]]:
+        """
+        측정값이 비슷했던 기록의 분석 검색 (특징 벡터 L2 거리 + Reranking)
+
+        Args:
+            user_id: 사용자 ID
+            measurements: 기준 측정값 (None이면 사용자의 최신 기록)
+            top_k: 상위 K개 결과 (기본 6개)
+
+        Returns:
+            유사도 + 시간 가중치가 반영된 분석 리포트 리스트
+        """
+        print(f"\n🔍 측정값 유사도 검색 중 (top_k={top_k})...")
+
+        try:
+            # 특징 벡터가 없는 기존 기록은 검색 전에 계산 (로컬 연산)
+            filled = self.db.backfill_measurement_features(user_id=user_id)
+            if filled:
+                print(f"  ✓ 특징 벡터 {filled}건 계산")
+
+            if measurements is None:
+                measurements = self.db.get_latest_measurements(user_id)
+            if not measurements:
+                print("  ⚠️  측정 기록이 없습니다. 최신 분석을 반환합니다.")
+                return self._fallback_to_latest(user_id, top_k)
+
+            results = self.db.search_similar_by_measurements(
+                user_id=user_id, measurements=measurements, top_k=top_k, rerank=True
+            )
+            if results:
+                print(f"  ✓ {len(results)}개 유사 분석 검색 완료 (Reranked)")
+                for i, r in enumerate(results, 1):
+                    print(
+                        f"    {i}. Score: {r.get('rerank_score', 0):.3f} "
+                        f"(Sim: {r['similarity']:.3f}, "
+                        f"Time: {r.get('time_weight', 0):.3f}, "
+                        f"Days: {r.get('days_ago', 0)})"
+                    )
+                return results
+
+            print("  ⚠️  분석된 기록이 없습니다. 최신 분석을 반환합니다.")
+            return self._fallback_to_latest(user_id, top_k)
+
+        except Exception as e:
+            print(f"  ⚠️  측정값 검색 실패: {e}")
+            print("     최신 분석으로 fallback합니다.")
+            return self._fallback_to_latest(user_id, top_k)
+
     def _fallback_to_latest(
         self, user_id: int, limit: int = 6
     ) -> List[Dict[str, Any]]:
@@ -103,24 +245,21 @@ class InBodyRAGRetriever:
             최신 분석 리포트 리스트
         """
         try:
+            # 목록 조회에 llm_output 전체가 포함되므로 리포트별 재조회 없음
             reports = self.db.get_user_analysis_reports(user_id, limit=limit)
-            results = []
-
-            for report in reports:
-                # 전체 llm_output 가져오기 위해 다시 조회
-                full_report = self.db.get_analysis_report(report["id"])
-                if full_report:
-                    results.append(
-                        {
-                            "id": full_report["id"],
-                            "analysis_text": full_report["llm_output"],
-                            "report_date": full_report["report_date"],
-                            "similarity": 1.0,  # fallback은 similarity 1.0
-                            "rerank_score": 1.0,
-                            "time_weight": 1.0,
-                            "days_ago": 0,
-                        }
-                    )
+            results = [
+                {
+                    "id": report["id"],
+                    "record_id": report["record_id"],
+                    "analysis_text": report["llm_output"],
+                    "report_date": report["report_date"],
+                    "similarity": 1.0,  # fallback은 similarity 1.0
+                    "rerank_score": 1.0,
+                    "time_weight": 1.0,
+                    "days_ago": 0,
+                }
+                for report in reports
+            ]
 
             print(f"  ✓ {len(results)}개 최신 분석 반환")
             return results
@@ -3,16 +3,19 @@
 /api/chatbot/*
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from schemas.llm import ChatbotRequest, ChatbotResponse
 from services.llm.llm_service import LLMService
+from utils.dependencies import get_llm_service
 
 router = APIRouter()
-llm_service = LLMService()
 
 
 @router.post("/chat", response_model=ChatbotResponse)
-async def chat_with_bot(request: ChatbotRequest):
+async def chat_with_bot(
+    request: ChatbotRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
     """
     챗봇과 대화
 
@@ -1,21 +1,62 @@
 """
 SQLAlchemy 기반 데이터베이스 관리 (pgvector 지원)
+
+pgvector extension을 사용할 수 없으면 (또는 VECTOR_STORE=numpy) 임베딩은 NumpyVectorStore에 저장하고,
+유사도 검색도 같은 메서드/반환 형식으로 프로세스 내에서 처리합니다.
 """
 
 import os
-from typing import Optional, Dict, Any, List
+import math
+import random
+import time
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, date
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, text, desc
+import numpy as np
+
+from sqlalchemy import create_engine, text, desc, select, func, extract, update
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from dotenv import load_dotenv
+from pgvector.sqlalchemy import Vector
 
-from shared.db_models import Base, HealthRecord, InbodyAnalysisReport, WeeklyPlan
+from shared.db_models import (
+    Base, HealthRecord, InbodyAnalysisReport, InbodyAnalysisChunk, WeeklyPlan, QueryEmbedding
+)
+from shared.measurement_features import FEATURE_DIM, build_feature_vector
+from shared.numpy_vector_store import NumpyVectorStore
+from shared.vector_search import (
+    ANN,
+    ANN_OVERSAMPLE,
+    EXACT,
+    VECTOR_SEARCH_EF_SEARCH,
+    VECTOR_SEARCH_EXACT_THRESHOLD,
+    VECTOR_SEARCH_RECALL_SAMPLE_RATE,
+    VECTOR_STORAGE,
+    VectorSearchStats,
+    quantized_distance,
+    report_vector_index_statement,
+    set_ann_search_params,
+)
 
 load_dotenv()
 
+# 벡터 저장소: auto (pgvector가 없으면 numpy) / pgvector / numpy
+VECTOR_STORE = os.getenv("VECTOR_STORE", "auto")
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "vector_store")
+
+# pgvector가 없을 때 vector 컬럼을 real[]로 생성 (numpy 저장소 사용 시 컬럼은 비워 둠)
+_vector_ddl_fallback = False
+
+
+@compiles(Vector, "postgresql")
+def _compile_vector(type_, compiler, **kw):
+    if _vector_ddl_fallback:
+        return "REAL[]"
+    return compiler.visit_user_defined(type_, **kw)
+
 
 class Database:
     """SQLAlchemy 기반 PostgreSQL 데이터베이스 관리 (pgvector 지원)"""
@@ -47,6 +88,14 @@ class Database:
             autocommit=False, autoflush=False, bind=self.engine
         )
 
+        # pgvector 사용 가능 여부 / numpy 벡터 저장소 ((namespace, 차원) → 저장소, _init_database에서 결정)
+        self.pgvector_available = False
+        self.use_numpy_vectors = False
+        self._numpy_stores: Dict[tuple, NumpyVectorStore] = {}
+
+        # 리포트 벡터 검색 전략별 지연 시간 / 근사 검색 recall (shared/vector_search.py)
+        self.vector_search_stats = VectorSearchStats()
+
         # 데이터베이스 초기화
         self._init_database()
 
@@ -65,56 +114,124 @@ class Database:
 
     def _init_database(self):
         """데이터베이스 초기화 및 테이블 생성"""
+        global _vector_ddl_fallback
+
         # pgvector extension 설치
         with self.engine.connect() as conn:
             try:
                 conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
                 conn.commit()
+                self.pgvector_available = True
                 print("✅ pgvector extension 활성화 완료")
             except Exception as e:
                 print(f"⚠️  pgvector extension 설치 실패: {e}")
 
+        self.use_numpy_vectors = VECTOR_STORE == "numpy" or (
+            VECTOR_STORE == "auto" and not self.pgvector_available
+        )
+        if self.use_numpy_vectors:
+            print(f"✅ NumPy 벡터 저장소 사용 ({os.path.abspath(VECTOR_STORE_DIR)})")
+        if not self.pgvector_available:
+            _vector_ddl_fallback = True
+
         # 모든 테이블 생성 (없으면 생성)
         Base.metadata.create_all(bind=self.engine)
         print("✅ SQLAlchemy 데이터베이스 초기화 완료")
 
-        # 인덱스 생성 (pgvector용)
-        self._create_vector_indexes()
-
-    def _create_vector_indexes(self):
-        """Vector 검색을 위한 인덱스 생성 (1536D + 1024D)"""
+        # 기존 테이블에 추가된 컬럼 (create_all은 이미 있는 테이블을 변경하지 않음)
         with self.engine.connect() as conn:
             try:
-                # HNSW 인덱스 생성 for embedding_1536 (OpenAI)
+                column_type = f"vector({FEATURE_DIM})" if self.pgvector_available else "real[]"
                 conn.execute(
                     text(
-                        """
-                        CREATE INDEX IF NOT EXISTS idx_inbody_analysis_reports_embedding_1536_hnsw
-                        ON inbody_analysis_reports USING hnsw (embedding_1536 vector_cosine_ops)
-                        WITH (m = 16, ef_construction = 64)
-                        """
+                        f"ALTER TABLE health_records ADD COLUMN IF NOT EXISTS feature_vector {column_type}"
                     )
                 )
                 conn.commit()
-                print("✅ pgvector HNSW 인덱스 생성 완료 (1536D)")
             except Exception as e:
-                print(f"⚠️  Vector 인덱스 (1536D) 생성 실패: {e}")
+                print(f"⚠️  health_records.feature_vector 컬럼 추가 실패: {e}")
 
+            # 섹션 청크 생성 여부 (이미 청크가 있는 리포트는 청크 수로 채워 다시 생성하지 않음)
             try:
-                # HNSW 인덱스 생성 for embedding_1024 (Ollama bge-m3)
+                conn.execute(
+                    text(
+                        "ALTER TABLE inbody_analysis_reports ADD COLUMN IF NOT EXISTS section_chunk_count INTEGER"
+                    )
+                )
                 conn.execute(
                     text(
                         """
-                        CREATE INDEX IF NOT EXISTS idx_inbody_analysis_reports_embedding_1024_hnsw
-                        ON inbody_analysis_reports USING hnsw (embedding_1024 vector_cosine_ops)
-                        WITH (m = 16, ef_construction = 64)
+                        UPDATE inbody_analysis_reports r
+                        SET section_chunk_count = c.chunk_count
+                        FROM (
+                            SELECT report_id, count(*) AS chunk_count
+                            FROM inbody_analysis_chunks GROUP BY report_id
+                        ) c
+                        WHERE c.report_id = r.id AND r.section_chunk_count IS NULL
                         """
                     )
                 )
                 conn.commit()
-                print("✅ pgvector HNSW 인덱스 생성 완료 (1024D)")
             except Exception as e:
-                print(f"⚠️  Vector 인덱스 (1024D) 생성 실패: {e}")
+                conn.rollback()
+                print(f"⚠️  inbody_analysis_reports.section_chunk_count 컬럼 추가 실패: {e}")
+
+            # 리포트가 적은 사용자의 정확 벡터 검색용 (해당 사용자 행만 읽음)
+            try:
+                conn.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS idx_inbody_analysis_reports_user_report_date "
+                        "ON inbody_analysis_reports (user_id, report_date)"
+                    )
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️  inbody_analysis_reports (user_id, report_date) 인덱스 생성 실패: {e}")
+
+        # 인덱스 생성 (pgvector용)
+        if self.pgvector_available:
+            self._create_vector_indexes()
+
+    def _numpy_store(self, namespace: str, dim: int) -> NumpyVectorStore:
+        """numpy 벡터 저장소 (namespace: "reports" / "chunks")"""
+        if dim not in (1536, 1024):
+            raise ValueError(f"지원하지 않는 임베딩 차원: {dim}")
+        key = (namespace, dim)
+        if key not in self._numpy_stores:
+            self._numpy_stores[key] = NumpyVectorStore(VECTOR_STORE_DIR, namespace, dim)
+        return self._numpy_stores[key]
+
+    def _create_vector_indexes(self):
+        """Vector 검색을 위한 인덱스 생성 (1536D + 1024D)"""
+        with self.engine.connect() as conn:
+            # 리포트 임베딩 HNSW 인덱스 (VECTOR_STORAGE 형식만 생성, 1536D: OpenAI / 1024D: Ollama bge-m3)
+            for dim in (1536, 1024):
+                try:
+                    conn.execute(text(report_vector_index_statement(VECTOR_STORAGE, dim)))
+                    conn.commit()
+                    print(f"✅ pgvector HNSW 인덱스 생성 완료 ({dim}D, {VECTOR_STORAGE})")
+                except Exception as e:
+                    conn.rollback()
+                    print(f"⚠️  Vector 인덱스 ({dim}D, {VECTOR_STORAGE}) 생성 실패: {e}")
+
+            # 섹션 청크 임베딩 HNSW 인덱스
+            for dim in (1536, 1024):
+                try:
+                    conn.execute(
+                        text(
+                            f"""
+                            CREATE INDEX IF NOT EXISTS idx_inbody_analysis_chunks_embedding_{dim}_hnsw
+                            ON inbody_analysis_chunks USING hnsw (embedding_{dim} vector_cosine_ops)
+                            WITH (m = 16, ef_construction = 64)
+                            """
+                        )
+                    )
+                    conn.commit()
+                    print(f"✅ pgvector HNSW 인덱스 생성 완료 (섹션 청크 {dim}D)")
+                except Exception as e:
+                    conn.rollback()
+                    print(f"⚠️  Vector 인덱스 (섹션 청크 {dim}D) 생성 실패: {e}")
 
     # ================== Health Records 관련 ==================
 
@@ -132,11 +249,53 @@ class Database:
                 measurements=measurements,
                 source=source,
                 record_date=measured_at or datetime.utcnow(),
+                # pgvector가 없으면 검색 시 측정값에서 바로 계산
+                feature_vector=build_feature_vector(measurements) if self.pgvector_available else None,
             )
             session.add(record)
             session.flush()
             return record.id
 
+    def backfill_measurement_features(self, user_id: Optional[int] = None, limit: int = 500) -> int:
+        """
+        feature_vector가 없는 건강 기록의 특징 벡터 계산 (네트워크 호출 없음)
+
+        Args:
+            user_id: 특정 사용자만 처리 (None이면 전체)
+            limit: 한 번에 처리할 최대 기록 수
+
+        Returns:
+            갱신한 기록 수
+        """
+        if not self.pgvector_available:
+            return 0
+        with self.get_session() as session:
+            query = select(HealthRecord.id, HealthRecord.measurements).where(
+                HealthRecord.feature_vector.is_(None)
+            )
+            if user_id is not None:
+                query = query.where(HealthRecord.user_id == user_id)
+            rows = session.execute(query.order_by(HealthRecord.id).limit(limit)).all()
+            if rows:
+                session.execute(
+                    update(HealthRecord),
+                    [
+                        {"id": r.id, "feature_vector": build_feature_vector(r.measurements or {})}
+                        for r in rows
+                    ],
+                )
+            return len(rows)
+
+    def get_latest_measurements(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """사용자의 가장 최근 건강 기록 측정값 (없으면 None)"""
+        with self.get_session() as session:
+            return session.execute(
+                select(HealthRecord.measurements)
+                .where(HealthRecord.user_id == user_id)
+                .order_by(desc(HealthRecord.record_date))
+                .limit(1)
+            ).scalar()
+
     # ================== Analysis Reports 관련 ==================
 
     def save_analysis_report(
@@ -155,12 +314,18 @@ class Database:
                 record_id=record_id,
                 llm_output=llm_output,
                 model_version=model_version,
-                embedding_1536=embedding_1536,
-                embedding_1024=embedding_1024,
+                embedding_1536=None if self.use_numpy_vectors else embedding_1536,
+                embedding_1024=None if self.use_numpy_vectors else embedding_1024,
             )
             session.add(report)
             session.flush()
-            return report.id
+            report_id, report_date = report.id, report.report_date
+
+        if self.use_numpy_vectors:
+            for dim, embedding in ((1536, embedding_1536), (1024, embedding_1024)):
+                if embedding is not None:
+                    self._numpy_store("reports", dim).add(user_id, [report_id], [embedding], [report_date])
+        return report_id
 
     def update_analysis_embedding(
         self,
@@ -168,20 +333,33 @@ class Database:
         embedding_1536: Optional[List[float]] = None,
         embedding_1024: Optional[List[float]] = None,
     ) -> bool:
-        """인바디 분석 리포트에 임베딩 추가/업데이트"""
+        """인바디 분석 리포트에 임베딩 추가/업데이트 (주어진 차원을 한 번의 UPDATE로 저장)"""
+        values = {}
+        if embedding_1536 is not None:
+            values["embedding_1536"] = embedding_1536
+        if embedding_1024 is not None:
+            values["embedding_1024"] = embedding_1024
+        if not values:
+            return False
+        if self.use_numpy_vectors:
+            with self.get_session() as session:
+                row = session.execute(
+                    select(InbodyAnalysisReport.user_id, InbodyAnalysisReport.report_date)
+                    .where(InbodyAnalysisReport.id == report_id)
+                ).first()
+            if row is None:
+                return False
+            for column, embedding in values.items():
+                dim = int(column.rsplit("_", 1)[1])
+                self._numpy_store("reports", dim).add(row.user_id, [report_id], [embedding], [row.report_date])
+            return True
         with self.get_session() as session:
-            report = (
-                session.query(InbodyAnalysisReport)
-                .filter(InbodyAnalysisReport.id == report_id)
-                .first()
+            result = session.execute(
+                update(InbodyAnalysisReport)
+                .where(InbodyAnalysisReport.id == report_id)
+                .values(**values)
             )
-            if report:
-                if embedding_1536 is not None:
-                    report.embedding_1536 = embedding_1536
-                if embedding_1024 is not None:
-                    report.embedding_1024 = embedding_1024
-                return True
-            return False
+            return result.rowcount > 0
 
     def get_analysis_report(self, report_id: int) -> Optional[Dict]:
         """인바디 분석 리포트 조회"""
@@ -237,86 +415,762 @@ class Database:
         top_k: int = 6,
         embedding_dim: int = 1536,
         rerank: bool = True,
+        candidate_pool: int = 50,
+        strategy: Optional[str] = None,
+        storage: Optional[str] = None,
     ) -> List[Dict]:
         """
         Vector 유사도 검색 + Reranking (pgvector)
 
+        후보 선택, 점수 계산, top_k 본문 조회를 한 번의 SQL로 처리합니다.
+        검색 대상 리포트 수에 따라 전략을 고릅니다 (shared/vector_search.py).
+        - VECTOR_SEARCH_EXACT_THRESHOLD 미만: 정확 검색 (HNSW 인덱스 미사용)
+        - 그 이상: HNSW 근사 검색 (hnsw.ef_search >= 후보 수, iterative scan)
+          VECTOR_STORAGE가 halfvec/binary이면 양자화 인덱스로 후보를 넓게 고른 뒤 원본 float32 거리로 재정렬
+        근사 검색 일부는 정확 검색 결과와 비교하여 recall을 기록합니다 (self.vector_search_stats).
+
         Args:
             user_id: 사용자 ID
             query_embedding: 쿼리 임베딩 벡터
             top_k: 반환할 결과 수
             embedding_dim: 임베딩 차원 (1536 or 1024)
             rerank: 시간 가중치 reranking 적용 여부
+            candidate_pool: reranking 대상 후보 수 (top_k * 2보다 작으면 top_k * 2)
+            strategy: 검색 전략 고정 (exact / ann, None이면 리포트 수로 선택하고 recall 표본 측정)
+            storage: 근사 검색에 사용할 인덱스 형식 (full / halfvec / binary, None이면 VECTOR_STORAGE)
+
+        Returns:
+            유사도 + 시간 가중치가 반영된 분석 리포트 리스트
+        """
+        if self.use_numpy_vectors:
+            started = time.perf_counter()
+            results = self._search_similar_analyses_numpy(
+                user_id, query_embedding, top_k, embedding_dim, rerank, candidate_pool
+            )
+            # numpy 저장소는 항상 전체 벡터와 비교하는 정확 검색
+            self.vector_search_stats.record_latency(EXACT, (time.perf_counter() - started) * 1000)
+            return results
+
+        # 임베딩 차원에 따라 컬럼 선택
+        if embedding_dim == 1536:
+            embedding_col = InbodyAnalysisReport.embedding_1536
+        elif embedding_dim == 1024:
+            embedding_col = InbodyAnalysisReport.embedding_1024
+        else:
+            raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
+
+        with self.get_session() as session:
+            sample_recall = strategy is None
+            if strategy is None:
+                searchable = session.scalar(
+                    select(func.count())
+                    .select_from(InbodyAnalysisReport)
+                    .where(InbodyAnalysisReport.user_id == user_id, embedding_col.isnot(None))
+                )
+                strategy = EXACT if searchable < VECTOR_SEARCH_EXACT_THRESHOLD else ANN
+            params = dict(
+                user_id=user_id,
+                embedding_col=embedding_col,
+                query_embedding=query_embedding,
+                top_k=top_k,
+                rerank=rerank,
+                candidate_pool=candidate_pool,
+            )
+
+            started = time.perf_counter()
+            results = self._search_reports_pgvector(
+                session, exact=(strategy == EXACT), storage=storage or VECTOR_STORAGE, **params
+            )
+            self.vector_search_stats.record_latency(strategy, (time.perf_counter() - started) * 1000)
+
+            if sample_recall and strategy == ANN and random.random() < VECTOR_SEARCH_RECALL_SAMPLE_RATE:
+                expected = {
+                    r["id"] for r in self._search_reports_pgvector(session, exact=True, storage="full", **params)
+                }
+                if expected:
+                    recall = len(expected & {r["id"] for r in results}) / len(expected)
+                    self.vector_search_stats.record_recall(recall)
+                    if recall < 1.0:
+                        print(f"📉 벡터 근사 검색 recall {recall:.2f} (user_id={user_id}, top_k={top_k})")
+            return results
+
+    def _search_reports_pgvector(
+        self,
+        session: Session,
+        exact: bool,
+        storage: str,
+        user_id: int,
+        embedding_col,
+        query_embedding: List[float],
+        top_k: int,
+        rerank: bool,
+        candidate_pool: int,
+    ) -> List[Dict]:
+        """
+        search_similar_analyses의 pgvector 쿼리
+
+        exact=True면 HNSW 인덱스를 쓰지 않는 정확 검색,
+        exact=False면 storage 형식의 HNSW 인덱스로 후보를 고르는 근사 검색
+        """
+        pool_size = max(candidate_pool, top_k * 2) if rerank else top_k
+        quantized = not exact and storage != "full"
+        if not exact:
+            # ef_search는 인덱스에서 꺼낼 후보 수(양자화 인덱스는 oversample 배) 이상이어야 함
+            set_ann_search_params(
+                session, max(VECTOR_SEARCH_EF_SEARCH, pool_size * ANN_OVERSAMPLE[storage])
+            )
+
+        # 1. 후보: pgvector cosine distance 순 (1 - cosine similarity)
+        #    id/날짜/거리만 가져오고, 후보 수를 넓혀 최신 리포트도 reranking 대상에 포함
+        distance = embedding_col.cosine_distance(query_embedding).label("distance")
+        searchable = (InbodyAnalysisReport.user_id == user_id, embedding_col.isnot(None))
+        if quantized:
+            # 1-1. 양자화 인덱스로 넓게 고르고, 1-2. 원본 float32 거리로 다시 정렬
+            dim = embedding_col.type.dim
+            shortlist = (
+                select(InbodyAnalysisReport.id)
+                .where(*searchable)
+                .order_by(quantized_distance(embedding_col, dim, query_embedding, storage))
+                .limit(pool_size * ANN_OVERSAMPLE[storage])
+                .subquery("quantized")
+            )
+            candidates = (
+                select(InbodyAnalysisReport.id, InbodyAnalysisReport.report_date, distance)
+                .join(shortlist, InbodyAnalysisReport.id == shortlist.c.id)
+                .order_by(distance)
+                .limit(pool_size)
+                .subquery("candidates")
+            )
+        else:
+            # "+ 0"으로 정렬식이 인덱스 연산자와 달라지면 플래너가 HNSW 대신 사용자 행만 읽어 정확 정렬
+            order_key = embedding_col.cosine_distance(query_embedding) + 0 if exact else distance
+            candidates = (
+                select(InbodyAnalysisReport.id, InbodyAnalysisReport.report_date, distance)
+                .where(*searchable)
+                .order_by(order_key)
+                .limit(pool_size)
+                .subquery("candidates")
+            )
+
+        # 2. 점수 계산 (SQL): 시간 가중치 = 1 / (1 + ln(days_ago + 1))
+        #    report_date는 UTC 기준 naive timestamp
+        similarity = (1 - candidates.c.distance).label("similarity")
+        days_ago = func.greatest(
+            func.floor(
+                extract("epoch", func.timezone("utc", func.now()) - candidates.c.report_date)
+                / 86400
+            ),
+            0,
+        )
+        time_weight = 1.0 / (1 + func.ln(days_ago + 1))
+        # 최종 점수 = 유사도 * 0.7 + 시간 가중치 * 0.3
+        score = similarity * 0.7 + time_weight * 0.3 if rerank else similarity
+        ranked = (
+            select(
+                candidates.c.id,
+                similarity,
+                days_ago.label("days_ago"),
+                time_weight.label("time_weight"),
+                score.label("rerank_score"),
+            )
+            .order_by(desc("rerank_score"))
+            .limit(top_k)
+            .subquery("ranked")
+        )
+
+        # 3. 최종 top_k만 본문 조인 (한 번의 쿼리)
+        rows = session.execute(
+            select(
+                ranked,
+                InbodyAnalysisReport.user_id,
+                InbodyAnalysisReport.record_id,
+                InbodyAnalysisReport.report_date,
+                InbodyAnalysisReport.llm_output,
+                InbodyAnalysisReport.model_version,
+            )
+            .join(InbodyAnalysisReport, InbodyAnalysisReport.id == ranked.c.id)
+            .order_by(desc(ranked.c.rerank_score))
+        ).all()
+
+        results = []
+        for r in rows:
+            result = {
+                "id": r.id,
+                "user_id": r.user_id,
+                "record_id": r.record_id,
+                "report_date": r.report_date,
+                "llm_output": r.llm_output,
+                "model_version": r.model_version,
+                "similarity": r.similarity,  # cosine similarity
+            }
+            if rerank:
+                result["rerank_score"] = r.rerank_score
+                result["time_weight"] = r.time_weight
+                result["days_ago"] = int(r.days_ago)
+            results.append(result)
+        return results
+
+    def _search_similar_analyses_numpy(
+        self,
+        user_id: int,
+        query_embedding: List[float],
+        top_k: int,
+        embedding_dim: int,
+        rerank: bool,
+        candidate_pool: int,
+    ) -> List[Dict]:
+        """search_similar_analyses의 numpy 저장소 버전 (점수 계산은 프로세스 내, 본문은 한 번의 쿼리로 조회)"""
+        hits = self._numpy_store("reports", embedding_dim).search(
+            user_id, query_embedding, top_k=top_k, rerank=rerank, candidate_pool=candidate_pool
+        )
+        if not hits:
+            return []
+        with self.get_session() as session:
+            rows = session.execute(
+                select(
+                    InbodyAnalysisReport.id,
+                    InbodyAnalysisReport.user_id,
+                    InbodyAnalysisReport.record_id,
+                    InbodyAnalysisReport.report_date,
+                    InbodyAnalysisReport.llm_output,
+                    InbodyAnalysisReport.model_version,
+                ).where(InbodyAnalysisReport.id.in_([hit["id"] for hit in hits]))
+            ).all()
+        reports = {r.id: r for r in rows}
+
+        results = []
+        for hit in hits:
+            r = reports.get(hit["id"])
+            if r is None:  # 저장소에만 남은 삭제된 리포트
+                continue
+            result = {
+                "id": r.id,
+                "user_id": r.user_id,
+                "record_id": r.record_id,
+                "report_date": r.report_date,
+                "llm_output": r.llm_output,
+                "model_version": r.model_version,
+                "similarity": hit["similarity"],  # cosine similarity
+            }
+            if rerank:
+                result["rerank_score"] = hit["rerank_score"]
+                result["time_weight"] = hit["time_weight"]
+                result["days_ago"] = hit["days_ago"]
+            results.append(result)
+        return results
+
+    def search_similar_by_measurements(
+        self,
+        user_id: int,
+        measurements: Dict[str, Any],
+        top_k: int = 6,
+        rerank: bool = True,
+        candidate_pool: int = 50,
+    ) -> List[Dict]:
+        """
+        측정값 특징 벡터 유사도 검색 + Reranking (임베딩 API 호출 없음)
+
+        health_records.feature_vector의 L2 거리로 비슷한 체성분 상태였던 기록을 찾고,
+        그 기록의 분석 리포트를 search_similar_analyses와 같은 형식으로 반환합니다.
+
+        Args:
+            user_id: 사용자 ID
+            measurements: 기준 측정값 (보통 최신 기록)
+            top_k: 반환할 결과 수
+            rerank: 시간 가중치 reranking 적용 여부
+            candidate_pool: reranking 대상 후보 기록 수
 
         Returns:
             유사도 + 시간 가중치가 반영된 분석 리포트 리스트
         """
-        from datetime import datetime
-        import math
+        query_vector = build_feature_vector(measurements)
+        if not self.pgvector_available:
+            return self._search_similar_by_measurements_numpy(
+                user_id, query_vector, top_k, rerank, candidate_pool
+            )
+        with self.get_session() as session:
+            # 1. 후보 기록: 특징 벡터 L2 거리 순
+            distance = HealthRecord.feature_vector.l2_distance(query_vector).label("distance")
+            candidates = (
+                select(HealthRecord.id, HealthRecord.record_date, distance)
+                .where(
+                    HealthRecord.user_id == user_id,
+                    HealthRecord.feature_vector.isnot(None),
+                )
+                .order_by(distance)
+                .limit(max(candidate_pool, top_k * 2) if rerank else top_k)
+                .subquery("candidates")
+            )
+
+            # 2. 기록의 분석 리포트와 조인 후 점수 계산 (시간 가중치는 측정일 기준)
+            similarity = (1.0 / (1 + candidates.c.distance)).label("similarity")  # 거리 0이면 1
+            days_ago = func.greatest(
+                func.floor(
+                    extract("epoch", func.timezone("utc", func.now()) - candidates.c.record_date)
+                    / 86400
+                ),
+                0,
+            )
+            time_weight = 1.0 / (1 + func.ln(days_ago + 1))
+            score = similarity * 0.7 + time_weight * 0.3 if rerank else similarity
+            rows = session.execute(
+                select(
+                    InbodyAnalysisReport.id,
+                    InbodyAnalysisReport.user_id,
+                    InbodyAnalysisReport.record_id,
+                    InbodyAnalysisReport.report_date,
+                    InbodyAnalysisReport.llm_output,
+                    InbodyAnalysisReport.model_version,
+                    candidates.c.distance,
+                    similarity,
+                    days_ago.label("days_ago"),
+                    time_weight.label("time_weight"),
+                    score.label("rerank_score"),
+                )
+                .join(candidates, InbodyAnalysisReport.record_id == candidates.c.id)
+                .order_by(desc("rerank_score"))
+                .limit(top_k)
+            ).all()
+
+            results = []
+            for r in rows:
+                result = {
+                    "id": r.id,
+                    "user_id": r.user_id,
+                    "record_id": r.record_id,
+                    "report_date": r.report_date,
+                    "llm_output": r.llm_output,
+                    "model_version": r.model_version,
+                    "similarity": r.similarity,  # 1 / (1 + L2 거리)
+                    "feature_distance": r.distance,
+                }
+                if rerank:
+                    result["rerank_score"] = r.rerank_score
+                    result["time_weight"] = r.time_weight
+                    result["days_ago"] = int(r.days_ago)
+                results.append(result)
+            return results
+
+    def _search_similar_by_measurements_numpy(
+        self,
+        user_id: int,
+        query_vector: List[float],
+        top_k: int,
+        rerank: bool,
+        candidate_pool: int,
+    ) -> List[Dict]:
+        """search_similar_by_measurements의 pgvector 없는 버전 (특징 벡터를 측정값에서 계산해 L2 거리 비교)"""
+        with self.get_session() as session:
+            records = session.execute(
+                select(HealthRecord.id, HealthRecord.record_date, HealthRecord.measurements)
+                .where(HealthRecord.user_id == user_id)
+            ).all()
+            if not records:
+                return []
+
+            # 1. 후보 기록: 특징 벡터 L2 거리 순
+            features = np.asarray(
+                [build_feature_vector(r.measurements or {}) for r in records], dtype=np.float32
+            )
+            distances = np.linalg.norm(features - np.asarray(query_vector, dtype=np.float32), axis=1)
+            pool = min(max(candidate_pool, top_k * 2) if rerank else top_k, len(records))
+            candidates = {
+                records[i].id: (float(distances[i]), records[i].record_date)
+                for i in np.argsort(distances)[:pool]
+            }
+
+            # 2. 기록의 분석 리포트 조회 (한 번의 쿼리)
+            rows = session.execute(
+                select(
+                    InbodyAnalysisReport.id,
+                    InbodyAnalysisReport.user_id,
+                    InbodyAnalysisReport.record_id,
+                    InbodyAnalysisReport.report_date,
+                    InbodyAnalysisReport.llm_output,
+                    InbodyAnalysisReport.model_version,
+                ).where(InbodyAnalysisReport.record_id.in_(list(candidates)))
+            ).all()
+
+        # 3. 점수 계산 (시간 가중치는 측정일 기준, record_date는 UTC 기준 naive timestamp)
+        now = datetime.utcnow()
+        results = []
+        for r in rows:
+            distance, record_date = candidates[r.record_id]
+            similarity = 1.0 / (1 + distance)  # 거리 0이면 1
+            days_ago = max(math.floor((now - record_date).total_seconds() / 86400), 0)
+            time_weight = 1.0 / (1 + math.log(days_ago + 1))
+            result = {
+                "id": r.id,
+                "user_id": r.user_id,
+                "record_id": r.record_id,
+                "report_date": r.report_date,
+                "llm_output": r.llm_output,
+                "model_version": r.model_version,
+                "similarity": similarity,  # 1 / (1 + L2 거리)
+                "feature_distance": distance,
+            }
+            if rerank:
+                result["rerank_score"] = similarity * 0.7 + time_weight * 0.3
+                result["time_weight"] = time_weight
+                result["days_ago"] = days_ago
+            results.append(result)
+        results.sort(key=lambda item: item.get("rerank_score", item["similarity"]), reverse=True)
+        return results[:top_k]
+
+    # ================== Analysis Section Chunks 관련 ==================
+
+    def save_analysis_chunks(self, report_id: int, chunks: List[Dict[str, Any]]) -> int:
+        """
+        리포트 섹션 청크 저장 (기존 청크는 교체)
+
+        리포트의 section_chunk_count도 함께 기록하므로, 섹션이 없는 리포트(빈 목록)도
+        청크 생성 대상(get_reports_without_chunks)에서 빠집니다.
+
+        Args:
+            report_id: 분석 리포트 ID
+            chunks: [{"section_no", "title", "content", "embedding_1536"?, "embedding_1024"?}, ...]
+
+        Returns:
+            저장한 청크 수 (리포트가 없으면 0)
+        """
+        with self.get_session() as session:
+            report = session.execute(
+                select(InbodyAnalysisReport.user_id, InbodyAnalysisReport.report_date)
+                .where(InbodyAnalysisReport.id == report_id)
+            ).first()
+            if report is None:
+                return 0
+            session.query(InbodyAnalysisChunk).filter(
+                InbodyAnalysisChunk.report_id == report_id
+            ).delete(synchronize_session=False)
+            rows = [
+                InbodyAnalysisChunk(
+                    report_id=report_id,
+                    user_id=report.user_id,
+                    section_no=chunk["section_no"],
+                    title=chunk["title"][:200],
+                    content=chunk["content"],
+                    embedding_1536=None if self.use_numpy_vectors else chunk.get("embedding_1536"),
+                    embedding_1024=None if self.use_numpy_vectors else chunk.get("embedding_1024"),
+                )
+                for chunk in chunks
+            ]
+            session.add_all(rows)
+            session.execute(
+                update(InbodyAnalysisReport)
+                .where(InbodyAnalysisReport.id == report_id)
+                .values(section_chunk_count=len(rows))
+            )
+            session.flush()
+            chunk_ids = [row.id for row in rows]
+
+        if self.use_numpy_vectors:
+            # 교체된 이전 청크 id는 저장소에 남지만 검색 시 DB 조회에서 제외됨
+            for dim in (1536, 1024):
+                pairs = [
+                    (chunk_id, chunk[f"embedding_{dim}"])
+                    for chunk_id, chunk in zip(chunk_ids, chunks)
+                    if chunk.get(f"embedding_{dim}") is not None
+                ]
+                if pairs:
+                    self._numpy_store("chunks", dim).add(
+                        report.user_id,
+                        [chunk_id for chunk_id, _ in pairs],
+                        [embedding for _, embedding in pairs],
+                        [report.report_date] * len(pairs),
+                    )
+        return len(chunks)
+
+    def get_reports_without_chunks(
+        self, user_id: Optional[int] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """섹션 청크를 아직 만들지 않은 리포트 (최신순, 청크 생성 대상, user_id=None이면 전체 사용자)"""
+        with self.get_session() as session:
+            query = select(InbodyAnalysisReport.id, InbodyAnalysisReport.llm_output).where(
+                InbodyAnalysisReport.section_chunk_count.is_(None)
+            )
+            if user_id is not None:
+                query = query.where(InbodyAnalysisReport.user_id == user_id)
+            rows = session.execute(
+                query.order_by(desc(InbodyAnalysisReport.report_date)).limit(limit)
+            ).all()
+            return [{"id": r.id, "llm_output": r.llm_output} for r in rows]
+
+    def get_chunks_missing_embedding(
+        self, embedding_dim: int, user_id: Optional[int] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        해당 차원 임베딩이 비어 있는 섹션 청크 (청크 저장 시 임베딩에 실패한 차원 재시도용)
 
+        Returns:
+            [{"id", "title", "content"}, ...] (id 순)
+        """
+        if embedding_dim not in (1536, 1024):
+            raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
+        with self.get_session() as session:
+            query = select(
+                InbodyAnalysisChunk.id,
+                InbodyAnalysisChunk.user_id,
+                InbodyAnalysisChunk.title,
+                InbodyAnalysisChunk.content,
+            )
+            if user_id is not None:
+                query = query.where(InbodyAnalysisChunk.user_id == user_id)
+            if not self.use_numpy_vectors:
+                embedding_col = getattr(InbodyAnalysisChunk, f"embedding_{embedding_dim}")
+                query = query.where(embedding_col.is_(None)).limit(limit)
+            rows = session.execute(query.order_by(InbodyAnalysisChunk.id)).all()
+
+        if self.use_numpy_vectors:
+            # numpy 저장소에서는 컬럼이 항상 비어 있으므로 저장소에 없는 청크 id로 판단
+            store = self._numpy_store("chunks", embedding_dim)
+            stored: Dict[int, Any] = {}
+            missing = []
+            for r in rows:
+                if r.user_id not in stored:
+                    stored[r.user_id] = store.ids(r.user_id)
+                if not np.isin(r.id, stored[r.user_id]):
+                    missing.append(r)
+                    if len(missing) >= limit:
+                        break
+            rows = missing
+        return [{"id": r.id, "title": r.title, "content": r.content} for r in rows]
+
+    def update_chunk_embeddings(
+        self, embedding_dim: int, embeddings: List[Tuple[int, List[float]]]
+    ) -> int:
+        """
+        섹션 청크 임베딩 저장 (비어 있던 차원 재시도 결과)
+
+        Args:
+            embedding_dim: 임베딩 차원 (1536 or 1024)
+            embeddings: [(chunk_id, embedding), ...]
+
+        Returns:
+            저장한 청크 수
+        """
+        if not embeddings:
+            return 0
+        if embedding_dim not in (1536, 1024):
+            raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
+        if self.use_numpy_vectors:
+            vectors = dict(embeddings)
+            with self.get_session() as session:
+                rows = session.execute(
+                    select(InbodyAnalysisChunk.id, InbodyAnalysisChunk.user_id, InbodyAnalysisReport.report_date)
+                    .join(InbodyAnalysisReport, InbodyAnalysisReport.id == InbodyAnalysisChunk.report_id)
+                    .where(InbodyAnalysisChunk.id.in_(list(vectors)))
+                ).all()
+            by_user: Dict[int, list] = {}
+            for r in rows:
+                by_user.setdefault(r.user_id, []).append(r)
+            for chunk_user_id, user_rows in by_user.items():
+                self._numpy_store("chunks", embedding_dim).add(
+                    chunk_user_id,
+                    [r.id for r in user_rows],
+                    [vectors[r.id] for r in user_rows],
+                    [r.report_date for r in user_rows],
+                )
+            return len(rows)
+        with self.get_session() as session:
+            # primary key 기준 bulk UPDATE (executemany)
+            session.execute(
+                update(InbodyAnalysisChunk),
+                [
+                    {"id": chunk_id, f"embedding_{embedding_dim}": embedding}
+                    for chunk_id, embedding in embeddings
+                ],
+            )
+        return len(embeddings)
+
+    def search_similar_chunks(
+        self,
+        user_id: int,
+        query_embedding: List[float],
+        top_k: int = 6,
+        embedding_dim: int = 1536,
+        rerank: bool = True,
+        candidate_pool: int = 50,
+    ) -> List[Dict]:
+        """
+        섹션 청크 Vector 유사도 검색 + Reranking (pgvector)
+
+        search_similar_analyses와 같은 방식이지만 리포트 전체 대신 관련 섹션 본문만 반환합니다.
+        시간 가중치는 청크가 속한 리포트의 작성일 기준입니다.
+
+        Returns:
+            [{"id": 청크 ID, "report_id", "record_id", "report_date", "section_title", "content",
+              "similarity", "rerank_score", "time_weight", "days_ago"}, ...]
+        """
+        if self.use_numpy_vectors:
+            return self._search_similar_chunks_numpy(
+                user_id, query_embedding, top_k, embedding_dim, rerank, candidate_pool
+            )
         with self.get_session() as session:
-            # 임베딩 차원에 따라 컬럼 선택
             if embedding_dim == 1536:
-                embedding_col = InbodyAnalysisReport.embedding_1536
+                embedding_col = InbodyAnalysisChunk.embedding_1536
             elif embedding_dim == 1024:
-                embedding_col = InbodyAnalysisReport.embedding_1024
+                embedding_col = InbodyAnalysisChunk.embedding_1024
             else:
                 raise ValueError(f"지원하지 않는 임베딩 차원: {embedding_dim}")
 
-            # pgvector의 cosine distance 사용 (1 - cosine similarity)
-            # 후보를 더 많이 가져와서 reranking (top_k * 2)
-            candidate_limit = top_k * 2 if rerank else top_k
-
-            results = (
-                session.query(
-                    InbodyAnalysisReport,
-                    embedding_col.cosine_distance(query_embedding).label("distance"),
-                )
-                .filter(
-                    InbodyAnalysisReport.user_id == user_id,
+            # 1. 후보 청크: pgvector cosine distance 순
+            distance = embedding_col.cosine_distance(query_embedding).label("distance")
+            candidates = (
+                select(InbodyAnalysisChunk.id, InbodyAnalysisChunk.report_id, distance)
+                .where(
+                    InbodyAnalysisChunk.user_id == user_id,
                     embedding_col.isnot(None),
                 )
-                .order_by(text("distance"))
-                .limit(candidate_limit)
-                .all()
+                .order_by(distance)
+                .limit(max(candidate_pool, top_k * 2) if rerank else top_k)
+                .subquery("candidates")
             )
 
-            # 결과 변환
-            candidates = [
-                {
-                    "id": r[0].id,
-                    "user_id": r[0].user_id,
-                    "record_id": r[0].record_id,
-                    "report_date": r[0].report_date,
-                    "llm_output": r[0].llm_output,
-                    "model_version": r[0].model_version,
-                    "similarity": 1 - r.distance,  # cosine similarity로 변환
+            # 2. 리포트 작성일로 시간 가중치 계산 후 top_k 선택
+            similarity = (1 - candidates.c.distance).label("similarity")
+            days_ago = func.greatest(
+                func.floor(
+                    extract("epoch", func.timezone("utc", func.now()) - InbodyAnalysisReport.report_date)
+                    / 86400
+                ),
+                0,
+            )
+            time_weight = 1.0 / (1 + func.ln(days_ago + 1))
+            score = similarity * 0.7 + time_weight * 0.3 if rerank else similarity
+            ranked = (
+                select(
+                    candidates.c.id,
+                    InbodyAnalysisReport.record_id,
+                    InbodyAnalysisReport.report_date,
+                    similarity,
+                    days_ago.label("days_ago"),
+                    time_weight.label("time_weight"),
+                    score.label("rerank_score"),
+                )
+                .join(InbodyAnalysisReport, InbodyAnalysisReport.id == candidates.c.report_id)
+                .order_by(desc("rerank_score"))
+                .limit(top_k)
+                .subquery("ranked")
+            )
+
+            # 3. 최종 top_k 청크만 본문 조인
+            rows = session.execute(
+                select(
+                    ranked,
+                    InbodyAnalysisChunk.report_id,
+                    InbodyAnalysisChunk.section_no,
+                    InbodyAnalysisChunk.title,
+                    InbodyAnalysisChunk.content,
+                )
+                .join(InbodyAnalysisChunk, InbodyAnalysisChunk.id == ranked.c.id)
+                .order_by(desc(ranked.c.rerank_score))
+            ).all()
+
+            results = []
+            for r in rows:
+                result = {
+                    "id": r.id,
+                    "report_id": r.report_id,
+                    "record_id": r.record_id,
+                    "report_date": r.report_date,
+                    "section_no": r.section_no,
+                    "section_title": r.title,
+                    "content": r.content,
+                    "similarity": r.similarity,  # cosine similarity
                 }
-                for r in results
-            ]
+                if rerank:
+                    result["rerank_score"] = r.rerank_score
+                    result["time_weight"] = r.time_weight
+                    result["days_ago"] = int(r.days_ago)
+                results.append(result)
+            return results
 
-            # Reranking: 유사도 + 시간 가중치
-            if rerank and candidates:
-                now = datetime.utcnow()
+    def _search_similar_chunks_numpy(
+        self,
+        user_id: int,
+        query_embedding: List[float],
+        top_k: int,
+        embedding_dim: int,
+        rerank: bool,
+        candidate_pool: int,
+    ) -> List[Dict]:
+        """search_similar_chunks의 numpy 저장소 버전 (점수 계산은 프로세스 내, 본문은 한 번의 쿼리로 조회)"""
+        hits = self._numpy_store("chunks", embedding_dim).search(
+            user_id, query_embedding, top_k=top_k, rerank=rerank, candidate_pool=candidate_pool
+        )
+        if not hits:
+            return []
+        with self.get_session() as session:
+            rows = session.execute(
+                select(
+                    InbodyAnalysisChunk.id,
+                    InbodyAnalysisChunk.report_id,
+                    InbodyAnalysisChunk.section_no,
+                    InbodyAnalysisChunk.title,
+                    InbodyAnalysisChunk.content,
+                    InbodyAnalysisReport.record_id,
+                    InbodyAnalysisReport.report_date,
+                )
+                .join(InbodyAnalysisReport, InbodyAnalysisReport.id == InbodyAnalysisChunk.report_id)
+                .where(InbodyAnalysisChunk.id.in_([hit["id"] for hit in hits]))
+            ).all()
+        chunks = {r.id: r for r in rows}
 
-                for candidate in candidates:
-                    # 시간 가중치 계산 (최신일수록 높은 점수)
-                    days_ago = (now - candidate["report_date"]).days
-                    # ln(days_ago + 1) - 자연로그로 시간 decay
-                    time_decay = 1 / (1 + math.log(days_ago + 1))
+        results = []
+        for hit in hits:
+            r = chunks.get(hit["id"])
+            if r is None:  # 교체/삭제된 청크
+                continue
+            result = {
+                "id": r.id,
+                "report_id": r.report_id,
+                "record_id": r.record_id,
+                "report_date": r.report_date,
+                "section_no": r.section_no,
+                "section_title": r.title,
+                "content": r.content,
+                "similarity": hit["similarity"],  # cosine similarity
+            }
+            if rerank:
+                result["rerank_score"] = hit["rerank_score"]
+                result["time_weight"] = hit["time_weight"]
+                result["days_ago"] = hit["days_ago"]
+            results.append(result)
+        return results
 
-                    # 최종 점수 = 유사도 * 0.7 + 시간 가중치 * 0.3
-                    candidate["rerank_score"] = (
-                        candidate["similarity"] * 0.7 + time_decay * 0.3
-                    )
-                    candidate["time_weight"] = time_decay
-                    candidate["days_ago"] = days_ago
+    # ================== Query Embedding 캐시 관련 ==================
+    # pgvector가 없으면 캐시하지 않음 (query_embeddings.embedding 컬럼이 real[])
 
-                # Rerank score로 재정렬
-                candidates.sort(key=lambda x: x["rerank_score"], reverse=True)
+    def get_query_embedding(self, cache_key: str) -> Optional[List[float]]:
+        """캐시된 쿼리 임베딩 조회 (없으면 None)"""
+        if not self.pgvector_available:
+            return None
+        with self.get_session() as session:
+            row = session.get(QueryEmbedding, cache_key)
+            return [float(v) for v in row.embedding] if row else None
 
-            # top_k만 반환
-            return candidates[:top_k]
+    def save_query_embedding(
+        self,
+        cache_key: str,
+        embedding_model: str,
+        dimension: int,
+        query_text: str,
+        embedding: List[float],
+    ) -> None:
+        """쿼리 임베딩 캐시 저장 (같은 키가 있으면 덮어씀)"""
+        if not self.pgvector_available:
+            return
+        with self.get_session() as session:
+            session.merge(
+                QueryEmbedding(
+                    cache_key=cache_key,
+                    embedding_model=embedding_model,
+                    dimension=dimension,
+                    query_text=query_text,
+                    embedding=embedding,
+                )
+            )
 
     # ================== Weekly Plans 관련 ==================
 
@@ -21,6 +21,8 @@ from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.types import TypeDecorator
 from pgvector.sqlalchemy import Vector
 
+from shared.measurement_features import FEATURE_DIM
+
 Base = declarative_base()
 
 
@@ -88,6 +90,8 @@ class HealthRecord(Base):
     # InBody 측정 데이터 (JSONB). rule_based_bodytype 결과: body_type1(=stage2), body_type2(=stage3) 포함 가능
     measurements = Column(JSONB, nullable=False)
     source = Column(String(50), default="manual")  # manual, inbody_ocr, etc.
+    # measurements로부터 만든 정규화 특징 벡터 (shared/measurement_features.py, 측정값 유사도 검색용)
+    feature_vector = Column(Vector(FEATURE_DIM), nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="health_records")
@@ -114,15 +118,44 @@ class InbodyAnalysisReport(Base):
     model_version = Column(String(100))  # 사용된 LLM 모델
     embedding_1536 = Column(Vector(1536))  # OpenAI text-embedding-3-small (1536 차원)
     embedding_1024 = Column(Vector(1024))  # Ollama bge-m3 (1024 차원)
+    # 저장된 섹션 청크 수 (NULL: 아직 청크 생성 전, 0: 섹션이 없는 리포트)
+    section_chunk_count = Column(Integer, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="inbody_analysis_reports")
     health_record = relationship("HealthRecord", back_populates="inbody_analysis_reports")
+    chunks = relationship(
+        "InbodyAnalysisChunk", back_populates="report", cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<InbodyAnalysisReport(id={self.id}, user_id={self.user_id}, record_id={self.record_id})>"
 
 
+class InbodyAnalysisChunk(Base):
+    """인바디 분석 리포트 섹션 청크 테이블 ("### [제목]" 단위 본문 + 임베딩)"""
+
+    __tablename__ = "inbody_analysis_chunks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(
+        Integer, ForeignKey("inbody_analysis_reports.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    section_no = Column(Integer, nullable=False)  # 리포트 내 섹션 순번 (0부터)
+    title = Column(String(200), nullable=False)  # 섹션 제목 ("### [제목]"의 제목)
+    content = Column(Text, nullable=False)  # 섹션 본문 (제목 제외)
+    embedding_1536 = Column(Vector(1536))  # OpenAI text-embedding-3-small (1536 차원)
+    embedding_1024 = Column(Vector(1024))  # Ollama bge-m3 (1024 차원)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    report = relationship("InbodyAnalysisReport", back_populates="chunks")
+
+    def __repr__(self):
+        return f"<InbodyAnalysisChunk(id={self.id}, report_id={self.report_id}, title={self.title!r})>"
+
+
 class UserDetail(Base):
     """사용자 상세 테이블 (목표, 선호도, 건강 특이사항)"""
 
@@ -162,3 +195,19 @@ class WeeklyPlan(Base):
 
     def __repr__(self):
         return f"<WeeklyPlan(id={self.id}, user_id={self.user_id}, week={self.week_number})>"
+
+
+class QueryEmbedding(Base):
+    """RAG 검색 쿼리 임베딩 캐시 테이블 (임베딩 모델 + 차원 + 정규화된 쿼리 기준)"""
+
+    __tablename__ = "query_embeddings"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256(모델|차원|정규화된 쿼리)
+    embedding_model = Column(String(100), nullable=False)
+    dimension = Column(Integer, nullable=False)
+    query_text = Column(Text, nullable=False)  # 정규화된 쿼리
+    embedding = Column(Vector(), nullable=False)  # 차원은 dimension 컬럼 참고 (1536 / 1024)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<QueryEmbedding(model={self.embedding_model}, dim={self.dimension}, query={self.query_text!r})>"
@@ -0,0 +1,121 @@
+"""
+RAG 검색 쿼리 임베딩 캐시
+- 키: (임베딩 모델, 차원, 정규화된 쿼리 텍스트) — 정규화는 키에만 사용하고 임베딩은 원문 쿼리로 생성
+- 1차: 프로세스 메모리 LRU
+- 2차: DB 테이블 (query_embeddings) — 재시작 후에도 재사용, 임베딩 API 장애 시에도 검색 가능
+- 고정 쿼리(예: "체형 분석")는 시작 시 미리 채워둠 (prewarm)
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+from shared.database import Database
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFC, 앞뒤/연속 공백 정리, 소문자)"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def make_cache_key(embedding_model: str, dimension: int, normalized_text: str) -> str:
+    """(모델, 차원, 정규화된 쿼리) → sha256 키"""
+    raw = f"{embedding_model}|{dimension}|{normalized_text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """쿼리 임베딩 캐시 (메모리 LRU + DB)"""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        embedding_model: str,
+        dimension: int,
+        db: Optional[Database] = None,
+        max_entries: int = 256,
+    ):
+        """
+        Args:
+            embed_fn: 캐시 미스 시 호출할 임베딩 함수 (텍스트 → 벡터)
+            embedding_model: 임베딩 모델 이름 (캐시 키에 포함)
+            dimension: 임베딩 차원 (캐시 키에 포함)
+            db: 영구 캐시용 Database (None이면 메모리 캐시만 사용)
+            max_entries: 메모리 LRU 최대 항목 수
+        """
+        self.embed_fn = embed_fn
+        self.embedding_model = embedding_model
+        self.dimension = dimension
+        self.db = db
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[List[float]]:
+        if self.db is None:
+            return None
+        try:
+            return self.db.get_query_embedding(key)
+        except Exception as e:
+            print(f"  ⚠️  쿼리 임베딩 캐시 조회 실패: {e}")
+            return None
+
+    def _store(self, key: str, normalized: str, embedding: List[float]) -> None:
+        if self.db is None:
+            return
+        try:
+            self.db.save_query_embedding(
+                key, self.embedding_model, self.dimension, normalized, embedding
+            )
+        except Exception as e:
+            print(f"  ⚠️  쿼리 임베딩 캐시 저장 실패: {e}")
+
+    def get(self, text: str) -> List[float]:
+        """
+        쿼리 임베딩 반환 (메모리 → DB → 임베딩 API 순)
+
+        Raises:
+            임베딩 API 예외 (메모리/DB 캐시에 없고 API 호출도 실패한 경우)
+        """
+        normalized = normalize_query(text)
+        key = make_cache_key(self.embedding_model, self.dimension, normalized)
+
+        embedding = self._memory.get(key)
+        if embedding is None:
+            embedding = self._load(key)
+        if embedding is not None:
+            self.hits += 1
+            self._remember(key, embedding)
+            return embedding
+
+        self.misses += 1
+        # 소문자화/공백 정리는 키에만 적용 (임베딩은 원문 쿼리로 생성)
+        embedding = self.embed_fn(text)
+        if len(embedding) != self.dimension:
+            raise ValueError(
+                f"임베딩 차원 불일치: {len(embedding)} (기대값 {self.dimension})"
+            )
+        self._remember(key, embedding)
+        self._store(key, normalized, embedding)
+        return embedding
+
+    def prewarm(self, queries: Iterable[str]) -> int:
+        """고정 쿼리 임베딩을 미리 캐시 (실패한 쿼리는 건너뜀, 캐시된 개수 반환)"""
+        warmed = 0
+        for query in queries:
+            try:
+                self.get(query)
+                warmed += 1
+            except Exception as e:
+                print(f"  ⚠️  쿼리 임베딩 prewarm 실패 ('{query}'): {e}")
+        return warmed
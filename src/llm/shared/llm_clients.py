@@ -123,17 +123,36 @@ class OpenAIClient(BaseLLMClient):
         except:
             return False
 
-    def create_embedding(self, text: str, model: str = "text-embedding-3-small") -> List[float]:
-        """텍스트를 임베딩 벡터로 변환"""
+    def create_embedding(
+        self, text: str, model: str = "text-embedding-3-small", timeout: Optional[float] = None
+    ) -> List[float]:
+        """텍스트를 임베딩 벡터로 변환 (timeout: 요청 제한 시간(초), None이면 클라이언트 기본값)"""
         try:
+            kwargs = {"timeout": timeout} if timeout is not None else {}
             response = self.client.embeddings.create(
                 model=model,
-                input=text
+                input=text,
+                **kwargs
             )
             return response.data[0].embedding
         except Exception as e:
             raise RuntimeError(f"OpenAI Embedding error: {e}")
 
+    def create_embeddings(
+        self, texts: List[str], model: str = "text-embedding-3-small", timeout: Optional[float] = None
+    ) -> List[List[float]]:
+        """여러 텍스트를 한 번의 요청으로 임베딩 (입력 순서대로 반환)"""
+        try:
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            response = self.client.embeddings.create(
+                model=model,
+                input=texts,
+                **kwargs
+            )
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            raise RuntimeError(f"OpenAI Embedding error: {e}")
+
 
 class OllamaClient(BaseLLMClient):
     """Ollama Local LLM Client"""
@@ -144,10 +163,13 @@ class OllamaClient(BaseLLMClient):
         base_url: str = "http://localhost:11434",
         embedding_model: Optional[str] = None
     ):
+        import requests
         self.model = model
         self.base_url = base_url
         # embedding_model이 지정되지 않으면 bge-m3:latest 사용
         self.embedding_model = embedding_model or "bge-m3:latest"
+        # 같은 인스턴스의 요청은 커넥션을 재사용
+        self.session = requests.Session()
 
     def generate_chat(self, system_prompt: str, user_prompt: str) -> str:
         import requests
@@ -192,26 +214,29 @@ class OllamaClient(BaseLLMClient):
         except:
             return False
 
-    def create_embedding(self, text: str, model: Optional[str] = None) -> List[float]:
+    def create_embedding(
+        self, text: str, model: Optional[str] = None, timeout: Optional[float] = None
+    ) -> List[float]:
         """
         텍스트를 임베딩 벡터로 변환
         
         Args:
             text: 임베딩할 텍스트
             model: 사용할 embedding 모델 (None이면 초기화 시 지정한 embedding_model 사용)
+            timeout: 요청 제한 시간(초), None이면 제한 없음
         
         Returns:
             임베딩 벡터 리스트
         """
-        import requests
         try:
             embedding_model = model or self.embedding_model
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/embeddings",
                 json={
                     "model": embedding_model,
                     "prompt": text
-                }
+                },
+                timeout=timeout
             )
             response.raise_for_status()
             return response.json()["embedding"]
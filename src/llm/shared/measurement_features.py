@@ -0,0 +1,93 @@
+"""
+인바디 측정값 특징 벡터
+health_records.measurements(JSONB)를 고정 길이 수치 벡터로 변환하여,
+임베딩 API 호출 없이 "비슷한 체성분 상태였던 과거 기록"을 찾는 데 사용
+
+- 수치 항목: 기준 범위로 min-max 정규화 후 [0, 1]로 자름
+- 성별: 남자 1 / 여자 0
+- 부위별 등급(근육/체지방 × 5부위): 표준미만/표준/표준이상 one-hot
+- 체형(body_type1, body_type2): one-hot
+- 그룹별 가중치를 곱해 항목 수가 많은 그룹이 거리를 독점하지 않도록 함
+- 값이 없는 항목은 0 (수치 항목은 범위 중앙값)
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# (키, 최소, 최대, 가중치)
+_NUMERIC_FEATURES: Tuple[Tuple[str, float, float, float], ...] = (
+    ("체중", 30.0, 150.0, 1.0),
+    ("골격근량", 10.0, 60.0, 1.0),
+    ("체지방률", 3.0, 60.0, 1.0),
+    ("BMI", 12.0, 45.0, 1.0),
+    ("내장지방레벨", 1.0, 20.0, 1.0),
+    ("복부지방률", 0.7, 1.1, 0.5),
+)
+
+_SEGMENTS = ("왼팔", "오른팔", "몸통", "왼다리", "오른다리")
+_GRADES = ("표준미만", "표준", "표준이상")
+# OCR/수기 입력에서 나오는 다른 표기
+_GRADE_ALIASES = {"표준이하": "표준미만", "부족": "표준미만", "과다": "표준이상", "발달": "표준이상"}
+# 부위 등급 10개(one-hot 30칸)가 수치 항목보다 거리를 크게 좌우하지 않도록 축소
+_SEGMENT_WEIGHT = 0.3
+
+# rule_based_bodytype의 2단계(body_type1) / 3단계(body_type2) 분류 결과
+_BODY_TYPES_1 = ("마른형", "표준형", "근육형", "마른근육형", "고근육체형", "비만형", "고도비만형", "마른비만형")
+_BODY_TYPES_2 = ("표준형", "상체발달형", "하체발달형", "상체비만형", "하체비만형")
+_BODY_TYPE_WEIGHT = 0.7
+
+_SEX_WEIGHT = 1.0
+
+FEATURE_NAMES: Tuple[str, ...] = (
+    tuple(key for key, *_ in _NUMERIC_FEATURES)
+    + ("성별",)
+    + tuple(f"{group}:{segment}:{grade}" for group in ("근육", "체지방") for segment in _SEGMENTS for grade in _GRADES)
+    + tuple(f"body_type1:{t}" for t in _BODY_TYPES_1)
+    + tuple(f"body_type2:{t}" for t in _BODY_TYPES_2)
+)
+FEATURE_DIM = len(FEATURE_NAMES)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _one_hot(value: Optional[str], choices: Tuple[str, ...], weight: float) -> List[float]:
+    return [weight if value == choice else 0.0 for choice in choices]
+
+
+def _segment_features(grades: Optional[Dict[str, str]]) -> List[float]:
+    features: List[float] = []
+    for segment in _SEGMENTS:
+        grade = (grades or {}).get(segment)
+        grade = _GRADE_ALIASES.get(grade, grade)
+        features.extend(_one_hot(grade, _GRADES, _SEGMENT_WEIGHT))
+    return features
+
+
+def build_feature_vector(measurements: Dict[str, Any]) -> List[float]:
+    """
+    측정값 dict → 정규화된 특징 벡터 (길이 FEATURE_DIM)
+
+    Args:
+        measurements: health_records.measurements (InBodyMeasurements 필드명)
+    """
+    features: List[float] = []
+    for key, low, high, weight in _NUMERIC_FEATURES:
+        value = _to_float(measurements.get(key))
+        scaled = 0.5 if value is None else min(max((value - low) / (high - low), 0.0), 1.0)
+        features.append(scaled * weight)
+
+    sex = measurements.get("성별")
+    features.append(_SEX_WEIGHT if sex in ("남자", "남", "M", "male") else 0.0)
+
+    features.extend(_segment_features(measurements.get("근육_부위별등급")))
+    features.extend(_segment_features(measurements.get("체지방_부위별등급")))
+    features.extend(_one_hot(measurements.get("body_type1"), _BODY_TYPES_1, _BODY_TYPE_WEIGHT))
+    features.extend(_one_hot(measurements.get("body_type2"), _BODY_TYPES_2, _BODY_TYPE_WEIGHT))
+    return features
+
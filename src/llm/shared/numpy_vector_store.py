@@ -0,0 +1,201 @@
+"""
+NumPy 기반 벡터 저장소 (pgvector를 사용할 수 없을 때의 대체 저장소)
+
+- 사용자별 디렉토리(샤드)에 float32 행렬을 .npy 세그먼트로 저장하고, 검색 시 memory-map으로 읽음
+- 저장 시 행을 L2 정규화하므로 cosine 유사도 = 행렬 × 쿼리 벡터 (BLAS matmul)
+- 검색 결과에는 pgvector 검색과 같은 시간 가중치 reranking 적용
+- 세그먼트가 많아지면 하나로 합치고 같은 id는 마지막 값만 남김
+
+디렉토리 구조:
+    {root}/{namespace}_{dim}/user_{user_id}/seg_000001.ids.npy   (int64, 항목 id)
+                                            seg_000001.ts.npy    (float64, 작성 시각 epoch 초)
+                                            seg_000001.vec.npy   (float32 [n, dim], 마지막에 기록 = 세그먼트 완료 표시)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 사용자 샤드당 세그먼트가 이 개수를 넘으면 병합
+_MAX_SEGMENTS = 8
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    """naive datetime은 UTC로 간주 (report_date는 UTC 기준 naive timestamp)"""
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _save_atomic(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class NumpyVectorStore:
+    """사용자 샤드별 .npy 세그먼트 벡터 저장소 (brute-force cosine 검색)"""
+
+    def __init__(self, root_dir: str, namespace: str, dimension: int):
+        """
+        Args:
+            root_dir: 저장소 루트 디렉토리
+            namespace: 저장 대상 구분 (예: "reports", "chunks")
+            dimension: 벡터 차원
+        """
+        self.dimension = dimension
+        self.base_dir = os.path.join(root_dir, f"{namespace}_{dimension}")
+        self._lock = threading.Lock()
+
+    def _user_dir(self, user_id: int) -> str:
+        return os.path.join(self.base_dir, f"user_{user_id}")
+
+    def _segments(self, user_id: int) -> List[str]:
+        """완료된 세그먼트 경로 prefix 목록 (오래된 순)"""
+        user_dir = self._user_dir(user_id)
+        if not os.path.isdir(user_dir):
+            return []
+        names = sorted(name[:-len(".vec.npy")] for name in os.listdir(user_dir) if name.endswith(".vec.npy"))
+        return [os.path.join(user_dir, name) for name in names]
+
+    def _load(self, user_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """사용자 전체 (ids, ts, vectors), 같은 id는 나중 세그먼트 값 사용"""
+        ids_parts, ts_parts, vec_parts = [], [], []
+        for prefix in self._segments(user_id):
+            ids_parts.append(np.load(f"{prefix}.ids.npy"))
+            ts_parts.append(np.load(f"{prefix}.ts.npy"))
+            vec_parts.append(np.load(f"{prefix}.vec.npy", mmap_mode="r"))
+        if not ids_parts:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64),
+                np.empty((0, self.dimension), dtype=np.float32),
+            )
+
+        ids = np.concatenate(ids_parts)
+        ts = np.concatenate(ts_parts)
+        vectors = vec_parts[0] if len(vec_parts) == 1 else np.concatenate(vec_parts)
+        # 뒤에서부터 첫 등장 = 가장 최근 값
+        _, last_index = np.unique(ids[::-1], return_index=True)
+        keep = np.sort(len(ids) - 1 - last_index)
+        if len(keep) == len(ids):
+            return ids, ts, vectors
+        return ids[keep], ts[keep], vectors[keep]
+
+    def add(
+        self,
+        user_id: int,
+        ids: Sequence[int],
+        embeddings: Sequence[Sequence[float]],
+        timestamps: Sequence[Optional[datetime]],
+    ) -> int:
+        """
+        벡터를 새 세그먼트로 추가 (같은 id가 이미 있으면 검색 시 새 값이 우선)
+
+        Returns:
+            추가한 벡터 수
+        """
+        if not ids:
+            return 0
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"임베딩 차원 불일치: {vectors.shape} (기대값 [n, {self.dimension}])")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            user_dir = self._user_dir(user_id)
+            os.makedirs(user_dir, exist_ok=True)
+            segments = self._segments(user_id)
+            next_no = int(os.path.basename(segments[-1])[len("seg_"):]) + 1 if segments else 1
+            prefix = os.path.join(user_dir, f"seg_{next_no:06d}")
+            _save_atomic(f"{prefix}.ids.npy", np.asarray(ids, dtype=np.int64))
+            _save_atomic(f"{prefix}.ts.npy", np.asarray([_epoch(t) for t in timestamps], dtype=np.float64))
+            # vec 파일이 있어야 세그먼트로 인식되므로 마지막에 기록
+            _save_atomic(f"{prefix}.vec.npy", vectors)
+
+            if len(segments) + 1 > _MAX_SEGMENTS:
+                self._compact(user_id)
+        return len(ids)
+
+    def _compact(self, user_id: int) -> None:
+        """사용자 세그먼트를 하나로 병합 (lock 보유 상태에서 호출)"""
+        old_segments = self._segments(user_id)
+        ids, ts, vectors = self._load(user_id)
+        next_no = int(os.path.basename(old_segments[-1])[len("seg_"):]) + 1
+        prefix = os.path.join(self._user_dir(user_id), f"seg_{next_no:06d}")
+        _save_atomic(f"{prefix}.ids.npy", ids)
+        _save_atomic(f"{prefix}.ts.npy", ts)
+        _save_atomic(f"{prefix}.vec.npy", np.ascontiguousarray(vectors))
+        for old in old_segments:
+            # 완료 표시(vec)를 먼저 지워 중간에 중단되어도 반쯤 지운 세그먼트를 읽지 않도록 함
+            for suffix in (".vec.npy", ".ids.npy", ".ts.npy"):
+                try:
+                    os.remove(f"{old}{suffix}")
+                except FileNotFoundError:
+                    pass
+
+    def ids(self, user_id: int) -> np.ndarray:
+        """사용자 샤드에 저장된 항목 id (중복 제거, 벡터는 읽지 않음)"""
+        parts = [np.load(f"{prefix}.ids.npy") for prefix in self._segments(user_id)]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def count(self, user_id: int) -> int:
+        return len(self._load(user_id)[0])
+
+    def search(
+        self,
+        user_id: int,
+        query_embedding: Sequence[float],
+        top_k: int = 6,
+        rerank: bool = True,
+        candidate_pool: int = 50,
+        exclude_ids: Optional[Sequence[int]] = None,
+    ) -> List[Dict]:
+        """
+        cosine 유사도 검색 + 시간 가중치 reranking (pgvector 검색과 같은 점수식)
+
+        Returns:
+            [{"id", "similarity", "days_ago", "time_weight", "rerank_score"}, ...] (점수 높은 순)
+        """
+        ids, ts, vectors = self._load(user_id)
+        if exclude_ids:
+            mask = ~np.isin(ids, np.asarray(exclude_ids, dtype=np.int64))
+            ids, ts, vectors = ids[mask], ts[mask], vectors[mask]
+        if len(ids) == 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        similarity = vectors @ (query / norm)
+
+        # 1. 후보: 유사도 상위 pool개
+        pool = min(max(candidate_pool, top_k * 2) if rerank else top_k, len(ids))
+        candidates = np.argpartition(-similarity, pool - 1)[:pool] if pool < len(ids) else np.arange(len(ids))
+
+        # 2. 점수: 시간 가중치 = 1 / (1 + ln(경과 일수 + 1))
+        days_ago = np.maximum(np.floor((time.time() - ts[candidates]) / 86400), 0)
+        time_weight = 1.0 / (1 + np.log(days_ago + 1))
+        sims = similarity[candidates].astype(np.float64)
+        scores = sims * 0.7 + time_weight * 0.3 if rerank else sims
+
+        order = np.argsort(-scores)[:top_k]
+        return [
+            {
+                "id": int(ids[candidates[i]]),
+                "similarity": float(sims[i]),
+                "days_ago": int(days_ago[i]),
+                "time_weight": float(time_weight[i]),
+                "rerank_score": float(scores[i]),
+            }
+            for i in order
+        ]
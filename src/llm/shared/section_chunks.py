@@ -0,0 +1,42 @@
+"""
+분석 리포트 섹션 청크
+LLM 분석 응답을 "### [제목]" 섹션 단위로 나눠 섹션별로 임베딩/검색하기 위한 유틸리티
+(섹션 인식 규칙은 backend/services/llm/parse_utils.py의 split_analysis_response와 동일)
+"""
+
+import re
+from typing import Any, Dict, List
+
+SECTION_HEADING = re.compile(r"###\s*\[([^\]]+)\]")
+
+# 섹션 제목이 없는 리포트는 전체를 하나의 청크로 저장
+WHOLE_REPORT_TITLE = "전체"
+
+
+def split_report_sections(text: str) -> List[Dict[str, Any]]:
+    """
+    분석 텍스트 → 섹션 청크 리스트
+
+    Returns:
+        [{"section_no": 0부터 시작하는 순번, "title": 섹션 제목, "content": 본문 (제목 제외)}, ...]
+        본문이 빈 섹션은 제외합니다.
+    """
+    if not text or not text.strip():
+        return []
+
+    headings = list(SECTION_HEADING.finditer(text))
+    if not headings:
+        return [{"section_no": 0, "title": WHOLE_REPORT_TITLE, "content": text.strip()}]
+
+    chunks: List[Dict[str, Any]] = []
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        content = text[heading.end():end].strip()
+        if content:
+            chunks.append({"section_no": len(chunks), "title": heading.group(1).strip(), "content": content})
+    return chunks
+
+
+def chunk_embedding_text(chunk: Dict[str, Any]) -> str:
+    """청크 임베딩 입력 (제목을 포함해 섹션 주제가 벡터에 반영되도록 함)"""
+    return f"[{chunk['title']}]\n{chunk['content']}"
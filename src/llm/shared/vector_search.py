@@ -0,0 +1,171 @@
+"""
+리포트 벡터 검색 전략 설정 및 통계 (Database.search_similar_analyses에서 사용)
+
+HNSW 인덱스는 전체 사용자 공용이므로, user_id 필터를 건 근사 검색은
+리포트가 적은 사용자에게 top_k보다 적은 결과를 돌려주거나 비효율적으로 탐색할 수 있습니다.
+
+- 검색 대상 리포트 수 < VECTOR_SEARCH_EXACT_THRESHOLD: 정확 검색
+  ((user_id, report_date) 인덱스로 해당 사용자 행만 읽고 거리 계산)
+- 그 이상: HNSW 근사 검색 (SET LOCAL hnsw.ef_search >= 후보 수, hnsw.iterative_scan)
+  VECTOR_STORAGE가 halfvec/binary이면 양자화 인덱스로 후보를 넓게 고른 뒤 원본 float32 벡터로 재정렬
+- 전략별 지연 시간을 기록하고, 근사 검색 일부를 정확 검색 결과와 비교하여 recall 측정
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Float, cast, func, literal, text
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.orm import Session
+from sqlalchemy.types import UserDefinedType
+
+load_dotenv()
+
+VECTOR_SEARCH_EXACT_THRESHOLD = int(os.getenv("VECTOR_SEARCH_EXACT_THRESHOLD", "500"))
+VECTOR_SEARCH_EF_SEARCH = int(os.getenv("VECTOR_SEARCH_EF_SEARCH", "100"))
+# 근사 검색 중 정확 검색과 비교하여 recall을 측정할 비율 (0이면 측정 안 함)
+VECTOR_SEARCH_RECALL_SAMPLE_RATE = float(os.getenv("VECTOR_SEARCH_RECALL_SAMPLE_RATE", "0.01"))
+
+# 리포트 HNSW 인덱스 저장 형식
+# - full: float32 원본 (vector_cosine_ops)
+# - halfvec: float16 표현식 인덱스 (인덱스 크기 약 1/2, pgvector 0.7+)
+# - binary: 1bit 양자화 표현식 인덱스 (인덱스 크기 약 1/32, 해밍 거리)
+# 양자화 인덱스는 후보 선택에만 쓰이고, 최종 거리는 원본 float32 컬럼으로 다시 계산합니다.
+VECTOR_STORAGE_MODES = ("full", "halfvec", "binary")
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "full")
+if VECTOR_STORAGE not in VECTOR_STORAGE_MODES:
+    print(f"⚠️  알 수 없는 VECTOR_STORAGE={VECTOR_STORAGE}, full로 대체합니다.")
+    VECTOR_STORAGE = "full"
+
+# 양자화 인덱스 근사 검색 시 후보 수 배율
+# (양자화 거리로 후보 수 * 배율개를 고른 뒤 원본 float32 거리로 후보 수만큼 다시 선택)
+ANN_OVERSAMPLE = {"full": 1, "halfvec": 2, "binary": 4}
+
+_REPORT_INDEX_EXPRESSIONS = {
+    "full": "embedding_{dim} vector_cosine_ops",
+    "halfvec": "(embedding_{dim}::halfvec({dim})) halfvec_cosine_ops",
+    "binary": "(binary_quantize(embedding_{dim})::bit({dim})) bit_hamming_ops",
+}
+
+EXACT = "exact"
+ANN = "ann"
+
+# 지연 시간 백분위 / recall 평균 계산에 사용할 최근 기록 수
+_STATS_WINDOW = 500
+
+
+class _HalfVector(UserDefinedType):
+    """pgvector halfvec 캐스트용 타입 (인덱스 표현식 embedding::halfvec(dim)과 일치시키기 위해 사용)"""
+
+    cache_ok = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_col_spec(self, **kw) -> str:
+        return f"HALFVEC({self.dim})"
+
+
+def report_vector_index_name(storage: str, dim: int) -> str:
+    """저장 형식/차원별 리포트 HNSW 인덱스 이름 (full은 기존 이름 유지)"""
+    suffix = "hnsw" if storage == "full" else f"{storage}_hnsw"
+    return f"idx_inbody_analysis_reports_embedding_{dim}_{suffix}"
+
+
+def report_vector_index_statement(storage: str, dim: int, concurrently: bool = False) -> str:
+    """저장 형식/차원별 리포트 HNSW 인덱스 생성 SQL (concurrently=True면 쓰기를 막지 않고 생성)"""
+    expression = _REPORT_INDEX_EXPRESSIONS[storage].format(dim=dim)
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{report_vector_index_name(storage, dim)} "
+        f"ON inbody_analysis_reports USING hnsw ({expression}) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def quantized_distance(embedding_col, dim: int, query_embedding: List[float], storage: str):
+    """
+    양자화 인덱스 정렬식 (report_vector_index_statement의 표현식과 같아야 인덱스 사용)
+
+    - halfvec: embedding::halfvec(dim) <=> query::halfvec(dim)  (cosine)
+    - binary: binary_quantize(embedding)::bit(dim) <~> binary_quantize(query)  (hamming)
+    """
+    query_vector = cast(literal(query_embedding, Vector(dim)), Vector(dim))
+    if storage == "halfvec":
+        return cast(embedding_col, _HalfVector(dim)).op("<=>", return_type=Float)(
+            cast(query_vector, _HalfVector(dim))
+        )
+    if storage == "binary":
+        return cast(func.binary_quantize(embedding_col), BIT(dim)).op("<~>", return_type=Float)(
+            func.binary_quantize(query_vector)
+        )
+    raise ValueError(f"지원하지 않는 벡터 저장 형식: {storage}")
+
+
+def set_ann_search_params(session: Session, ef_search: int) -> None:
+    """
+    현재 트랜잭션의 HNSW 검색 파라미터 설정 (SET LOCAL)
+
+    - hnsw.ef_search: 기본값 40은 후보 수(기본 50)보다 작아 후보를 다 채우지 못하므로 후보 수 이상으로 설정
+    - hnsw.iterative_scan: user_id 필터로 걸러져 후보가 부족하면 인덱스를 더 탐색 (pgvector 0.8+)
+    지원하지 않는 설정은 건너뜁니다.
+    """
+    # pgvector의 ef_search 상한은 1000
+    statements = (
+        f"SET LOCAL hnsw.ef_search = {min(int(ef_search), 1000)}",
+        "SET LOCAL hnsw.iterative_scan = strict_order",
+    )
+    for statement in statements:
+        try:
+            with session.begin_nested():
+                session.execute(text(statement))
+        except Exception as e:
+            print(f"⚠️  HNSW 검색 파라미터 설정 실패 ({statement}): {e}")
+
+
+def _percentile(ordered, p: float) -> float:
+    return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 2) if ordered else 0.0
+
+
+class VectorSearchStats:
+    """전략별 검색 횟수/지연 시간과 근사 검색 recall (프로세스 내 누적)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {EXACT: 0, ANN: 0}
+        self._latencies_ms = {EXACT: deque(maxlen=_STATS_WINDOW), ANN: deque(maxlen=_STATS_WINDOW)}
+        self._recall_samples: "deque[float]" = deque(maxlen=_STATS_WINDOW)
+
+    def record_latency(self, strategy: str, latency_ms: float) -> None:
+        with self._lock:
+            self._counts[strategy] += 1
+            self._latencies_ms[strategy].append(latency_ms)
+
+    def record_recall(self, recall: float) -> None:
+        with self._lock:
+            self._recall_samples.append(recall)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{"storage", "exact": {count, p50_ms, p95_ms}, "ann": {...}, "ann_recall": {samples, mean, min}}"""
+        with self._lock:
+            latencies = {strategy: sorted(values) for strategy, values in self._latencies_ms.items()}
+            counts = dict(self._counts)
+            samples = list(self._recall_samples)
+        result: Dict[str, Any] = {"storage": VECTOR_STORAGE}
+        result.update({
+            strategy: {
+                "count": counts[strategy],
+                "p50_ms": _percentile(latencies[strategy], 0.5),
+                "p95_ms": _percentile(latencies[strategy], 0.95),
+            }
+            for strategy in (EXACT, ANN)
+        })
+        result["ann_recall"] = {
+            "samples": len(samples),
+            "mean": round(sum(samples) / len(samples), 4) if samples else None,
+            "min": round(min(samples), 4) if samples else None,
+        }
+        return result